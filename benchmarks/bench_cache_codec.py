@@ -0,0 +1,64 @@
+"""缓存编码基准测试。
+
+对比交易行物品库、资历点数和资历菜单三份基础数据在“JSON 文本”与
+core/cache_codec.py 压缩二进制两种存储形式下的体积、编码和解码耗时，
+以及进程内解码缓存命中时的耗时。
+
+    python benchmarks/bench_cache_codec.py [--items 60000] [--points 30000]
+
+数据与 bench_catalog.py 相同，为随机生成。
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_catalog import make_payloads  # noqa: E402
+from core.cache_codec import DecodeMemo, decode, encode, msgpack, zstandard  # noqa: E402
+
+
+def timeit(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=60000)
+    parser.add_argument("--points", type=int, default=30000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"序列化：{'msgpack' if msgpack is not None else 'JSON'}，"
+        f"压缩：{'zstd' if zstandard is not None else 'zlib'}"
+    )
+    names = ("trade_item_groups", "achievement_points", "achievement_menus")
+    memo = DecodeMemo()
+    print(f"{'数据':<20}{'JSON KB':>10}{'编码 KB':>10}{'JSON 解析 ms':>14}{'编码 ms':>10}{'解码 ms':>10}{'内存命中 ms':>13}")
+    for name, text in zip(names, make_payloads(args.items, args.points)):
+        payload = json.loads(text)
+        blob = encode(payload)
+        assert decode(blob) == payload
+        memo.put(name, 1, payload)
+
+        print(
+            f"{name:<20}"
+            f"{len(text.encode('utf-8')) / 1024:>10.0f}"
+            f"{len(blob) / 1024:>10.0f}"
+            f"{timeit(lambda: json.loads(text), args.repeat):>14.2f}"
+            f"{timeit(lambda: encode(payload), args.repeat):>10.2f}"
+            f"{timeit(lambda: decode(blob), args.repeat):>10.2f}"
+            f"{timeit(lambda: memo.get(name, 1), args.repeat):>13.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""列式基础数据容器基准测试。
+
+对比交易行物品库、资历点数和资历菜单在“JSON 解析后的嵌套字典”与
+core/catalog.py 列式容器两种形式下的常驻内存和查询耗时。
+
+    python benchmarks/bench_catalog.py [--items 60000] [--points 30000]
+
+内存分别在独立子进程中测量：RSS 增量来自 /proc/self/status，
+Python 分配量来自 tracemalloc。数据为随机生成，规模接近线上快照。
+"""
+
+import argparse
+import gc
+import json
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from core.achievement_progress import AchievementProgressEngine  # noqa: E402
+from core.catalog import AchievementMenuTable, AchievementPointTable, np  # noqa: E402
+from core.trade_index import TradeItemIndex  # noqa: E402
+
+CHARS = "天地玄黄宇宙洪荒日月盈昃辰宿列张寒来暑往秋收冬藏闰余成岁律吕调阳云腾致雨露结为霜金生丽水玉出昆冈"
+
+
+def make_payloads(items: int, points: int, seed: int = 7):
+    rng = random.Random(seed)
+    groups = []
+    per_group = max(items // 40, 1)
+    for g in range(0, items, per_group):
+        groups.append(
+            {
+                "name": f"分组{g}",
+                "items": [
+                    {
+                        "item_id": str(100000 + i),
+                        "label": "".join(rng.choice(CHARS) for _ in range(rng.randint(2, 8))),
+                        "icon": str(rng.randint(1, 20000)),
+                    }
+                    for i in range(g, min(g + per_group, items))
+                ],
+            }
+        )
+
+    point_map = {str(1000 + i): rng.choice((0, 5, 10, 15, 20, 30)) for i in range(points)}
+    ids = list(range(1000, 1000 + points))
+    rng.shuffle(ids)
+    menus = {}
+    chunk = len(ids) // 18
+    for m in range(18):
+        part = ids[m * chunk:(m + 1) * chunk]
+        menus[str(m + 1)] = {
+            "name": f"分类{m + 1}",
+            "achievements": part[: len(part) // 4],
+            "children": [
+                {"name": f"子分类{m + 1}-{c}", "achievements": part[len(part) // 4 + c * 50: len(part) // 4 + (c + 1) * 50]}
+                for c in range(max((len(part) * 3 // 4) // 50, 1))
+            ],
+        }
+    return json.dumps(groups, ensure_ascii=False), json.dumps({"points": point_map}), json.dumps({"menus": menus})
+
+
+# ---------------- 现有嵌套字典形式 ----------------
+
+def dict_build(groups_json, points_json, menus_json):
+    groups = json.loads(groups_json)
+    items = []
+    for group in groups:
+        for item in group.get("items", []) or []:
+            items.append({"item_id": str(item["item_id"]), "label": str(item["label"]), "icon": str(item.get("icon") or "")})
+    return items, json.loads(points_json)["points"], json.loads(menus_json)["menus"]
+
+
+def dict_match(items, keyword, limit=50):
+    matched = []
+    seen = set()
+    for item in items:
+        label = item["label"]
+        if keyword not in label or item["item_id"] in seen:
+            continue
+        seen.add(item["item_id"])
+        rank = 0 if label == keyword else 1 if label.startswith(keyword) else 2
+        matched.append((rank, len(label), label, item))
+    matched.sort(key=lambda row: (row[0], row[1], row[2]))
+    return [row[3] for row in matched[:limit]]
+
+
+def dict_category_ids(category):
+    ids = list(category.get("achievements", []))
+    for child in category.get("children", []) or []:
+        ids.extend(child.get("achievements", []))
+    return ids
+
+
+# ---------------- 列式形式 ----------------
+
+def columnar_build(groups_json, points_json, menus_json, with_index=True):
+    index = TradeItemIndex()
+    if with_index:
+        index.build(json.loads(groups_json))
+    else:
+        index.table.extend(TradeItemIndex.flatten(json.loads(groups_json)))
+        index.table.freeze()
+    points = AchievementPointTable.from_points(json.loads(points_json)["points"])
+    menus = AchievementMenuTable.from_menus(json.loads(menus_json)["menus"])
+    gc.collect()
+    return index, points, menus
+
+
+BUILDERS = {
+    "dict": ("嵌套字典", dict_build),
+    "columnar": ("列式容器", lambda *p: columnar_build(*p, with_index=False)),
+    "indexed": ("列式+检索索引", columnar_build),
+}
+
+
+def rss_kb() -> int:
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def measure_child(mode: str, items: int, points: int):
+    payloads = make_payloads(items, points)
+    gc.collect()
+    before_rss = rss_kb()
+    tracemalloc.start()
+    built = BUILDERS[mode][1](*payloads)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({"rss_kb": rss_kb() - before_rss, "alloc_kb": current // 1024}))
+    del built
+
+
+def timeit(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=60000)
+    parser.add_argument("--points", type=int, default=30000)
+    parser.add_argument("--child", choices=tuple(BUILDERS))
+    args = parser.parse_args()
+
+    if args.child:
+        measure_child(args.child, args.items, args.points)
+        return
+
+    print(f"数据规模：交易行物品 {args.items}，资历 {args.points}，NumPy：{'是' if np is not None else '否'}")
+    memory = {}
+    for mode in BUILDERS:
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--items", str(args.items), "--points", str(args.points)],
+            capture_output=True, text=True, check=True,
+        )
+        memory[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    payloads = make_payloads(args.items, args.points)
+    items, point_map, menu_map = dict_build(*payloads)
+    index, point_table, menu_table = columnar_build(*payloads)
+
+    rng = random.Random(11)
+    keywords = ["".join(rng.choice(CHARS) for _ in range(rng.randint(1, 3))) for _ in range(50)]
+    ids = [rng.randint(1000, 1000 + args.points) for _ in range(5000)]
+
+    def dict_points():
+        return sum(int(point_map.get(str(i), 0) or 0) for i in ids)
+
+    def columnar_points():
+        return sum(point_table.point(i) for i in ids)
+
+    def dict_menus():
+        return sum(len(dict_category_ids(menu_map[str(m)])) for m in range(1, 19))
+
+    def columnar_menus():
+        return sum(len(menu_table.category_ids(menu_table.top_row(str(m)))) for m in range(1, 19))
+
+    engine = AchievementProgressEngine(menu_table, point_table, groups={"overview": [str(m) for m in range(1, 19)]})
+    completed = set(rng.sample(range(1000, 1000 + args.points), args.points // 3))
+
+    def dict_progress(ids_):
+        unique = set(ids_)
+        total = done = 0
+        for i in unique:
+            point = int(point_map.get(str(i), 0) or 0)
+            total += point
+            if i in completed:
+                done += point
+        return total, done
+
+    def dict_overview():
+        # 原实现：18 个分类各遍历一次，再对全部 ID 汇总一次
+        all_ids = []
+        for m in range(1, 19):
+            ids_ = dict_category_ids(menu_map[str(m)])
+            all_ids.extend(ids_)
+            dict_progress(ids_)
+        return dict_progress(all_ids)
+
+    def engine_overview():
+        stats = engine.evaluate(completed)["overview"]
+        return stats[0], stats[1]
+
+    assert dict_points() == columnar_points()
+    assert dict_menus() == columnar_menus()
+    assert dict_overview() == engine_overview()
+
+    rows = [
+        ("交易行匹配 ×50", timeit(lambda: [dict_match(items, k) for k in keywords], 3),
+         timeit(lambda: [index.search(k) for k in keywords], 3)),
+        ("资历点数 ×5000", timeit(dict_points, 20), timeit(columnar_points, 20)),
+        ("资历分类展开 ×18", timeit(dict_menus, 20), timeit(columnar_menus, 20)),
+        ("资历总览进度", timeit(dict_overview, 10), timeit(engine_overview, 10)),
+    ]
+
+    print(f"\n{'内存':<16}{'RSS 增量 KB':>14}{'分配量 KB':>14}")
+    for mode, (label, _) in BUILDERS.items():
+        print(f"{label:<16}{memory[mode]['rss_kb']:>14}{memory[mode]['alloc_kb']:>14}")
+
+    print(f"\n{'查询(微秒)':<16}{'嵌套字典':>14}{'列式容器':>14}{'加速比':>10}")
+    for label, old, new in rows:
+        print(f"{label:<16}{old:>14.1f}{new:>14.1f}{old / new:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
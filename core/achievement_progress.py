@@ -0,0 +1,124 @@
+"""资历完成进度的向量化计算。
+
+分类成员在加载基础数据时展开为按分类排列的压缩行（CSR）：每个分类一段去重后的
+资历位置，配套点数权重列。用户已完成资历转为一张位图后，所有分类、子分类和
+汇总分组在一次遍历中求出总点数、完成点数、总数和完成数。
+安装 NumPy 时使用向量运算，否则退化为同样数据布局上的纯 Python 循环。
+本模块不依赖 AstrBot。
+"""
+
+from array import array
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .catalog import AchievementMenuTable, AchievementPointTable, np
+
+
+# 单个分类的统计：(总点数, 已完成点数, 资历总数, 已完成数)
+ProgressStats = Tuple[int, int, int, int]
+
+
+class AchievementProgressEngine:
+    """按分类预计算成员与点数权重，一次计算全部分类进度"""
+
+    def __init__(
+        self,
+        menus: AchievementMenuTable,
+        points: AchievementPointTable,
+        groups: Optional[Dict[str, Iterable[str]]] = None,
+    ):
+        # 全部出现过的资历 ID，排序后作为位图下标
+        universe = sorted(set(menus.members))
+        self._position = {achievement_id: index for index, achievement_id in enumerate(universe)}
+        self.size = len(universe)
+
+        self._keys: List[Hashable] = []
+        offsets = array("q", [0])
+        positions = array("q")
+
+        def add_row(key: Hashable, ids: Iterable[int]):
+            unique = sorted({self._position[i] for i in ids})
+            positions.extend(unique)
+            offsets.append(len(positions))
+            self._keys.append(key)
+
+        # 每个分类行（顶层含子分类，子分类只含自身）
+        for row in range(len(menus.categories)):
+            parent = menus.categories.get(row, "parent")
+            add_row(row, menus.category_ids(row) if parent < 0 else menus.own_ids(row))
+
+        # 跨分类汇总分组，按并集去重
+        for name, menu_ids in (groups or {}).items():
+            ids = []
+            for menu_id in menu_ids:
+                row = menus.top_row(menu_id)
+                if row is not None:
+                    ids.extend(menus.category_ids(row))
+            add_row(name, ids)
+
+        self._row_index = {key: index for index, key in enumerate(self._keys)}
+        weights = array("q", (points.point(achievement_id) for achievement_id in universe))
+
+        if np is not None:
+            self._ids = np.asarray(universe, dtype=np.int64)
+            self._weights = np.frombuffer(weights, dtype=np.int64)
+            self._positions = np.frombuffer(positions, dtype=np.int64)
+            self._offsets = np.frombuffer(offsets, dtype=np.int64)
+            self._totals = self._segment_sums(self._weights[self._positions])
+            self._counts = np.diff(self._offsets)
+        else:
+            self._weights = weights
+            self._positions = positions
+            self._offsets = offsets
+            self._totals = [self._python_sum(i, lambda p: weights[p]) for i in range(len(self._keys))]
+            self._counts = [offsets[i + 1] - offsets[i] for i in range(len(self._keys))]
+
+    def _segment_sums(self, values):
+        """按 CSR 行偏移求分段和，空分段为 0"""
+        cumulative = np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+        return cumulative[self._offsets[1:]] - cumulative[self._offsets[:-1]]
+
+    def _python_sum(self, index: int, value) -> int:
+        return sum(value(p) for p in self._positions[self._offsets[index]:self._offsets[index + 1]])
+
+    def bitmap(self, completed_ids: Iterable[int]):
+        """已完成资历位图，下标与预计算的资历顺序一致"""
+        if np is not None:
+            completed = np.fromiter(completed_ids, dtype=np.int64)
+            bitmap = np.zeros(self.size, dtype=bool)
+            if completed.size and self.size:
+                index = np.searchsorted(self._ids, completed)
+                index[index >= self.size] = 0
+                bitmap[index[self._ids[index] == completed]] = True
+            return bitmap
+
+        bitmap = bytearray(self.size)
+        for achievement_id in completed_ids:
+            index = self._position.get(achievement_id)
+            if index is not None:
+                bitmap[index] = 1
+        return bitmap
+
+    def evaluate(self, completed_ids: Iterable[int]) -> Dict[Hashable, ProgressStats]:
+        """一次计算全部分类和分组的进度"""
+        bitmap = self.bitmap(completed_ids)
+
+        if np is not None:
+            done = bitmap[self._positions]
+            done_points = self._segment_sums(np.where(done, self._weights[self._positions], 0))
+            done_counts = self._segment_sums(done.astype(np.int64))
+            return {
+                key: (int(self._totals[i]), int(done_points[i]), int(self._counts[i]), int(done_counts[i]))
+                for i, key in enumerate(self._keys)
+            }
+
+        weights = self._weights
+        result = {}
+        for i, key in enumerate(self._keys):
+            done_points = 0
+            done_count = 0
+            for p in self._positions[self._offsets[i]:self._offsets[i + 1]]:
+                if bitmap[p]:
+                    done_points += weights[p]
+                    done_count += 1
+            result[key] = (self._totals[i], done_points, self._counts[i], done_count)
+        return result
@@ -0,0 +1,147 @@
+"""推送轮询的自适应间隔。
+
+状态稳定时间隔按倍数退避到上限；处于热点时段或刚发生变化时回落到下限。
+热点时段来自三处：固定窗口（如周四例行维护）、按“周几 + 小时”统计的
+历史变化次数（学习得到），以及从刷马预告中解析出的时间点。
+下一次轮询不会越过即将开始的热点时段。
+"""
+
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .fun_basic import GAME_TZ
+
+
+# 一周的小时槽数，槽号 = 周几 * 24 + 小时（周一为 0）
+WEEK_SLOTS = 7 * 24
+
+# 周四例行维护窗口：(周几, 开始小时, 结束小时)
+MAINTENANCE_WINDOWS = ((3, 6, 12),)
+
+# 预告时间点前后的热点范围（秒）
+FORECAST_BEFORE = 120
+FORECAST_AFTER = 600
+
+_TIME_PATTERN = re.compile(r"(?<!\d)([01]?\d|2[0-3])[:：]([0-5]\d)(?!\d)")
+
+
+def week_slot(ts: float) -> int:
+    moment = datetime.fromtimestamp(ts, GAME_TZ)
+    return moment.weekday() * 24 + moment.hour
+
+
+def forecast_times(text: str, now: Optional[float] = None, horizon: float = 3 * 3600) -> List[float]:
+    """从文本中解析未来 horizon 秒内的“时:分”时间点，返回时间戳"""
+    now = time.time() if now is None else now
+    base = datetime.fromtimestamp(now, GAME_TZ)
+    result = []
+    for hour, minute in _TIME_PATTERN.findall(text or ""):
+        moment = base.replace(hour=int(hour), minute=int(minute), second=0, microsecond=0)
+        if moment.timestamp() < now - FORECAST_AFTER:
+            moment += timedelta(days=1)
+        ts = moment.timestamp()
+        if ts - now <= horizon:
+            result.append(ts)
+    return sorted(set(result))
+
+
+class ActivityHistogram:
+    """按周内小时槽统计状态变化次数，变化明显集中的槽视为热点"""
+
+    def __init__(self, min_count: int = 3, ratio: float = 2.0):
+        self.counts = [0] * WEEK_SLOTS
+        self.min_count = min_count
+        # 槽内次数达到平均值的倍数
+        self.ratio = ratio
+
+    def load(self, counts: Dict[int, int]):
+        for slot, count in counts.items():
+            if 0 <= slot < WEEK_SLOTS:
+                self.counts[slot] = int(count)
+
+    def record(self, ts: float) -> int:
+        slot = week_slot(ts)
+        self.counts[slot] += 1
+        return slot
+
+    def is_hot_slot(self, slot: int) -> bool:
+        count = self.counts[slot % WEEK_SLOTS]
+        return count >= self.min_count and count >= self.ratio * sum(self.counts) / WEEK_SLOTS
+
+
+class AdaptivePoller:
+    """单个推送任务的轮询间隔"""
+
+    def __init__(
+        self,
+        base: float,
+        min_interval: float,
+        max_interval: float,
+        backoff: float = 1.5,
+        windows: Sequence[Tuple[int, int, int]] = (),
+        cooldown: float = 900,
+    ):
+        self.min_interval = max(min(min_interval, max_interval), 1)
+        self.max_interval = max(max_interval, self.min_interval)
+        self.interval = min(max(base, self.min_interval), self.max_interval)
+        self.backoff = backoff
+        self.windows = tuple(windows)
+        # 发生变化后保持最短间隔的时长
+        self.cooldown = cooldown
+        self.hot_until = 0.0
+        self.activity = ActivityHistogram()
+        # 预告热点：(开始, 结束)
+        self._forecasts: List[Tuple[float, float]] = []
+
+    def add_forecast(self, times: Iterable[float]):
+        now = time.time()
+        self._forecasts = [w for w in self._forecasts if w[1] > now]
+        for ts in times:
+            self._forecasts.append((ts - FORECAST_BEFORE, ts + FORECAST_AFTER))
+
+    def _in_window(self, ts: float) -> bool:
+        moment = datetime.fromtimestamp(ts, GAME_TZ)
+        return any(
+            moment.weekday() == weekday and start <= moment.hour < end
+            for weekday, start, end in self.windows
+        )
+
+    def is_hot(self, now: float) -> bool:
+        return (
+            now < self.hot_until
+            or self._in_window(now)
+            or self.activity.is_hot_slot(week_slot(now))
+            or any(start <= now < end for start, end in self._forecasts)
+        )
+
+    def _next_hot_start(self, now: float, horizon: float) -> Optional[float]:
+        """horizon 秒内最早开始的热点时段"""
+        starts = [start for start, _ in self._forecasts if now < start <= now + horizon]
+
+        # 固定窗口和学习热点都按整点开始，逐个检查范围内的整点
+        hour = datetime.fromtimestamp(now, GAME_TZ).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        while hour.timestamp() <= now + horizon:
+            ts = hour.timestamp()
+            if self._in_window(ts) or self.activity.is_hot_slot(week_slot(ts)):
+                starts.append(ts)
+                break
+            hour += timedelta(hours=1)
+        return min(starts) if starts else None
+
+    def next_interval(self, changed: bool, now: Optional[float] = None) -> int:
+        """按本轮结果计算下一次轮询间隔（秒）"""
+        now = time.time() if now is None else now
+        if changed:
+            self.activity.record(now)
+            self.hot_until = max(self.hot_until, now + self.cooldown)
+
+        if self.is_hot(now):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+            start = self._next_hot_start(now, self.interval)
+            if start is not None:
+                self.interval = max(start - now, self.min_interval)
+        return int(round(self.interval))
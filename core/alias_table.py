@@ -0,0 +1,109 @@
+import os
+import time
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from astrbot.api import logger
+
+from .sqlite import AsyncSQLiteDB
+from .search_index import edit_distance, normalize_text
+
+
+class AliasTable:
+    """只读别名表：把随包数据库中的一张别名表整体载入内存，别名 -> 记录。
+
+    启动时加载，之后只在数据库文件修改时间变化时重新加载；
+    每次加载生成新的只读映射后整体替换，查询无需加锁。
+    """
+
+    def __init__(
+        self,
+        sqlite: AsyncSQLiteDB,
+        table: str,
+        alias_columns: Sequence[str],
+        check_interval: float = 60,
+    ):
+        self._sql_db = sqlite
+        self.table = table
+        self.alias_columns = tuple(alias_columns)
+        self.check_interval = check_interval
+        self._index: Mapping[str, Mapping[str, Any]] = MappingProxyType({})
+        self._records: List[Mapping[str, Any]] = []
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self._sql_db.db_path)
+        except OSError:
+            return None
+
+    async def load(self):
+        """读取整张表并重建索引"""
+        try:
+            rows = await self._sql_db.select_all(self.table)
+        except Exception as e:
+            logger.error(f"读取别名表 {self.table} 失败: {e}")
+            return
+
+        records = []
+        index: Dict[str, Mapping[str, Any]] = {}
+        for row in rows:
+            record = MappingProxyType(dict(row))
+            records.append(record)
+            for column in self.alias_columns:
+                key = normalize_text(record.get(column) or "")
+                # 别名冲突时保留先出现的记录
+                if key:
+                    index.setdefault(key, record)
+
+        self._records = records
+        self._index = MappingProxyType(index)
+        self._mtime = self._file_mtime()
+        self._checked_at = time.monotonic()
+        logger.debug(f"别名表 {self.table} 已加载，共 {len(records)} 条记录、{len(index)} 个别名")
+
+    async def reload_if_changed(self):
+        """数据库文件修改后重新加载，检查间隔内直接跳过"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        mtime = self._file_mtime()
+        if mtime is not None and mtime != self._mtime:
+            await self.load()
+
+    def get(self, name: str) -> Optional[Mapping[str, Any]]:
+        """按别名精确查找"""
+        return self._index.get(normalize_text(name))
+
+    def match(self, name: str) -> Optional[Mapping[str, Any]]:
+        """精确查找失败时依次尝试唯一前缀、唯一包含和编辑距离 1 的唯一别名"""
+        key = normalize_text(name)
+        if not key:
+            return None
+
+        record = self._index.get(key)
+        if record is not None:
+            return record
+
+        for predicate in (
+            lambda alias: alias.startswith(key),
+            lambda alias: len(key) >= 2 and key in alias,
+            # 两字简称改一字就是另一个心法，编辑距离只用于较长名称
+            lambda alias: len(key) >= 3 and len(alias) >= 3 and edit_distance(key, alias, 1) <= 1,
+        ):
+            candidates = {id(r): r for alias, r in self._index.items() if predicate(alias)}
+            if len(candidates) == 1:
+                return next(iter(candidates.values()))
+            if candidates:
+                return None
+        return None
+
+    async def lookup(self, name: str) -> Optional[Mapping[str, Any]]:
+        """检查文件变化后模糊查找"""
+        await self.reload_if_changed()
+        return self.match(name)
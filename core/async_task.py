@@ -1,10 +1,13 @@
 # pyright: reportArgumentType=false
 import asyncio
+import re
+import time
+from datetime import datetime
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.cron import CronTrigger
 
-from astrbot.api.event import MessageChain
 from astrbot.api.star import Context 
 from astrbot.api import logger
 from astrbot.api import AstrBotConfig
@@ -13,23 +16,102 @@ from astrbot.api import AstrBotConfig
 from .jx3api_data import JX3APIService
 from .jx3box_data import JX3BOXService
 from .sqlite import AsyncSQLiteDB
+from .rank_sweep import RankSweep
+from .push_delivery import PushDispatcher
+from .subscription import SERVER_TOPICS, SubscriptionRegistry
+from .push_stream import PushStream
+from .push_seen import SeenLog
+from .push_source import MODE_STATE, PUSH_SOURCES, group_sources
+from .render import render_html, IMAGE_OPTIONS
+from .render_cache import RenderCache
+from .outbound import OutboundQueue
+from .fun_basic import load_template
+from .adaptive_poll import FORECAST_BEFORE, MAINTENANCE_WINDOWS, AdaptivePoller, forecast_times, week_slot
+
+
+# 马场推送：任务键 -> (名称, type, subtype)
+HORSE_TASKS = {
+    "smts": ("刷马消息", "horse", "foreshow"),
+    "ctts": ("赤兔消息", "chitu-horse", "share_msg"),
+}
+
+# 每次拉取的消息条数，两次轮询之间出现多条消息时不遗漏
+HORSE_PAGE_SIZE = 5
+
+# 自适应轮询的默认间隔上下限（秒）：任务键 -> (下限, 上限)
+POLL_BOUNDS = {
+    "kfts": (15, 300),
+    "xwts": (120, 1800),
+    "whts": (120, 1800),
+    "gats": (60, 600),
+    "dlts": (60, 600),
+    "zets": (60, 600),
+    "smts": (30, 600),
+    "ctts": (30, 600),
+}
+
+# 使用周四维护窗口的任务
+MAINTENANCE_TASKS = {"kfts", "xwts", "whts"}
+
+# 推送流消息类型 -> 任务键
+STREAM_ACTIONS = {
+    2001: "kfts",
+    2002: "xwts",
+}
+
 
 class AsyncTask:
     """
     基于 APScheduler 的后台异步监控任务管理类
     """
 
-    def __init__(self, context: Context, config: AstrBotConfig, jx3api: JX3APIService, jx3box: JX3BOXService, sqlite: AsyncSQLiteDB):
+    def __init__(
+        self,
+        context: Context,
+        config: AstrBotConfig,
+        jx3api: JX3APIService,
+        jx3box: JX3BOXService,
+        sqlite: AsyncSQLiteDB,
+        rank_sweep: RankSweep | None = None,
+        render_cache: RenderCache | None = None,
+        icons: dict | None = None,
+        outbound: OutboundQueue | None = None,
+    ):
         self.context = context
         self.conf = config
         self.jx3api = jx3api
         self.jx3box = jx3box
         self.sql = sqlite
+        self.rank_sweep = rank_sweep
+        self.render_cache = render_cache
+        self.icons = icons or {}
 
         self.server = self.conf.get("server", "梦江南")
         
+        delivery_conf = self.conf.get("tsfs", {})
+        self.dispatcher = PushDispatcher(
+            context,
+            sqlite,
+            concurrency=delivery_conf.get("concurrency", 8),
+            rate=delivery_conf.get("rate", 2),
+            outbound=outbound,
+        )
+        # 有卡片模板的推送渲染为图片，每个事件只渲染一次
+        self.card_image = delivery_conf.get("image", False) and render_cache is not None
+
+        # 推送流，启用后覆盖的任务暂停轮询
+        self.stream: PushStream | None = None
+
+        # 推送订阅：指令订阅持久化，配置订阅启动时登记
+        self.subscriptions = SubscriptionRegistry(sqlite)
+
+        # 已推送事件记录，新闻与马场消息逐条去重
+        self.seen = SeenLog(sqlite)
+
         self.scheduler = AsyncIOScheduler()
         self.tasks = {}  
+        # 推送源按接口分组，每组一个调度任务：组 ID -> 组状态
+        self.groups = {}
         
         logger.info(f"初始化推送功能成功")
 
@@ -73,65 +155,466 @@ class AsyncTask:
             logger.error(f"数据读取失败：{e}")
 
 
-    """===================== 通用后台任务 ====================="""
-
-    async def _job_common(self, fetch_func, task_key: str, namefun: str):
-        state = self.tasks[task_key]
+    async def load_push_state(self, task_key: str) -> dict:
+        """读取分服务器推送状态：服务器 -> 最后推送的消息 ID"""
+        try:
+            rows = await self.sql.fetch_all(
+                "SELECT server, status FROM push_state WHERE task=?",
+                (task_key,)
+            )
+            return {row["server"]: row["status"] for row in rows}
+        except Exception as e:
+            logger.error(f"推送状态读取失败：{e}")
+            return {}
 
+    async def save_push_state(self, task_key: str, server: str, status: str):
         try:
-            data = await fetch_func()
+            await self.sql.execute(
+                """
+                INSERT INTO push_state (task, server, status, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(task, server) DO UPDATE SET
+                    status=excluded.status,
+                    updated_at=excluded.updated_at
+                """,
+                (task_key, server, status, int(time.time()))
+            )
+        except Exception as e:
+            logger.error(f"推送状态写入失败：{e}")
+
+    """===================== 订阅解析 ====================="""
+
+    def _resolve_server(self, name: str):
+        registry = self.jx3api.server_registry
+        if not registry.loaded:
+            return name
+        return registry.resolve(name)
+
+    def _seed_subscriptions(self, task_key: str, entries: list):
+        """登记配置中的推送对象；按服务器订阅的主题支持“会话ID=服务器1,服务器2”，未写服务器时订阅默认服务器"""
+        for entry in entries:
+            umo, sep, names = str(entry).partition("=")
+            umo = umo.strip()
+            if not umo:
+                continue
+            if task_key not in SERVER_TOPICS:
+                self.subscriptions.seed(task_key, "", umo)
+                continue
+            names = [n for n in re.split(r"[,，、\s]+", names) if n] if sep else []
+            for name in names or [self.server]:
+                server = self._resolve_server(name)
+                if not server:
+                    logger.warning(f"推送订阅中的服务器无法识别：{name}")
+                    continue
+                self.subscriptions.seed(task_key, server, umo)
 
-            if not isinstance(data, dict):
-                raise ValueError("fetch_func 返回数据不是 dict")
+    """===================== 通用后台任务 ====================="""
+
+    async def _apply_state(self, task_key: str, server: str, status, text: str) -> bool:
+        """与该服务器上次的状态比较，变化时推送给订阅该服务器的会话并持久化，返回是否变化。
 
-            state["state_new"] = data.get("status")
+        首次观测到的服务器只记录状态不推送；轮询与推送流共用。
+        """
+        states = self.tasks[task_key]["state"]
+        status = str(status)
+        last = states.get(server)
+        if last == status:
+            return False
 
-            if state["state_old"] != state["state_new"]:
-                message_chain = MessageChain().message(data.get("data"))
+        states[server] = status
+        await self.save_push_state(task_key, server, status)
+        if last is None:
+            return False
 
-                for umo in state["umos"]:
-                    await self.context.send_message(umo, message_chain)
+        await self.dispatcher.deliver(self.subscriptions.sessions(task_key, server), text, self.tasks[task_key]["name"])
+        return True
 
-                await self.set_local_data(task_key, state["state_new"])
-                state["state_old"] = state["state_new"]
+    async def _job_group(self, gid: str, catch_up: bool = False):
+        """推送源组：组内请求按 (接口, 参数) 去重后并发请求一次，结果分发给各推送源。
+
+        catch_up 为真时包括推送流接管中的推送源，用于连接后补拉断线期间的变化。
+        调度任务、连接后的补拉和推送流消息持有同一把组锁，同一事件不会因并发判断而重复推送。
+        """
+        async with self.groups[gid]["lock"]:
+            await self._poll_group(gid, catch_up)
+
+    async def _poll_group(self, gid: str, catch_up: bool):
+        plan = []
+        requests = {}
+        for key in self.groups[gid]["sources"]:
+            source = PUSH_SOURCES[key]
+            if not self.tasks[key]["enable"] or (self._streaming(key) and not catch_up):
+                continue
+            # 无人订阅时不请求上游
+            if source.per_server:
+                servers = self.subscriptions.servers(key)
+            else:
+                servers = [""] if self.subscriptions.sessions(key) else []
+            for server in servers:
+                params = source.params(server)
+                request = (source.path, tuple(sorted(params.items())), source.auth)
+                requests.setdefault(request, params)
+                plan.append((key, server, request))
+
+        changed = False
+        if not plan:
+            await self._reschedule(gid, changed)
+            return
+
+        keys = list(requests)
+        results = await asyncio.gather(
+            *(self.jx3api.fetch_raw(path, requests[(path, frozen, auth)], auth) for path, frozen, auth in keys),
+            return_exceptions=True,
+        )
+        payloads = dict(zip(keys, results))
+
+        for key, server, request in plan:
+            namefun = self.tasks[key]["name"]
+            label = f"{namefun} {server}".strip()
+            data = payloads[request]
+            if isinstance(data, asyncio.CancelledError):
+                raise data
+            if isinstance(data, Exception):
+                logger.error(f"{label} 数据获取失败: {data}")
+                continue
+            if not data:
+                continue
+
+            try:
+                changed = await self._feed_source(key, server, data) or changed
+            except asyncio.CancelledError:
+                raise
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"{label} 数据结构异常: {e}")
+            except Exception:
+                logger.exception(f"{label} 后台任务执行异常")
+
+        await self._reschedule(gid, changed)
+
+    async def _feed_source(self, key: str, server: str, data) -> bool:
+        """把接口数据交给推送源提取变化并分发，返回是否变化"""
+        source = PUSH_SOURCES[key]
+        namefun = self.tasks[key]["name"]
+        if source.mode == MODE_STATE:
+            result = source.extract(data, server)
+            if result is None:
+                logger.warning(f"{namefun} 数据中没有服务器：{server}")
+                return False
+            status, text = result
+            return await self._apply_state(key, server, int(status), text)
+
+        items = source.extract(data, server)
+        topic = f"{key}:{server}" if server else key
+        return bool(await self._push_fresh(
+            topic, items, self.subscriptions.sessions(key, server), namefun, first_push=source.first_push
+        ))
+
+    async def _push_fresh(self, topic: str, items: list, umos: list, namefun: str, last=None, first_push: bool = True) -> list:
+        """逐条推送未推送过的消息并登记，返回新消息。
+
+        items 为 (事件键, 文本) 或 (事件键, 文本, 卡片)，按时间倒序；主题没有任何记录时
+        视为首次运行：first_push 为假时全部直接登记不推送，与开服首次观测一致；
+        否则按旧版的最后推送 ID（last）截取，没有时只推送最新一条，其余直接登记。
+        """
+        if self.seen.known(topic):
+            unseen = set(self.seen.unseen(topic, (item[0] for item in items)))
+            fresh = [item for item in items if str(item[0]) in unseen]
+        else:
+            fresh = self._fresh_items(items, last) if first_push else []
+            await self.seen.mark(topic, (item[0] for item in items[len(fresh):]))
+
+        # 旧消息先发，每条发出后立即登记；卡片渲染一次，全部会话发送同一张图片
+        for key, text, *card in reversed(fresh):
+            image = await self._render_card(card[0] if card else None)
+            await self.dispatcher.deliver(umos, text, namefun, image)
+            await self.seen.mark(topic, [key])
+        return fresh
+
+    async def _render_card(self, card) -> str | None:
+        """渲染推送卡片，返回本地图片路径；未启用或渲染失败时返回 None 改发文本。
+
+        渲染结果以内容为键缓存，不同主题产生相同卡片时只渲染一次。
+        """
+        if card is None or not self.card_image:
+            return None
+        template, data = card
+        try:
+            tmpl = await load_template(template)
+            return await render_html(
+                tmpl,
+                {**data, "icons": self.icons},
+                return_url=False,
+                options=IMAGE_OPTIONS,
+                cache=self.render_cache,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"推送卡片渲染失败：{template}")
+            return None
+
+    @staticmethod
+    def _fresh_items(items: list, last):
+        """返回上次推送之后的新消息，按时间倒序；首次运行只取最新一条"""
+        if last is None:
+            return items[:1]
+        fresh = []
+        for item in items:
+            if str(item[0]) == str(last):
+                break
+            fresh.append(item)
+        return fresh
+
+    async def _job_horse(self, task_key: str, namefun: str, type: str, subtype: str):
+        """马场推送：每个服务器每轮只请求一次，结果分发给订阅该服务器的全部会话"""
+        state = self.tasks[task_key]
+        servers = self.subscriptions.servers(task_key)
+        changed = False
+        if not servers:
+            await self._reschedule(task_key, changed)
+            return
+
+        results = await asyncio.gather(
+            *(self.jx3box.machangxiaoxi(server, type, subtype, HORSE_PAGE_SIZE) for server in servers),
+            return_exceptions=True,
+        )
 
+        for server, data in zip(servers, results):
+            if isinstance(data, asyncio.CancelledError):
+                raise data
+            if isinstance(data, Exception):
+                logger.error(f"{namefun} {server} 数据获取失败: {data}")
+                continue
+            if not isinstance(data, dict):
+                continue
+
+            try:
+                fresh = await self._push_fresh(
+                    f"{task_key}:{server}",
+                    data["items"],
+                    self.subscriptions.sessions(task_key, server),
+                    namefun,
+                    state["state"].get(server),
+                )
+                if not fresh:
+                    continue
+
+                changed = True
+                if type == "horse":
+                    for _, text in fresh:
+                        self.note_horse_forecast(text)
+
+                status = str(data["status"])
+                state["state"][server] = status
+                await self.save_push_state(task_key, server, status)
+
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"{namefun} {server} 数据结构异常: {e}")
+
+        await self._reschedule(task_key, changed)
+
+    async def _job_seen_prune(self):
+        """推送记录清理"""
+        try:
+            await self.seen.prune()
         except asyncio.CancelledError:
-            # 调度器 shutdown 时的正常路径
             raise
+        except Exception:
+            logger.exception("推送记录清理后台任务执行异常")
 
-        except (KeyError, TypeError, ValueError) as e:
-            logger.error(f"{namefun} 数据结构异常: {e}")
+    async def _job_push_retry(self):
+        """推送重试队列"""
+        try:
+            await self.dispatcher.retry_due()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("推送重试后台任务执行异常")
 
-        except Exception as e:
-            logger.exception(f"{namefun} 后台任务执行异常")
+    async def _job_price_sample(self, servers: list, items: list):
+        """价格采样：请求结果由服务层写入本地时序"""
+        try:
+            for server in servers:
+                await self.jx3api.jinjia(server, "1")
+            for name in items:
+                await self.jx3api.wujia(name, "")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("价格采样后台任务执行异常")
+
+    async def _job_event_ingest(self, servers: list):
+        """奇遇采集：逐个服务器增量拉取近期奇遇"""
+        for server in servers:
+            try:
+                fresh = await self.jx3api.ingest_recent_events(server)
+                if fresh:
+                    logger.debug(f"{server} 新增奇遇记录 {fresh} 条")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"{server} 奇遇采集后台任务执行异常")
+
+    async def _job_serendipity_catalog(self):
+        """奇遇目录刷新"""
+        try:
+            await self.jx3box.refresh_serendipity_catalog()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("奇遇目录刷新后台任务执行异常")
 
     """===================== 初始化任务 ====================="""
 
     async def init_tasks(self):
-        settings = [
-            ("kfts", "开服监控", lambda: self.jx3api.kaifu("梦江南")),
-            ("xwts", "新闻资讯", lambda: self.jx3api.xinwen(1)),
-            ("smts", "刷马消息", lambda: self.jx3box.machangxiaoxi(self.server,"horse","foreshow")),
-            ("ctts", "赤兔消息", lambda: self.jx3box.machangxiaoxi(self.server,"chitu-horse","share_msg")),
-        ]
-
-        for key, name, fetch in settings:
+        await self.subscriptions.load()
+        await self.seen.load()
+
+        for key, source in PUSH_SOURCES.items():
+            conf = self.conf.get(key, {})
+
+            self._seed_subscriptions(key, conf.get("umos", []))
+
+            self.tasks[key] = {
+                "enable": conf.get("enable", True),
+                "name": source.name,
+            }
+            if source.mode == MODE_STATE:
+                # 状态类推送源按服务器记录上次状态
+                states = await self.load_push_state(key)
+                if not states and key == "kfts":
+                    # 沿用旧版固定监控梦江南的开服状态
+                    states["梦江南"] = str(int(bool(await self.get_local_data(key, default=1))))
+                self.tasks[key]["state"] = states
+
+        # 同一接口的推送源共用一个任务，启用即调度，订阅为空的轮次直接跳过
+        for gid, keys in group_sources(PUSH_SOURCES).items():
+            keys = [key for key in keys if self.tasks[key]["enable"]]
+            if not keys:
+                continue
+            confs = [self.conf.get(key, {}) for key in keys]
+            low, high = POLL_BOUNDS[gid]
+            conf = {
+                "time": min(c.get("time", 60) for c in confs),
+                "min_time": min(c.get("min_time", low) for c in confs),
+                "max_time": min(c.get("max_time", high) for c in confs),
+            }
+            self.groups[gid] = {
+                "enable": True,
+                "sources": keys,
+                "interval": conf["time"],
+                "poller": await self._create_poller(gid, conf),
+                "lock": asyncio.Lock(),
+            }
+            for key in keys:
+                self.tasks[key]["group"] = gid
+            self._add_group_scheduler(gid)
+
+        for key, (name, type, subtype) in HORSE_TASKS.items():
             conf = self.conf.get(key, {})
+            self._seed_subscriptions(key, conf.get("umos", []))
+            states = await self.load_push_state(key)
+            if not states:
+                # 沿用旧版单服务器推送记录，避免升级后重复推送
+                legacy = await self.get_local_data(key, default=0)
+                if legacy:
+                    states[self.server] = str(legacy)
 
-            state_old = await self.get_local_data(key, default=False)
             self.tasks[key] = {
                 "enable": conf.get("enable", True),
                 "interval": conf.get("time", 60),
-                "umos": conf.get("umos", []),
-                "state_old": state_old,
-                "state_new": state_old
+                "poller": await self._create_poller(key, conf),
+                "state": states,
             }
 
             if self.tasks[key]["enable"]:
-                if self.tasks[key]["umos"]:
-                    self._add_scheduler(key, name, fetch)
-                else:
-                    logger.warning(f"{name} 推送对象为空，任务未启动")
+                self._add_horse_scheduler(key, name, type, subtype)
+
+        stream_conf = self.conf.get("tsws", {})
+        if stream_conf.get("enable", False):
+            headers = {"token": self.jx3api.token} if self.jx3api.token else {}
+            self.stream = PushStream(
+                stream_conf.get("url", "wss://socket.jx3api.com"),
+                self._on_stream_event,
+                self._on_stream_state,
+                headers=headers,
+            )
+            self.stream.start()
+            logger.info("推送流已启用，连接期间开服与新闻任务暂停轮询")
+
+        # 推送失败的消息按退避时间重发
+        self.scheduler.add_job(
+            func=self._job_push_retry,
+            trigger=IntervalTrigger(seconds=30),
+            id="tscs",
+            replace_existing=True,
+        )
+
+        # 超过保留期的推送记录每天清理一次
+        self.scheduler.add_job(
+            func=self._job_seen_prune,
+            trigger=IntervalTrigger(days=1),
+            id="tsjl",
+            replace_existing=True,
+        )
+
+        price_conf = self.conf.get("jgcj", {})
+        if price_conf.get("enable", False):
+            servers = price_conf.get("servers", []) or [self.server]
+            items = price_conf.get("items", [])
+            interval = price_conf.get("time", 3600)
+            self.scheduler.add_job(
+                func=self._job_price_sample,
+                trigger=IntervalTrigger(seconds=interval),
+                id="jgcj",
+                args=[servers, items],
+                replace_existing=True,
+            )
+            logger.info(f"价格采样后台任务启动成功，周期：{interval}s")
+
+        # 奇遇目录每天检查一次，超过刷新周期才重新拉取
+        self.scheduler.add_job(
+            func=self._job_serendipity_catalog,
+            trigger=IntervalTrigger(days=1),
+            id="qyml",
+            next_run_time=datetime.now(),
+            replace_existing=True,
+        )
+
+        event_conf = self.conf.get("qyjl", {})
+        if event_conf.get("enable", False):
+            servers = event_conf.get("servers", []) or [self.server]
+            interval = event_conf.get("time", 120)
+            self.scheduler.add_job(
+                func=self._job_event_ingest,
+                trigger=IntervalTrigger(seconds=interval),
+                id="qyjl",
+                args=[servers],
+                next_run_time=datetime.now(),
+                replace_existing=True,
+            )
+            logger.info(f"奇遇采集后台任务启动成功，周期：{interval}s")
+
+        rank_conf = self.conf.get("phyq", {})
+        if rank_conf.get("enable", False) and self.rank_sweep:
+            servers = rank_conf.get("servers", []) or [self.server]
+            hour = rank_conf.get("hour", 7)
+            minute = rank_conf.get("minute", 30)
+            self.scheduler.add_job(
+                func=self.rank_sweep.sweep,
+                trigger=CronTrigger(hour=hour, minute=minute),
+                id="phyq",
+                args=[servers, True],
+                replace_existing=True,
+            )
+            # 启动时先用未过期缓存预渲染，避免重载后重复请求
+            self.scheduler.add_job(
+                func=self.rank_sweep.sweep,
+                id="phyq_warmup",
+                args=[servers, False],
+                replace_existing=True,
+            )
+            logger.info(f"排行榜预取后台任务启动成功，每日 {hour:02d}:{minute:02d} 刷新")
 
         if not self.scheduler.running:
             self.scheduler.start()
@@ -139,19 +622,147 @@ class AsyncTask:
 
     """===================== 调度操作 ====================="""
 
-    def _add_scheduler(self, key, namefun, fetch_func):
-        if self.scheduler.get_job(key):
-            self.scheduler.remove_job(key)
+    def _add_group_scheduler(self, gid: str):
+        group = self.groups[gid]
+        interval = group["interval"]
+        self.scheduler.add_job(
+            func=self._job_group,
+            trigger=IntervalTrigger(seconds=interval),
+            id=gid,
+            args=[gid],
+            replace_existing=True,
+        )
+
+        names = "、".join(self.tasks[key]["name"] for key in group["sources"])
+        logger.info(f"{names}后台任务启动成功，周期：{interval}s")
 
+    def _add_horse_scheduler(self, key, namefun, type, subtype):
         interval = self.tasks[key]["interval"]
         self.scheduler.add_job(
-            func=self._job_common,
+            func=self._job_horse,
             trigger=IntervalTrigger(seconds=interval),
             id=key,
-            args=[fetch_func, key, namefun]
+            args=[key, namefun, type, subtype],
+            replace_existing=True,
         )
 
-        logger.info(f"{namefun}后台任务启动成功，周期：{interval}s")
+        servers = len(self.subscriptions.servers(key))
+        logger.info(f"{namefun}后台任务启动成功，周期：{interval}s，服务器：{servers} 个")
+
+    async def _create_poller(self, key: str, conf: dict) -> AdaptivePoller:
+        """按配置的下限、上限创建自适应轮询，载入历史变化统计"""
+        low, high = POLL_BOUNDS[key]
+        poller = AdaptivePoller(
+            base=conf.get("time", 60),
+            min_interval=conf.get("min_time", low),
+            max_interval=conf.get("max_time", high),
+            windows=MAINTENANCE_WINDOWS if key in MAINTENANCE_TASKS else (),
+        )
+        try:
+            rows = await self.sql.fetch_all("SELECT slot, count FROM push_activity WHERE task=?", (key,))
+            poller.activity.load({row["slot"]: row["count"] for row in rows})
+        except Exception as e:
+            logger.error(f"推送活跃度读取失败：{e}")
+        return poller
+
+    async def _reschedule(self, key: str, changed: bool):
+        """按本轮结果调整下一次轮询间隔，变化时记录活跃时段"""
+        state = self.groups.get(key) or self.tasks.get(key)
+        if not state or not state.get("enable"):
+            return
+        if self._streaming(key):
+            # 推送流接管期间任务保持暂停，只记录活跃时段
+            if changed:
+                state["poller"].next_interval(changed)
+                await self._record_activity(key)
+            return
+        poller: AdaptivePoller = state["poller"]
+        interval = poller.next_interval(changed)
+        if changed:
+            await self._record_activity(key)
+        if interval != state["interval"] and self.scheduler.get_job(key):
+            state["interval"] = interval
+            self.scheduler.reschedule_job(key, trigger=IntervalTrigger(seconds=interval))
+
+    async def _record_activity(self, key: str):
+        try:
+            await self.sql.execute(
+                """
+                INSERT INTO push_activity (task, slot, count)
+                VALUES (?, ?, 1)
+                ON CONFLICT(task, slot) DO UPDATE SET count=count+1
+                """,
+                (key, week_slot(time.time())),
+            )
+        except Exception as e:
+            logger.error(f"推送活跃度写入失败：{e}")
+
+    """===================== 推送流 ====================="""
+
+    def _streaming(self, key: str) -> bool:
+        """推送源或推送源组是否由推送流接管"""
+        if self.stream is None or not self.stream.connected:
+            return False
+        keys = self.groups[key]["sources"] if key in self.groups else [key]
+        return all(k in STREAM_ACTIONS.values() for k in keys)
+
+    async def _on_stream_state(self, connected: bool):
+        """连接后先补拉一次断线期间的变化再暂停轮询，断开后恢复轮询"""
+        gids = {self.tasks[key].get("group") for key in STREAM_ACTIONS.values() if key in self.tasks}
+        for gid in gids:
+            if gid is None or not self.scheduler.get_job(gid):
+                continue
+            if connected:
+                await self._job_group(gid, catch_up=True)
+                # 组内还有推送流未覆盖的推送源时继续轮询
+                if self._streaming(gid):
+                    self.scheduler.pause_job(gid)
+            else:
+                self.scheduler.resume_job(gid)
+                self.scheduler.modify_job(gid, next_run_time=datetime.now())
+        logger.info(f"推送流{'已接管' if connected else '已断开，恢复轮询：'}开服与新闻任务")
+
+    async def _on_stream_event(self, payload: dict):
+        """推送流消息转为任务状态，进入与轮询相同的变化判断和分发流程"""
+        key = STREAM_ACTIONS.get(payload.get("action"))
+        state = self.tasks.get(key) if key else None
+        if not state or not state["enable"]:
+            return
+        async with self.groups[state["group"]]["lock"]:
+            changed = await self._apply_stream_event(key, state, payload.get("data") or {})
+        await self._reschedule(state["group"], changed)
+
+    async def _apply_stream_event(self, key: str, state: dict, data: dict) -> bool:
+        """处理单条推送流消息，返回是否变化"""
+        if key == "kfts":
+            server = data.get("server")
+            if not server or not self.subscriptions.sessions(key, server):
+                return False
+            opened = bool(int(data.get("status", 0)))
+            return await self._apply_state(key, server, int(opened), self.jx3api.kaifu_message(server, opened))
+
+        umos = self.subscriptions.sessions(key)
+        if not umos:
+            return False
+        # 与轮询共用推送记录，同一条新闻只推送一次
+        items = [(self.jx3api.news_key(data), self.jx3api.news_message([data]))]
+        return bool(await self._push_fresh(key, items, umos, state["name"]))
+
+    def note_horse_forecast(self, text: str):
+        """刷马预告或查询结果中的时间点作为刷马、赤兔任务的热点时段"""
+        times = forecast_times(text)
+        if not times:
+            return
+        # 已排定的下一轮晚于预告热点开始时提前
+        start = max(times[0] - FORECAST_BEFORE, time.time())
+        for key in HORSE_TASKS:
+            state = self.tasks.get(key)
+            if not state:
+                continue
+            state["poller"].add_forecast(times)
+            job = self.scheduler.get_job(key)
+            if job and job.next_run_time and job.next_run_time.timestamp() > start:
+                job.modify(next_run_time=datetime.fromtimestamp(start))
 
     def stop_all_tasks(self):
         """
@@ -161,16 +772,22 @@ class AsyncTask:
             self.scheduler.remove_all_jobs()
             for key in self.tasks:
                 self.tasks[key]["enable"] = False
+            for gid in self.groups:
+                self.groups[gid]["enable"] = False
             logger.info("已停止全部后台任务")
         except Exception as e:
             logger.error(f"停止全部后台任务失败：{e}")
 
     async def destroy(self):
         try:
+            if self.stream is not None:
+                self.stream.on_state = None
+                await self.stream.stop()
             self.stop_all_tasks()
             if self.scheduler.running:
                 self.scheduler.shutdown(wait=False)
             self.tasks.clear()
+            self.groups.clear()
             logger.info("后台调度器已销毁")
         except Exception as e:
             logger.error(f"销毁调度器失败：{e}")
@@ -178,12 +795,31 @@ class AsyncTask:
     async def get_task_info(self, key: str) -> str:
         try:
             t = self.tasks[key]
-            return (
+            # 推送源的周期在所属组上
+            job = self.groups.get(t.get("group")) or t
+            info = (
                 f"功能：{key}\n"
                 f"启用：{t['enable']}\n"
-                f"周期：{t['interval']} 秒\n"
-                f"旧状态：{t['state_old']}\n"
-                f"推送对象：{t['umos']}"
+                f"周期：{job.get('interval', '-')} 秒\n"
             )
+            if key in SERVER_TOPICS:
+                subscriptions = {server: self.subscriptions.sessions(key, server) for server in self.subscriptions.servers(key)}
+                lines = [
+                    f"{server}：{'、'.join(umos)}" + (f"（最新：{t['state'].get(server)}）" if "state" in t else "")
+                    for server, umos in subscriptions.items()
+                ]
+                info += "订阅：\n" + "\n".join(lines)
+                umos = [umo for umos in subscriptions.values() for umo in umos]
+            else:
+                info += f"推送对象：{self.subscriptions.sessions(key)}"
+                umos = self.subscriptions.sessions(key)
+
+            stats = self.dispatcher.summary(dict.fromkeys(umos))
+            if stats:
+                info += f"\n推送延迟：\n{stats}"
+            pending = await self.dispatcher.pending()
+            if pending:
+                info += f"\n待重试：{pending} 条"
+            return info
         except Exception as e:
             return f"读取后台配置失败：{e}"
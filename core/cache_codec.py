@@ -0,0 +1,136 @@
+"""缓存数据的压缩二进制编码。
+
+缓存内容以带版本头的二进制块写入 SQLite：
+
+    魔数 b"JXC" | 格式版本 | 序列化方式 | 压缩方式 | 数据版本 | CRC32 | 数据
+
+序列化优先使用 msgpack，未安装时退化为 JSON；压缩优先使用 zstd，
+未安装时使用标准库 zlib，过小的数据不压缩。读取时校验魔数、格式版本、
+数据版本和校验和，任何一项不符都视为缓存失效。旧版本写入的 JSON 文本
+仍可直接读取。本模块不依赖 AstrBot。
+"""
+
+import json
+import struct
+import zlib
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # 可选依赖，缺失时使用 JSON
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，缺失时使用 zlib
+    zstandard = None
+
+
+MAGIC = b"JXC"
+FORMAT_VERSION = 1
+
+SERIALIZER_JSON = 0
+SERIALIZER_MSGPACK = 1
+
+COMPRESSOR_NONE = 0
+COMPRESSOR_ZLIB = 1
+COMPRESSOR_ZSTD = 2
+
+# 小于该长度的数据不压缩
+COMPRESS_MIN_BYTES = 512
+
+_HEADER = struct.Struct(">3sBBBHI")
+
+
+class CacheCodecError(ValueError):
+    """缓存块无法解码：格式、版本或校验和不符，或缺少对应的可选依赖"""
+
+
+def _serialize(obj: Any) -> Tuple[int, bytes]:
+    if msgpack is not None:
+        return SERIALIZER_MSGPACK, msgpack.packb(obj, use_bin_type=True)
+    return SERIALIZER_JSON, json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _deserialize(serializer: int, raw: bytes) -> Any:
+    if serializer == SERIALIZER_JSON:
+        return json.loads(raw.decode("utf-8"))
+    if serializer == SERIALIZER_MSGPACK:
+        if msgpack is None:
+            raise CacheCodecError("缓存由 msgpack 序列化，但未安装 msgpack")
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    raise CacheCodecError(f"未知的序列化方式: {serializer}")
+
+
+def _compress(raw: bytes) -> Tuple[int, bytes]:
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return COMPRESSOR_NONE, raw
+    if zstandard is not None:
+        return COMPRESSOR_ZSTD, zstandard.ZstdCompressor(level=6).compress(raw)
+    return COMPRESSOR_ZLIB, zlib.compress(raw, 6)
+
+
+def _decompress(compressor: int, body: bytes) -> bytes:
+    if compressor == COMPRESSOR_NONE:
+        return body
+    if compressor == COMPRESSOR_ZLIB:
+        return zlib.decompress(body)
+    if compressor == COMPRESSOR_ZSTD:
+        if zstandard is None:
+            raise CacheCodecError("缓存由 zstd 压缩，但未安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise CacheCodecError(f"未知的压缩方式: {compressor}")
+
+
+def encode(obj: Any, schema: int = 1) -> bytes:
+    """编码为带版本头和校验和的二进制块，schema 为调用方的数据版本"""
+    serializer, raw = _serialize(obj)
+    compressor, body = _compress(raw)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, serializer, compressor, schema, zlib.crc32(body))
+    return header + body
+
+
+def decode(blob: Any, schema: int = 1) -> Any:
+    """解码二进制块；兼容旧版直接写入的 JSON 文本"""
+    if isinstance(blob, str):
+        return json.loads(blob)
+
+    blob = bytes(blob)
+    if len(blob) < _HEADER.size:
+        raise CacheCodecError("缓存块长度不足")
+
+    magic, version, serializer, compressor, blob_schema, crc = _HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise CacheCodecError("缓存块魔数不符")
+    if version != FORMAT_VERSION:
+        raise CacheCodecError(f"缓存格式版本不符: {version}")
+    if blob_schema != schema:
+        raise CacheCodecError(f"缓存数据版本不符: {blob_schema} != {schema}")
+
+    body = blob[_HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise CacheCodecError("缓存块校验和不符")
+    return _deserialize(serializer, _decompress(compressor, body))
+
+
+class DecodeMemo:
+    """进程内解码结果缓存：同一键、同一版本戳只解码一次。
+
+    版本戳由调用方提供（如库中的更新时间与数据版本），调用方每次先读取当前版本戳再取结果，
+    其他进程改写或数据版本升级后版本戳不同，旧的解码结果不再返回。返回的是共享对象，调用方不得原地修改。
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[Hashable, Any]] = {}
+
+    def get(self, key: Hashable, stamp: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        return None
+
+    def put(self, key: Hashable, stamp: Hashable, value: Any):
+        self._entries[key] = (stamp, value)
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
@@ -0,0 +1,256 @@
+"""静态基础数据的紧凑列式内存容器。
+
+交易行物品库、资历点数和资历菜单在插件运行期间基本不变，
+按列保存为 array 整数列和字符串池下标，避免大量小字典和重复字符串。
+本模块不依赖 AstrBot，可单独用于基准测试。
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖，缺失时只提供 array 列
+    np = None
+
+
+class StringPool:
+    """字符串池，相同字符串只保存一份，列中只存下标。
+
+    构建期用字典去重；freeze() 后全部字符串拼接为一个连续缓冲区加偏移数组，
+    释放逐个字符串对象和去重字典，读取时按偏移切片。
+    """
+
+    def __init__(self):
+        self._strings: Optional[List[str]] = []
+        self._index: Optional[Dict[str, int]] = {}
+        self._buffer = ""
+        self._offsets = array("l", [0])
+
+    def __len__(self) -> int:
+        return len(self._strings) if self._strings is not None else len(self._offsets) - 1
+
+    @property
+    def frozen(self) -> bool:
+        return self._strings is None
+
+    def add(self, text: Any) -> int:
+        if self.frozen:
+            raise RuntimeError("字符串池已冻结")
+        text = sys.intern(str(text if text is not None else ""))
+        index = self._index.get(text)
+        if index is None:
+            index = len(self._strings)
+            self._strings.append(text)
+            self._index[text] = index
+        return index
+
+    def get(self, index: int) -> str:
+        if self._strings is not None:
+            return self._strings[index]
+        return self._buffer[self._offsets[index]:self._offsets[index + 1]]
+
+    def find(self, text: str) -> Optional[int]:
+        """构建期按字符串查下标，冻结后不可用"""
+        return self._index.get(text) if self._index is not None else None
+
+    def freeze(self):
+        """拼接为连续缓冲区，之后只读"""
+        if self.frozen:
+            return
+        offsets = array("l", [0])
+        total = 0
+        for text in self._strings:
+            total += len(text)
+            offsets.append(total)
+        self._buffer = "".join(self._strings)
+        self._offsets = offsets
+        self._strings = None
+        self._index = None
+
+
+class ColumnarTable:
+    """结构化数组表：整数列为 array('q')，字符串列为字符串池下标 array('l')，
+    主键到行号的映射用于 O(1) 定位。"""
+
+    def __init__(
+        self,
+        key: Optional[str],
+        int_columns: Sequence[str] = (),
+        str_columns: Sequence[str] = (),
+        pool: Optional[StringPool] = None,
+    ):
+        # key 为空时不建立主键映射，只按行号访问
+        self.key = key
+        self.pool = pool or StringPool()
+        self._ints: Dict[str, array] = {name: array("q") for name in int_columns}
+        self._strs: Dict[str, array] = {name: array("l") for name in str_columns}
+        if key is not None and key not in self._ints and key not in self._strs:
+            raise ValueError(f"主键列 {key} 未定义")
+        self._rows: Dict[Hashable, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._ints) + list(self._strs)
+
+    def append(self, row: Dict[str, Any]) -> int:
+        """追加一行并返回行号，主键重复时覆盖为最新行"""
+        for name, column in self._ints.items():
+            column.append(int(row.get(name) or 0))
+        for name, column in self._strs.items():
+            column.append(self.pool.add(row.get(name)))
+
+        offset = self._size
+        if self.key is not None:
+            self._rows[self._key_value(offset)] = offset
+        self._size += 1
+        return offset
+
+    def extend(self, rows: Iterable[Dict[str, Any]]):
+        for row in rows:
+            self.append(row)
+
+    def freeze(self):
+        """构建完成后冻结字符串池"""
+        self.pool.freeze()
+
+    def _key_value(self, offset: int) -> Hashable:
+        if self.key in self._ints:
+            return self._ints[self.key][offset]
+        return self.pool.get(self._strs[self.key][offset])
+
+    def row_of(self, key: Hashable) -> Optional[int]:
+        """主键所在行号"""
+        return self._rows.get(key)
+
+    def get(self, offset: int, column: str) -> Any:
+        if column in self._ints:
+            return self._ints[column][offset]
+        return self.pool.get(self._strs[column][offset])
+
+    def lookup(self, key: Hashable, column: str, default: Any = None) -> Any:
+        """按主键读取单个字段"""
+        offset = self._rows.get(key)
+        if offset is None:
+            return default
+        return self.get(offset, column)
+
+    def record(self, offset: int) -> Dict[str, Any]:
+        """还原为字典，只在输出少量结果时使用"""
+        return {name: self.get(offset, name) for name in self.columns}
+
+    def records(self, offsets: Iterable[int]) -> Iterator[Dict[str, Any]]:
+        for offset in offsets:
+            yield self.record(offset)
+
+    def column(self, name: str) -> array:
+        """整数列或字符串下标列的原始 array"""
+        return self._ints[name] if name in self._ints else self._strs[name]
+
+    def as_numpy(self, name: str):
+        """整数列的零拷贝 NumPy 视图，未安装 NumPy 时返回 None"""
+        if np is None:
+            return None
+        column = self.column(name)
+        return np.frombuffer(column, dtype=np.int64 if column.typecode == "q" else np.dtype(f"i{column.itemsize}"))
+
+
+class AchievementPointTable(ColumnarTable):
+    """资历点数：id -> 点数"""
+
+    def __init__(self):
+        super().__init__("id", int_columns=("id", "point"))
+
+    @classmethod
+    def from_points(cls, points: Dict[str, Any]) -> "AchievementPointTable":
+        table = cls()
+        for key, value in points.items():
+            try:
+                table.append({"id": int(key), "point": int(value or 0)})
+            except (TypeError, ValueError):
+                continue
+        return table
+
+    def point(self, achievement_id: int) -> int:
+        offset = self._rows.get(achievement_id)
+        return self._ints["point"][offset] if offset is not None else 0
+
+
+class AchievementMenuTable:
+    """资历菜单：分类表加成员区间，所有分类的资历 ID 连续存放在同一个 array 中"""
+
+    def __init__(self):
+        self.pool = StringPool()
+        # 分类行：parent 为父分类行号，顶层为 -1；[start, end) 为自身资历，
+        # 子分类紧随父分类存放，[start, stop) 即为含子分类的全部资历
+        self.categories = ColumnarTable(
+            None, int_columns=("parent", "start", "end", "stop"), str_columns=("name",), pool=self.pool
+        )
+        self.members = array("q")
+        self._top: Dict[str, int] = {}
+        self._children: Dict[int, List[int]] = {}
+
+    @staticmethod
+    def _flatten_ids(values: Any) -> Iterator[int]:
+        if isinstance(values, list):
+            for item in values:
+                yield from AchievementMenuTable._flatten_ids(item)
+            return
+        try:
+            yield int(values)
+        except (TypeError, ValueError):
+            pass
+
+    def _add(self, name: str, parent: int, achievements: Any) -> int:
+        start = len(self.members)
+        self.members.extend(self._flatten_ids(achievements))
+        end = len(self.members)
+        return self.categories.append({"parent": parent, "start": start, "end": end, "stop": end, "name": name})
+
+    @classmethod
+    def from_menus(cls, menus: Dict[str, Any]) -> "AchievementMenuTable":
+        table = cls()
+        for menu_id, category in menus.items():
+            if not isinstance(category, dict):
+                continue
+            row = table._add(str(category.get("name") or ""), -1, category.get("achievements", []))
+            table._top[str(menu_id)] = row
+            children = []
+            for child in category.get("children", []) or []:
+                if isinstance(child, dict):
+                    children.append(
+                        table._add(str(child.get("name") or "未命名"), row, child.get("achievements", []))
+                    )
+            table._children[row] = children
+            table.categories.column("stop")[row] = len(table.members)
+        table.categories.freeze()
+        return table
+
+    def top_row(self, menu_id: str) -> Optional[int]:
+        return self._top.get(str(menu_id))
+
+    def children(self, row: int) -> List[int]:
+        return self._children.get(row, [])
+
+    def name(self, row: int) -> str:
+        return self.categories.get(row, "name")
+
+    def own_ids(self, row: int) -> array:
+        """分类自身的资历 ID，不含子分类"""
+        return self.members[self.categories.get(row, "start"):self.categories.get(row, "end")]
+
+    def category_ids(self, row: int) -> array:
+        """分类及其子分类包含的资历 ID"""
+        return self.members[self.categories.get(row, "start"):self.categories.get(row, "stop")]
+
+    def span(self, row: int) -> Tuple[int, int]:
+        """含子分类的成员区间"""
+        return self.categories.get(row, "start"), self.categories.get(row, "stop")
@@ -0,0 +1,156 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from astrbot.api import logger
+
+from .sqlite import AsyncSQLiteDB
+
+
+# 采集记录超过该时长未更新时不再视为本地数据完整
+INGEST_STALE_SECONDS = 15 * 60
+
+
+class SerendipityEventStore:
+    """奇遇触发记录的本地采集表。
+
+    后台任务按服务器增量拉取近期奇遇，按 (服务器, 角色, 奇遇, 时间) 去重追加；
+    正在采集的服务器由本地 SQL 聚合回答近期、统计和汇总查询。
+    """
+
+    def __init__(self, sqlite: AsyncSQLiteDB):
+        self._sql_db = sqlite
+        # server -> {"since": 首次采集时间, "last_poll": 最近采集时间, "watermark": 已入库最新触发时间}
+        self._ingest: Dict[str, Dict[str, int]] = {}
+
+    async def load(self):
+        """读取各服务器的采集进度"""
+        try:
+            rows = await self._sql_db.select_all("serendipity_ingest")
+        except Exception as e:
+            logger.error(f"读取奇遇采集进度失败: {e}")
+            return
+        self._ingest = {
+            row["server"]: {
+                "since": int(row["since"]),
+                "last_poll": int(row["last_poll"]),
+                "watermark": int(row["watermark"]),
+            }
+            for row in rows
+        }
+
+    @staticmethod
+    def _rows(server: str, items: Any) -> List[tuple]:
+        rows = []
+        for item in items or []:
+            if not isinstance(item, dict):
+                continue
+            try:
+                event_time = int(item.get("time"))
+                level = int(item.get("level") or 0)
+            except (TypeError, ValueError):
+                continue
+            name = item.get("name")
+            event = item.get("event")
+            if not name or not event:
+                continue
+            rows.append((str(item.get("server") or server), str(name), str(event), level, event_time))
+        return rows
+
+    async def append(self, server: str, items: Any) -> int:
+        """去重写入奇遇记录，返回比水位线更新的条数"""
+        rows = self._rows(server, items)
+        if not rows:
+            return 0
+
+        try:
+            await self._sql_db.executemany(
+                "INSERT OR IGNORE INTO serendipity_event (server, name, event, level, time) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        except Exception as e:
+            logger.error(f"写入奇遇记录失败: {e}")
+            return 0
+
+        watermark = self._ingest.get(server, {}).get("watermark", 0)
+        return sum(1 for row in rows if row[4] > watermark)
+
+    async def ingest(self, server: str, items: Any, page_size: Optional[int] = None) -> int:
+        """后台采集入口：写入记录并推进该服务器的采集进度。
+
+        距上次采集超过有效期，或返回满页却没有接上水位线时，中间可能漏掉了记录，
+        采集起点重置为当前时间，之前的时间范围不再由本地回答。
+        """
+        fresh = await self.append(server, items)
+
+        now = int(time.time())
+        times = [row[4] for row in self._rows(server, items)]
+        state = self._ingest.get(server)
+        if state is None:
+            state = self._ingest[server] = {"since": now, "last_poll": now, "watermark": 0}
+        else:
+            stale = now - state["last_poll"] > INGEST_STALE_SECONDS
+            overflow = bool(page_size) and len(items or []) >= page_size and bool(times) and min(times) > state["watermark"]
+            if stale or overflow:
+                logger.info(f"奇遇采集 {server} 出现间断，本地记录从当前时间重新计算覆盖范围")
+                state["since"] = now
+        state["last_poll"] = now
+        if times:
+            state["watermark"] = max(state["watermark"], max(times))
+
+        try:
+            await self._sql_db.execute(
+                """
+                INSERT INTO serendipity_ingest (server, since, last_poll, watermark)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(server) DO UPDATE SET
+                    since=excluded.since,
+                    last_poll=excluded.last_poll,
+                    watermark=excluded.watermark
+                """,
+                (server, state["since"], state["last_poll"], state["watermark"]),
+            )
+        except Exception as e:
+            logger.error(f"写入奇遇采集进度失败: {e}")
+        return fresh
+
+    def covers(self, server: str, since: Optional[int] = None) -> bool:
+        """该服务器是否处于持续采集中，且本地记录覆盖到 since 时刻"""
+        state = self._ingest.get(server)
+        if not server or not state:
+            return False
+        if time.time() - state["last_poll"] > INGEST_STALE_SECONDS:
+            return False
+        return since is None or state["since"] <= since
+
+    def covered_since(self, server: str) -> Optional[int]:
+        """处于持续采集中时返回本地记录连续完整的起点，否则返回 None"""
+        if not self.covers(server):
+            return None
+        return self._ingest[server]["since"]
+
+    async def recent(self, server: str, limit: int, since: int = 0) -> List[Dict[str, Any]]:
+        """近期奇遇，只取 since 之后的记录"""
+        return await self._sql_db.fetch_all(
+            "SELECT server, name, event, level, time FROM serendipity_event "
+            "WHERE server=? AND time>=? ORDER BY time DESC LIMIT ?",
+            (server, since, limit),
+        )
+
+    async def statistics(self, event: str, server: str, limit: int, since: int = 0) -> List[Dict[str, Any]]:
+        """指定奇遇的触发记录，只取 since 之后的记录"""
+        return await self._sql_db.fetch_all(
+            "SELECT server, name, event, level, time FROM serendipity_event "
+            "WHERE server=? AND event=? AND time>=? ORDER BY time DESC LIMIT ?",
+            (server, event, since, limit),
+        )
+
+    async def collect(self, server: str, days: int) -> List[Dict[str, Any]]:
+        """最近若干天各奇遇的触发次数与最新触发者"""
+        since = int(time.time()) - days * 86400
+        # SQLite 中与 MAX() 同查的裸列取自最大值所在行
+        return await self._sql_db.fetch_all(
+            "SELECT server, event, level, COUNT(*) AS count, MAX(time) AS latest_time, name AS latest_name "
+            "FROM serendipity_event WHERE server=? AND time>=? "
+            "GROUP BY event ORDER BY count DESC, latest_time DESC",
+            (server, since),
+        )
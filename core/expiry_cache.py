@@ -0,0 +1,104 @@
+import copy
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from astrbot.api import logger
+
+from .sqlite import AsyncSQLiteDB
+from .cache_codec import decode, encode
+
+
+class ExpiryCache:
+    """按数据自身有效期过期的接口缓存。
+
+    内存优先，SQLite 持久化兜底，插件重载后仍可命中；
+    过期时间由调用方根据数据计算，而不是固定 TTL。
+    持久化内容使用 cache_codec 压缩编码，旧版 JSON 文本仍可读取。
+    """
+
+    def __init__(self, sqlite: AsyncSQLiteDB):
+        self._sql_db = sqlite
+        self._memory: Dict[str, Tuple[float, Any]] = {}
+
+    @staticmethod
+    def make_key(path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """按接口路径和参数生成缓存键，凭据参数不参与"""
+        items = {
+            k: v for k, v in (params or {}).items()
+            if k not in ("token", "ticket")
+        }
+        return f"{path}?{json.dumps(items, ensure_ascii=False, sort_keys=True)}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        """读取未过期的缓存副本"""
+        now = time.time()
+        cached = self._memory.get(key)
+        if cached is None:
+            cached = await self._load(key)
+            if cached is not None:
+                self._memory[key] = cached
+
+        if cached is None:
+            return None
+
+        expires_at, payload = cached
+        if expires_at <= now:
+            self._memory.pop(key, None)
+            return None
+
+        # 处理函数会原地修改数据，返回副本避免污染缓存
+        return copy.deepcopy(payload)
+
+    async def set(self, key: str, payload: Any, expires_at: Optional[float]):
+        """写入缓存，有效期为空或已过期时不缓存"""
+        if not expires_at or expires_at <= time.time():
+            return
+
+        self._memory[key] = (expires_at, copy.deepcopy(payload))
+        try:
+            await self._sql_db.execute(
+                """
+                INSERT INTO payload_cache (key, content, expires_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    content=excluded.content,
+                    expires_at=excluded.expires_at
+                """,
+                (key, encode(payload), expires_at),
+            )
+        except Exception as e:
+            logger.error(f"写入接口缓存失败: {e}")
+
+    async def invalidate(self, key: str):
+        self._memory.pop(key, None)
+        try:
+            await self._sql_db.delete("payload_cache", "key=?", (key,))
+        except Exception as e:
+            logger.error(f"删除接口缓存失败: {e}")
+
+    async def purge_expired(self):
+        """清理已过期的持久化缓存"""
+        now = time.time()
+        for key in [k for k, (expires_at, _) in self._memory.items() if expires_at <= now]:
+            self._memory.pop(key, None)
+        try:
+            await self._sql_db.delete("payload_cache", "expires_at<=?", (now,))
+        except Exception as e:
+            logger.error(f"清理接口缓存失败: {e}")
+
+    async def _load(self, key: str) -> Optional[Tuple[float, Any]]:
+        try:
+            row = await self._sql_db.select_one("payload_cache", "key=?", (key,))
+        except Exception as e:
+            logger.error(f"读取接口缓存失败: {e}")
+            return None
+
+        if not row:
+            return None
+
+        try:
+            return float(row["expires_at"]), decode(row["content"])
+        except Exception as e:
+            logger.error(f"解析接口缓存失败: {e}")
+            return None
@@ -1,4 +1,4 @@
-from datetime import datetime,date
+from datetime import datetime,date,timedelta
 from zoneinfo import ZoneInfo
 
 import base64
@@ -149,3 +149,44 @@ def format_remaining(ts):
         return f"{hours}时{minutes:02d}分{seconds:02d}秒"
     except (TypeError, ValueError):
         return ""
+
+
+# 剑网三每日 07:00 刷新，周一 07:00 周刷新
+GAME_TZ = ZoneInfo("Asia/Shanghai")
+RESET_HOUR = 7
+
+
+def next_daily_reset(now: datetime | None = None) -> datetime:
+    """下一次日刷新时间"""
+    now = now or datetime.now(GAME_TZ)
+    reset = now.astimezone(GAME_TZ).replace(hour=RESET_HOUR, minute=0, second=0, microsecond=0)
+    if reset <= now:
+        reset += timedelta(days=1)
+    return reset
+
+
+def next_weekly_reset(now: datetime | None = None) -> datetime:
+    """下一次周刷新时间"""
+    reset = next_daily_reset(now)
+    return reset + timedelta(days=(7 - reset.weekday()) % 7)
+
+
+def expire_at_daily_reset(data=None) -> float:
+    """缓存有效期：到下一次日刷新"""
+    return next_daily_reset().timestamp()
+
+
+def expire_at_weekly_reset(data=None) -> float:
+    """缓存有效期：到下一次周刷新"""
+    return next_weekly_reset().timestamp()
+
+
+def expire_at_field(field: str):
+    """缓存有效期：取数据自带的截止时间戳，缺失时退回周刷新"""
+    def _expire(data) -> float | None:
+        try:
+            end = float(data.get(field))
+        except (AttributeError, TypeError, ValueError):
+            return expire_at_weekly_reset()
+        return end if end > datetime.now().timestamp() else None
+    return _expire
@@ -12,9 +12,39 @@ import astrbot.api.message_components as Comp
 
 from .request import APIClient
 from .sqlite import AsyncSQLiteDB
+from .keju_bank import KejuBank
+from .price_store import PriceStore, TREND_SPANS
+from .expiry_cache import ExpiryCache
+from .event_store import SerendipityEventStore
+from .server_registry import ServerRegistry
+from .push_seen import content_key
 from .fun_basic import load_template,gold_to_parts,week_to_num,compare_date_str,format_time,format_remaining
-
-
+from .fun_basic import expire_at_daily_reset,expire_at_weekly_reset,expire_at_field
+
+
+# 排行榜名称与对应模板
+RANK_TEMPLATES = {
+    "名士五十强": "rank_role.html",
+    "老江湖五十强": "rank_role.html",
+    "兵甲藏家五十强": "rank_role.html",
+    "名师五十强": "rank_role.html",
+    "阵营英雄五十强": "rank_role.html",
+    "薪火相传五十强": "rank_role.html",
+    "庐园广记一百强": "rank_role.html",
+    "赛季恶人五十强": "rank_tong0.html",
+    "赛季浩气五十强": "rank_tong0.html",
+    "本周恶人五十强": "rank_tong0.html",
+    "本周浩气五十强": "rank_tong0.html",
+    "浩气神兵宝甲五十强": "rank_tong1.html",
+    "恶人神兵宝甲五十强": "rank_tong1.html",
+    "浩气爱心帮会五十强": "rank_tong1.html",
+    "恶人爱心帮会五十强": "rank_tong1.html",
+    "上周恶人五十强": "rank_tong2.html",
+    "上周浩气五十强": "rank_tong2.html",
+}
+
+# 整周不变的榜单
+WEEKLY_RANK_NAMES = {"上周恶人五十强", "上周浩气五十强"}
 
 
 
@@ -27,6 +57,16 @@ class JX3APIService:
         # 引用sqlite
         self._sql_db = sqlite
         self._cache_db = cache_sqlite or sqlite
+        # 科举题库本地镜像
+        self.keju_bank = KejuBank(self._cache_db)
+        # 金价物价本地时序
+        self.price_store = PriceStore(self._cache_db)
+        # 按刷新周期过期的接口缓存
+        self.payload_cache = ExpiryCache(self._cache_db)
+        # 奇遇触发记录本地采集
+        self.event_store = SerendipityEventStore(self._cache_db)
+        # 区服注册表，用于服务器名称归一与本地校验
+        self.server_registry = ServerRegistry(self._parse_server_aliases(self._config.get("server_alias", [])))
 
         # 获取配置中的 Token
         self.token = self._config.get("jx3api_token", "")
@@ -48,6 +88,17 @@ class JX3APIService:
             await self._api.close()
 
 
+    @staticmethod
+    def _parse_server_aliases(lines: Any) -> Dict[str, str]:
+        """解析配置中的“别名=服务器”"""
+        aliases = {}
+        for line in lines or []:
+            alias, sep, server = str(line).partition("=")
+            if sep and alias.strip() and server.strip():
+                aliases[alias.strip()] = server.strip()
+        return aliases
+
+
     def _init_return_data(self) -> Dict[str, Any]:
             """初始化标准的返回数据结构"""
             return {
@@ -95,14 +146,30 @@ class JX3APIService:
             Callable[[Any, Dict[str, Any]], Any | Awaitable[Any]]
         ] = None,
         template: Optional[str] = None,
+        expires: Optional[Callable[[Any], Optional[float]]] = None,
+        refresh: bool = False,
     ) -> Dict[str, Any]:
-        """通用接口请求与模板处理。"""
+        """通用接口请求与模板处理。
+
+        expires 根据返回数据计算缓存截止时间戳，为空时不缓存；
+        refresh 为真时跳过缓存读取并用最新数据覆盖。
+        """
         return_data = self._init_return_data()
 
-        data = await self._base_request(path, params)
+        data = None
+        cache_key = None
+        if expires:
+            cache_key = self.payload_cache.make_key(path, params)
+            if not refresh:
+                data = await self.payload_cache.get(cache_key)
+
         if data is None:
-            return_data["msg"] = "获取接口信息失败"
-            return return_data
+            data = await self._base_request(path, params)
+            if data is None:
+                return_data["msg"] = "获取接口信息失败"
+                return return_data
+            if cache_key:
+                await self.payload_cache.set(cache_key, data, expires(data))
 
         try:
             await processor(data, return_data)
@@ -124,6 +191,22 @@ class JX3APIService:
         return return_data
 
 
+    async def _local_result(self, data: Dict[str, Any], template: str) -> Dict[str, Any]:
+        """本地数据直接套用模板"""
+        return_data = self._init_return_data()
+
+        try:
+            return_data["temp"] = await load_template(template)
+        except FileNotFoundError as e:
+            logger.error(f"加载模板失败: {e}")
+            return_data["msg"] = "系统错误：模板文件不存在"
+            return return_data
+
+        return_data["data"] = data
+        return_data["code"] = 200
+        return return_data
+
+
     # --- 业务功能函数 ---
     async def helps(self) -> Dict[str, Any]:
         """帮助"""
@@ -197,6 +280,7 @@ class JX3APIService:
             params={"mode": mode, "num": num},
             processor=processor,
             template="richangyuche.html" if mode == "list" else None,
+            expires=expire_at_daily_reset,
         )
 
     
@@ -433,41 +517,9 @@ class JX3APIService:
         )         
 
 
-    async def rank_statistical(self, name: str, server: str) -> Dict[str, Any]:
+    async def rank_statistical(self, name: str, server: str, refresh: bool = False) -> Dict[str, Any]:
         """排行榜单"""
-        ROLE_RANK_NAMES = {
-            "名士五十强",
-            "老江湖五十强",
-            "兵甲藏家五十强",
-            "名师五十强",
-            "阵营英雄五十强",
-            "薪火相传五十强",
-            "庐园广记一百强",
-        }
-        TONG_RANK_NAMES0 = {
-            "赛季恶人五十强",
-            "赛季浩气五十强",
-            "本周恶人五十强",
-            "本周浩气五十强",
-        }
-        TONG_RANK_NAMES1 = {
-            "浩气神兵宝甲五十强",
-            "恶人神兵宝甲五十强",
-            "浩气爱心帮会五十强",
-            "恶人爱心帮会五十强",
-        }
-        TONG_RANK_NAMES2 = {
-            "上周恶人五十强",
-            "上周浩气五十强",
-        }
-        if name in ROLE_RANK_NAMES:
-            template_name = "rank_role.html"
-        elif name in TONG_RANK_NAMES0:
-            template_name = "rank_tong0.html"
-        elif name in TONG_RANK_NAMES1:
-            template_name = "rank_tong1.html"
-        elif name in TONG_RANK_NAMES2:
-            template_name = "rank_tong2.html"
+        template_name = RANK_TEMPLATES.get(name)
 
         # 数据处理
         async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
@@ -484,7 +536,10 @@ class JX3APIService:
             path="/rank/statistics",
             params={"server": server, "name": name, "token": self.token},
             processor=processor,
-            template=template_name
+            template=template_name,
+            # 上周榜单整周不变，其余榜单按日统计
+            expires=expire_at_weekly_reset if name in WEEKLY_RANK_NAMES else expire_at_daily_reset,
+            refresh=refresh,
         )   
 
 
@@ -547,6 +602,7 @@ class JX3APIService:
         """金价行情"""
         # 数据处理
         async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
+            await self.price_store.record_gold(server, data)
             return_data["data"]["items"] = data
             
         return await self._request_api(
@@ -561,6 +617,7 @@ class JX3APIService:
         """物价查询"""
         # 数据处理
         async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
+            await self.price_store.record_item(Name, data)
             return_data["data"] = data
             
         return await self._request_api(
@@ -571,6 +628,49 @@ class JX3APIService:
         ) 
 
 
+    async def _price_trend(self, title: str, lines: Dict[str, List[Dict[str, Any]]], y_label: str) -> Dict[str, Any]:
+        """本地价格走势图"""
+        return_data = self._init_return_data()
+
+        if not lines:
+            return_data["msg"] = "本地暂无该范围的价格记录"
+            return return_data
+
+        try:
+            return_data["data"] = await self.price_store.render_chart(title, lines, y_label)
+        except Exception as e:
+            logger.exception(f"绘制价格走势失败: {e}")
+            return_data["msg"] = "绘制价格走势失败"
+            return return_data
+
+        return_data["code"] = 200
+        return return_data
+
+
+    async def jinjiazoushi(self, server: str, span: str) -> Dict[str, Any]:
+        """金价走势"""
+        if span not in TREND_SPANS:
+            return_data = self._init_return_data()
+            return_data["msg"] = f"范围仅支持：{'、'.join(TREND_SPANS)}"
+            return return_data
+
+        lines = await self.price_store.gold_trend(server, span)
+        title = f"{server} 金价走势（{TREND_SPANS[span][2]}）"
+        return await self._price_trend(title, lines, "金 / 元")
+
+
+    async def wujiazoushi(self, Name: str, server: str, span: str) -> Dict[str, Any]:
+        """物价走势"""
+        if span not in TREND_SPANS:
+            return_data = self._init_return_data()
+            return_data["msg"] = f"范围仅支持：{'、'.join(TREND_SPANS)}"
+            return return_data
+
+        lines = await self.price_store.item_trend(Name, server, span)
+        title = f"{Name} {server or '全服'} 价格走势（{TREND_SPANS[span][2]}）"
+        return await self._price_trend(title, lines, "元")
+
+
     async def chengbeng(self, Name: str, server:str, source: int) -> Dict[str, Any]:
         """成本计算"""
         # 数据处理
@@ -790,6 +890,24 @@ class JX3APIService:
 
     async def qiyuhuizong(self, server: str, num: int) -> Dict[str, Any]:
         """奇遇汇总"""
+        try:
+            days = int(num)
+        except (TypeError, ValueError):
+            days = 0
+        if days > 0 and self.event_store.covers(server, int(datetime.now().timestamp()) - days * 86400):
+            items = await self.event_store.collect(server, days)
+            for item in items:
+                item["latest_time"] = format_time(item.get("latest_time"))
+            return await self._local_result(
+                {
+                    "items": items,
+                    "server": server,
+                    "num": num,
+                    "update_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                },
+                "qiyuhuizong.html",
+            )
+
         async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
             for item in data:
                 latest = item.get("last")
@@ -849,7 +967,23 @@ class JX3APIService:
 
     async def jinqiqiyu(self, server: str, limit: int) -> Dict[str, Any]:
         """近期奇遇"""
+        # 只用连续采集期间的记录，条数不足时请求上游
+        since = self.event_store.covered_since(server)
+        items = await self.event_store.recent(server, limit, since) if since is not None else []
+        if items and len(items) >= limit:
+            for item in items:
+                item["time"] = format_time(item.get("time"))
+            return await self._local_result(
+                {
+                    "items": items,
+                    "server": server,
+                    "update_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                },
+                "jinqiqiyu.html",
+            )
+
         async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
+            await self.event_store.append(server, data)
             for item in data:
                 item["time"] = format_time(item.get("time"))
 
@@ -893,7 +1027,25 @@ class JX3APIService:
 
     async def qiyutongji(self, name: str, server: str, limit: int) -> Dict[str, Any]:
         """奇遇统计"""
+        # 只用连续采集期间的记录，条数不足时请求上游
+        since = self.event_store.covered_since(server)
+        items = await self.event_store.statistics(name, server, limit, since) if since is not None else []
+        if items and len(items) >= limit:
+            for item in items:
+                item["time"] = format_time(item.get("time"))
+            return await self._local_result(
+                {
+                    "items": items,
+                    "server": server,
+                    "update_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "qiyuname": name
+                },
+                "qiyuliebiao.html",
+            )
+
         async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
+            if server:
+                await self.event_store.append(server, data)
             for item in data:
                 item["time"] = format_time(item.get("time"))
 
@@ -912,6 +1064,17 @@ class JX3APIService:
         ) 
 
 
+    async def ingest_recent_events(self, server: str, limit: int = 50) -> int:
+        """增量采集指定服务器的近期奇遇，返回新增条数"""
+        data = await self._base_request(
+            "/event/recent",
+            {"server": server, "limit": limit, "token": self.token},
+        )
+        if not isinstance(data, list):
+            return 0
+        return await self.event_store.ingest(server, data, page_size=limit)
+
+
     async def jingnai(self, name: str, server: str) -> Dict[str, Any]:
         """角色百战"""
         async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
@@ -970,7 +1133,8 @@ class JX3APIService:
             path="/monster/weekly",
             params= { "token": self.token},
             processor=processor,
-            template="baizhan.html"
+            template="baizhan.html",
+            expires=expire_at_field("end"),
         ) 
 
 
@@ -1415,16 +1579,8 @@ class JX3APIService:
         async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
             result = data[0]
             return_data["status"] = result.get('id')
-
-            result_msg = "维护推送\n"
-            # 仅展示前1条，避免消息过长
-            for i, item in enumerate(data[:limit], 1): 
-                result_msg += f"{i}. 【{item.get('type', '无类型')}】\n"
-                result_msg += f"标题：{item.get('title', '未知时间')}\n"
-                result_msg += f"时间：{item.get('date', '未知时间')}\n"
-                result_msg += f"链接：{item.get('url', '无链接')}\n"
-                
-            return_data["data"] = result_msg
+            # 仅展示前 limit 条，避免消息过长
+            return_data["data"] = self.announce_message(data[:limit])
 
         return await self._request_api(
             path="/news/announce",
@@ -1439,16 +1595,8 @@ class JX3APIService:
         async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
             result = data[0]
             return_data["status"] = int(result.get('catid'))
-
-            result_msg = "新闻资讯推送\n"
-            # 仅展示前1条，避免消息过长
-            for i, item in enumerate(data[:limit], 1): 
-                result_msg += f"{i}. 【{item.get('type', '无类型')}】\n"
-                result_msg += f"标题：{item.get('title', '未知时间')}\n"
-                result_msg += f"时间：{item.get('date', '未知时间')}\n"
-                result_msg += f"链接：{item.get('url', '无链接')}\n"
-                
-            return_data["data"] = result_msg
+            # 仅展示前 limit 条，避免消息过长
+            return_data["data"] = self.news_message(data[:limit])
 
         return await self._request_api(
             path="/news/records",
@@ -1572,27 +1720,50 @@ class JX3APIService:
         ) 
 
 
+    def _format_keju(self, items: List[Dict[str, Any]]) -> str:
+        """科举题目文本"""
+        result_msg = ""
+        for m in items:
+            result_msg += f"{m['id']}.{m['question']}\n"
+            result_msg += f"答案：{m['answer']}\n\n"
+        return result_msg
+
+
     async def keju(self,subject: str, limit: int) -> Dict[str, Any]:
         """科举"""
-        async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
-            result_msg = ""
-            for m in data:
-                result_msg += f"{m['id']}.{m['question']}\n"
-                result_msg += f"答案：{m['answer']}\n\n"
+        # 本地题库有完整或近似完整的题目时直接作答
+        local_items = self.keju_bank.search(subject, limit)
+        if local_items and self.keju_bank.answers(subject, local_items[0]):
+            return_data = self._init_return_data()
+            return_data["data"] = self._format_keju(local_items)
+            return_data["code"] = 200
+            return return_data
 
-            return_data["data"] = result_msg
+        async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
+            await self.keju_bank.upsert(data)
+            return_data["data"] = self._format_keju(data)
 
-        return await self._request_api(
+        return_data = await self._request_api(
             path="/exam/search",
             params= {"subject": subject, "limit": limit},
             processor=processor,
             template=""
         ) 
 
+        # 上游不可用时使用本地模糊结果兜底
+        if (return_data["code"] != 200 or not return_data["data"]) and local_items:
+            return_data["data"] = self._format_keju(local_items)
+            return_data["code"] = 200
+
+        return return_data
+
 
     async def zhuangtai(self,server:str) -> Dict[str, Any]:
         """区服状态"""
         async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
+            if not server:
+                self.server_registry.update(data)
+
             server_wj = []
             server_dx = []
             server_sx = []
@@ -1617,23 +1788,58 @@ class JX3APIService:
         ) 
 
 
+    async def refresh_servers(self) -> bool:
+        """拉取完整区服列表刷新注册表"""
+        return_data = await self.zhuangtai("")
+        return return_data["code"] == 200 and self.server_registry.loaded
+
+
+    @staticmethod
+    def kaifu_message(server: str, opened: bool) -> str:
+        """开服推送文本，轮询与推送流共用"""
+        if opened:
+            return f"{server}服务器已开服，快冲，快冲！"
+        return f"{server}服务器当前维护中，等会再来吧！"
+
+    @staticmethod
+    def news_key(item: Dict[str, Any]) -> str:
+        """新闻事件键：优先使用新闻 ID，没有时取标题与链接的哈希"""
+        if item.get("id"):
+            return str(item["id"])
+        return content_key(item.get("title", ""), item.get("url", ""))
+
+    @staticmethod
+    def news_message(items: List[Dict[str, Any]], title: str = "新闻资讯推送") -> str:
+        """新闻资讯推送文本，轮询与推送流共用"""
+        result_msg = f"{title}\n"
+        for i, item in enumerate(items, 1):
+            result_msg += f"{i}. 【{item.get('type', '无类型')}】\n"
+            result_msg += f"标题：{item.get('title', '未知时间')}\n"
+            result_msg += f"时间：{item.get('date', '未知时间')}\n"
+            result_msg += f"链接：{item.get('url', '无链接')}\n"
+        return result_msg
+
+    @classmethod
+    def announce_message(cls, items: List[Dict[str, Any]]) -> str:
+        """维护公告推送文本"""
+        return cls.news_message(items, "维护推送")
+
+    async def fetch_raw(self, path: str, params: Dict[str, Any], auth: bool = False) -> Any:
+        """推送源直接读取接口原始数据，失败时返回 None"""
+        if auth:
+            params = {**params, "token": self.token}
+        data = await self._base_request(path, params)
+        # 全服状态列表顺带刷新区服注册表，与区服指令一致
+        if path == "/server/status/check" and not params.get("server") and data:
+            self.server_registry.update(data)
+        return data
+
     async def kaifu(self, server: str) -> Dict[str, Any]:
         """开服状态查询"""
         async def processor(data: Any, return_data: Dict[str, Any]) -> None:   
-            if not data.get("status") == "维护" :
-                status = 1
-            else:
-                status = 0
-            
-            if status == 1:
-                status_str = f"{server}服务器已开服，快冲，快冲！"
-                status_bool = True
-            else:
-                status_str = f"{server}服务器当前维护中，等会再来吧！"
-                status_bool = False
-
+            status_bool = not data.get("status") == "维护"
             return_data["status"] = status_bool
-            return_data["data"] = status_str
+            return_data["data"] = self.kaifu_message(server, status_bool)
 
         return await self._request_api(
             path="/server/status/check",
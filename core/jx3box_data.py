@@ -1,4 +1,4 @@
-import json
+import asyncio
 import html
 import re
 from datetime import datetime, timedelta
@@ -12,6 +12,12 @@ import astrbot.api.message_components as Comp
 
 from .request import APIClient
 from .sqlite import AsyncSQLiteDB
+from .serendipity_catalog import SerendipityCatalog
+from .trade_index import TradeItemIndex
+from .catalog import AchievementMenuTable, AchievementPointTable
+from .achievement_progress import AchievementProgressEngine, ProgressStats
+from .alias_table import AliasTable
+from .cache_codec import DecodeMemo, decode, encode
 from .fun_basic import load_template,gold_to_parts,week_to_num,compare_date_str,format_time,format_remaining
 
 ACHIEVEMENT_CHOICES = [
@@ -38,6 +44,12 @@ ACHIEVEMENT_CHOICES = [
 
 ACHIEVEMENT_CHOICE_MAP = {index: (menu_id, title) for index, menu_id, title in ACHIEVEMENT_CHOICES}
 
+# 资历总览的汇总分组名
+ACHIEVEMENT_OVERVIEW = "overview"
+
+# 基础数据缓存的数据版本，缓存结构变化时递增
+ACHIEVEMENT_CACHE_SCHEMA = 1
+
 JX3BOX_API_BASE_URLS = {
     "node": "https://node.jx3box.com",
     "next2": "https://next2.jx3box.com",
@@ -54,6 +66,20 @@ class JX3BOXService:
         # 引用sqlite
         self._sql_db = sqlite
         self._cache_db = cache_sqlite or sqlite
+        # 心法别名表，插件启动时载入内存
+        self.kungfu_aliases = AliasTable(self._sql_db, "kungfu", ("name", "name1", "name2", "name3", "name4", "name5"))
+        # 奇遇目录本地索引
+        self.serendipity_catalog = SerendipityCatalog(self._cache_db)
+        # 交易行物品库检索索引，物品库刷新时重建
+        self.trade_index = TradeItemIndex()
+        self._trade_index_expires: Optional[datetime] = None
+        # 资历菜单与点数的列式常驻副本，基础数据缓存刷新时重建
+        self.achievement_menus: Optional[AchievementMenuTable] = None
+        self.achievement_points: Optional[AchievementPointTable] = None
+        self.achievement_engine: Optional[AchievementProgressEngine] = None
+        # 基础数据缓存的解码结果：键 -> (更新时间, 数据)，写入时同步更新
+        self._achievement_memo = DecodeMemo()
+        self._achievement_catalog_expires: Optional[datetime] = None
 
         self.token = self._config.get("jx3api_token", "")
 
@@ -115,8 +141,8 @@ class JX3BOXService:
             return None
 
 
-    async def machangxiaoxi(self, srever: str, type: str, subtype: str) -> Dict[str, Any]:
-        """马场消息 """
+    async def machangxiaoxi(self, server: str, type: str, subtype: str, size: int = 1) -> Dict[str, Any]:
+        """马场消息，items 为最近 size 条 (id, 文本)，按时间倒序"""
         return_data = self._init_return_data()
 
         data = await self._base_request(
@@ -125,58 +151,121 @@ class JX3BOXService:
             "GET",
             params={
                 "pageIndex":1,
-                "pageSize":1,
-                "server":srever,
+                "pageSize":size,
+                "server":server,
                 "type":type,
                 "subtype":subtype,
             },
         )
 
-        if data == None:
+        if data == None or not data.get("list"):
             return None
         else:
-            data_list = data["list"][0]
-            return_data["status"] = data_list["id"]
-            return_data["data"] = (
-                f"区服：{srever}\n"
-                f"{data_list.get('content')}\n"
-                f"时间：{data_list.get('created_at')}\n"
-            )
+            items = [
+                (
+                    row["id"],
+                    f"区服：{server}\n"
+                    f"{row.get('content')}\n"
+                    f"时间：{row.get('created_at')}\n"
+                )
+                for row in data["list"]
+            ]
+            return_data["status"] = items[0][0]
+            return_data["data"] = items[0][1]
+            return_data["items"] = items
             return_data["code"] = 200
 
             return return_data
 
 
+    async def refresh_serendipity_catalog(self, force: bool = False) -> int:
+        """分页拉取 JX3BOX 奇遇列表刷新本地目录，未过期时跳过"""
+        if not force and not self.serendipity_catalog.stale:
+            return 0
+
+        per = 200
+        total = 0
+        complete = True
+        for page in range(1, 21):
+            data = await self._base_request(
+                "node",
+                "/serendipities",
+                params={"per": per, "page": page},
+                out="list",
+            )
+            if data is None:
+                complete = False
+                break
+            if not data:
+                break
+            total += await self.serendipity_catalog.upsert(data)
+            if len(data) < per:
+                break
+
+        # 只有完整拉取才推迟下一次刷新，失败时下个周期继续重试
+        if not complete or total == 0:
+            logger.warning(f"奇遇目录刷新未完成，已写入 {total} 条")
+            return total
+        await self.serendipity_catalog.mark_refreshed()
+        logger.info(f"奇遇目录刷新完成，共 {total} 条")
+        return total
+
+
+    async def _serendipity_entry(self, name: str) -> Optional[Dict[str, Any]]:
+        """本地目录解析奇遇名称，缺少 dwID 时按名称向 JX3BOX 补查一次"""
+        catalog = self.serendipity_catalog
+        entry = catalog.resolve(name)
+        if entry and entry["dw_id"] is not None:
+            return entry
+
+        query = entry["name"] if entry else name
+        data = await self._base_request(
+            "node",
+            "/serendipities",
+            params={"name": query},
+            out="list",
+        )
+        if not data:
+            return None
 
+        await catalog.upsert(data)
+        # 优先取名称完全一致的条目
+        for item in data:
+            row = catalog.parse_node_item(item)
+            if row and row["name"] == query:
+                return catalog.get(row["name"])
+        row = catalog.parse_node_item(data[0])
+        return catalog.get(row["name"]) if row else None
 
 
     async def qiyugonglue(self, name: str) -> Dict[str, Any]:
         """奇遇攻略"""
         return_data = self._init_return_data()
         
-        # 1. 调用基础请求
-        data = await self._base_request(
-            "node",
-            "/serendipities",
-            params={"name": name},
-            out="list",
-        )
-        if not data:
+        # 1. 本地目录解析名称与 dwID
+        entry = await self._serendipity_entry(name)
+        if not entry:
             return_data["msg"] = "未找到该奇遇"
             return return_data
         
-        # 提取dwID
-        dwID = data[0]["dwID"]
-        data1 = await self._base_request(
-            "node",
-            f"/serendipity/{dwID}/achievement",
-            out=None,
-        )
+        # 2. dwID 对应的成就 ID 首次查询后缓存
+        achievement_id = entry["achievement_id"]
+        if achievement_id is None:
+            data1 = await self._base_request(
+                "node",
+                f"/serendipity/{entry['dw_id']}/achievement",
+                out=None,
+            )
+            if not data1 or not data1.get("achievement_id"):
+                return_data["msg"] = "获取奇遇成就信息异常"
+                return return_data
+            achievement_id = data1["achievement_id"]
+            await self.serendipity_catalog.set_achievement(entry["name"], achievement_id)
 
-        # 获取奇遇攻略
+        # 3. 获取奇遇攻略
         data2 = await self._base_request(
             "cms",
-            f"/api/cms/wiki/post/type/achievement/source/{data1['achievement_id']}",
+            f"/api/cms/wiki/post/type/achievement/source/{achievement_id}",
         )
         if not data2:
             return_data["msg"] = "获取攻略数据异常"
@@ -201,12 +290,8 @@ class JX3BOXService:
         """配装"""
         return_data = self._init_return_data()
         
-        # 数据库查询数据
-        result = await self._sql_db.select_one(
-                "kungfu",
-                "name=? OR name1=? OR name2=? OR name3=? OR name4=? OR name5=?",
-                (name, name, name, name, name, name)
-            )
+        # 内存别名表查询心法
+        result = await self.kungfu_aliases.lookup(name)
         logger.debug(result)
         if result is None:
             return_data["msg"] = "未找到该心法"
@@ -265,12 +350,8 @@ class JX3BOXService:
         """宏 心法"""
         return_data = self._init_return_data()
         
-        # 数据库查询数据
-        result = await self._sql_db.select_one(
-                "kungfu",
-                "name=? OR name1=? OR name2=? OR name3=? OR name4=? OR name5=?",
-                (name, name, name, name, name, name)
-            )
+        # 内存别名表查询心法
+        result = await self.kungfu_aliases.lookup(name)
 
         if result is None:
             return_data["msg"] = "未找到该心法"
@@ -364,7 +445,32 @@ class JX3BOXService:
 
 
     async def _load_achievement_cache(self, key: str) -> tuple[Optional[Any], bool]:
-        """读取资历基础数据缓存，返回数据和是否已过期"""
+        """读取资历基础数据缓存，返回数据和是否已过期。
+
+        先只读更新时间，与进程内解码结果的版本戳（更新时间 + 数据版本）一致时直接复用，
+        否则读取内容并解码一次。
+        """
+        try:
+            stamp_row = await self._cache_db.fetch_one("SELECT updated_at FROM achievement_cache WHERE key=?", (key,))
+        except Exception as e:
+            logger.error(f"读取资历缓存失败: {e}")
+            return None, True
+
+        if not stamp_row:
+            self._achievement_memo.pop(key)
+            return None, True
+
+        try:
+            updated_at = datetime.strptime(stamp_row.get("updated_at", ""), "%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError) as e:
+            logger.error(f"解析资历缓存失败: {e}")
+            return None, True
+
+        expired = datetime.now() - updated_at > timedelta(days=30)
+        payload = self._achievement_memo.get(key, (stamp_row["updated_at"], ACHIEVEMENT_CACHE_SCHEMA))
+        if payload is not None:
+            return payload, expired
+
         try:
             row = await self._cache_db.select_one("achievement_cache", "key=?", (key,))
         except Exception as e:
@@ -375,18 +481,37 @@ class JX3BOXService:
             return None, True
 
         try:
-            payload = json.loads(row.get("content", "{}"))
+            content = row.get("content", "{}")
+            loop = asyncio.get_running_loop()
+            payload = await loop.run_in_executor(None, decode, content, ACHIEVEMENT_CACHE_SCHEMA)
             updated_at = datetime.strptime(row.get("updated_at", ""), "%Y-%m-%d %H:%M:%S")
-            expired = datetime.now() - updated_at > timedelta(days=30)
-            return payload, expired
         except Exception as e:
             logger.error(f"解析资历缓存失败: {e}")
             return None, True
 
+        self._achievement_memo.put(key, (row["updated_at"], ACHIEVEMENT_CACHE_SCHEMA), payload)
+        if isinstance(content, str):
+            # 旧版 JSON 文本缓存转存为压缩二进制，保留原更新时间
+            await self._save_achievement_cache(key, payload, updated_at)
+        return payload, datetime.now() - updated_at > timedelta(days=30)
 
-    async def _save_achievement_cache(self, key: str, payload: Any):
-        """写入资历基础数据缓存"""
+
+    async def _achievement_cache_expires(self, key: str) -> datetime:
+        """资历基础数据缓存的过期时间，读取失败时视为已过期"""
+        try:
+            row = await self._cache_db.fetch_one("SELECT updated_at FROM achievement_cache WHERE key=?", (key,))
+            updated_at = datetime.strptime(row["updated_at"], "%Y-%m-%d %H:%M:%S")
+        except Exception:
+            return datetime.now()
+        return updated_at + timedelta(days=30)
+
+
+    async def _save_achievement_cache(self, key: str, payload: Any, updated_at: Optional[datetime] = None):
+        """写入资历基础数据缓存，内容编码为压缩二进制"""
+        updated_at = (updated_at or datetime.now()).replace(microsecond=0)
         try:
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(None, encode, payload, ACHIEVEMENT_CACHE_SCHEMA)
             await self._cache_db.execute(
                 """
                 INSERT INTO achievement_cache (key, content, updated_at)
@@ -397,12 +522,14 @@ class JX3BOXService:
                 """,
                 (
                     key,
-                    json.dumps(payload, ensure_ascii=False),
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    content,
+                    updated_at.strftime("%Y-%m-%d %H:%M:%S"),
                 ),
             )
         except Exception as e:
             logger.error(f"写入资历缓存失败: {e}")
+            return
+        self._achievement_memo.put(key, (updated_at.strftime("%Y-%m-%d %H:%M:%S"), ACHIEVEMENT_CACHE_SCHEMA), payload)
 
 
     async def _get_achievement_base_data(self, cache_key: str, api_path: str) -> Optional[Dict[str, Any]]:
@@ -447,53 +574,23 @@ class JX3BOXService:
         return None
 
 
-    def _flatten_trade_items(self, groups: List[Dict[str, Any]]) -> list[Dict[str, Any]]:
-        """从交易行物品分组中提取可查询物品"""
-        items = []
-        for group in groups:
-            if not isinstance(group, dict):
-                continue
-            for item in group.get("items", []) or []:
-                if not isinstance(item, dict):
-                    continue
-                item_id = item.get("item_id")
-                label = item.get("label")
-                if not item_id or not label:
-                    continue
-                items.append(
-                    {
-                        "item_id": str(item_id),
-                        "label": str(label),
-                        "icon": str(item.get("icon") or ""),
-                    }
-                )
-        return items
-
-
-    def _match_trade_items(self, items: list[Dict[str, Any]], keyword: str, limit: int = 50) -> list[Dict[str, Any]]:
-        """按物品名模糊匹配交易行物品"""
-        keyword = (keyword or "").strip()
-        if not keyword:
-            return []
-
-        matched = []
-        seen = set()
-        for item in items:
-            label = item.get("label", "")
-            item_id = item.get("item_id", "")
-            if keyword not in label or item_id in seen:
-                continue
-            seen.add(item_id)
-            if label == keyword:
-                rank = 0
-            elif label.startswith(keyword):
-                rank = 1
-            else:
-                rank = 2
-            matched.append((rank, len(label), label, item))
+    async def _get_trade_index(self) -> Optional[TradeItemIndex]:
+        """获取交易行物品索引，物品库缓存过期后才重新加载并重建"""
+        if len(self.trade_index) and self._trade_index_expires and datetime.now() < self._trade_index_expires:
+            return self.trade_index
+
+        item_groups = await self._get_trade_item_groups()
+        if not item_groups:
+            return self.trade_index if len(self.trade_index) else None
 
-        matched.sort(key=lambda row: (row[0], row[1], row[2]))
-        return [row[3] for row in matched[:limit]]
+        self.trade_index.build(item_groups)
+        # 与物品库缓存同时过期；接口失败使用旧缓存时一小时后重试
+        self._trade_index_expires = max(
+            await self._achievement_cache_expires("trade_item_groups"),
+            datetime.now() + timedelta(hours=1),
+        )
+        logger.debug(f"交易行物品索引已重建，共 {len(self.trade_index)} 条")
+        return self.trade_index
 
 
     def _flatten_achievement_ids(self, values: Any) -> list[int]:
@@ -513,39 +610,47 @@ class JX3BOXService:
         return result
 
 
-    def _category_achievement_ids(self, category: Dict[str, Any]) -> list[int]:
-        """提取分类及其子分类包含的资历 ID"""
-        ids = self._flatten_achievement_ids(category.get("achievements", []))
-        for child in category.get("children", []) or []:
-            if isinstance(child, dict):
-                ids.extend(self._flatten_achievement_ids(child.get("achievements", [])))
-        return ids
+    async def _get_achievement_catalog(self) -> bool:
+        """加载资历菜单与点数的列式副本，基础数据缓存过期后才重建"""
+        if self.achievement_menus and self._achievement_catalog_expires and datetime.now() < self._achievement_catalog_expires:
+            return True
 
+        menu_payload = await self._get_achievement_base_data(
+            "achievement_menus",
+            "/api/node/achievement/menus",
+        )
+        point_payload = await self._get_achievement_base_data(
+            "achievement_points",
+            "/api/node/achievement/points",
+        )
+        if not menu_payload or not point_payload:
+            return self.achievement_menus is not None
 
-    def _build_achievement_progress(
-        self,
-        name: str,
-        achievement_ids: list[int],
-        point_map: Dict[str, Any],
-        completed_ids: set[int],
-    ) -> Dict[str, Any]:
-        """按资历点数计算完成进度"""
-        unique_ids = set(achievement_ids)
-        total_points = 0
-        completed_points = 0
-        completed_count = 0
-
-        for achievement_id in unique_ids:
-            try:
-                point = int(point_map.get(str(achievement_id), 0) or 0)
-            except (TypeError, ValueError):
-                point = 0
-
-            total_points += point
-            if achievement_id in completed_ids:
-                completed_count += 1
-                completed_points += point
+        menus = menu_payload.get("menus", {})
+        points = point_payload.get("points", {})
+        if not isinstance(menus, dict) or not isinstance(points, dict):
+            return self.achievement_menus is not None
+
+        self.achievement_menus = AchievementMenuTable.from_menus(menus)
+        self.achievement_points = AchievementPointTable.from_points(points)
+        self.achievement_engine = AchievementProgressEngine(
+            self.achievement_menus,
+            self.achievement_points,
+            groups={ACHIEVEMENT_OVERVIEW: [menu_id for _, menu_id, _ in ACHIEVEMENT_CHOICES[1:]]},
+        )
+        self._achievement_catalog_expires = max(
+            min(
+                await self._achievement_cache_expires("achievement_menus"),
+                await self._achievement_cache_expires("achievement_points"),
+            ),
+            datetime.now() + timedelta(hours=1),
+        )
+        return True
 
+
+    def _build_achievement_progress(self, name: str, stats: ProgressStats) -> Dict[str, Any]:
+        """整理单个分类的资历进度"""
+        total_points, completed_points, achievement_count, completed_count = stats
         percent = round(completed_points / total_points * 100, 2) if total_points else 0
 
         return {
@@ -554,19 +659,15 @@ class JX3BOXService:
             "completed_points": completed_points,
             "percent": percent,
             "percent_text": f"{percent:.2f}%",
-            "achievement_count": len(unique_ids),
+            "achievement_count": achievement_count,
             "completed_count": completed_count,
         }
 
 
-    async def zili(self, name: str, server: str, choice: int) -> Dict[str, Any]:
-        """角色资历"""
+    async def zili_views(self, name: str, server: str) -> Dict[str, Any]:
+        """角色资历：一次请求并计算全部 19 个视图，data["views"] 按序号保存，分类缺失时为 None"""
         return_data = self._init_return_data()
 
-        if choice not in ACHIEVEMENT_CHOICE_MAP:
-            return_data["msg"] = "无效序号，结束会话"
-            return return_data
-
         role_params = {"server": server, "name": name, "token": self.token}
         api_url = "https://www.jx3api.com/role/detail"
         role_data: Optional[Dict[str, Any]] = await self._api.get(api_url, params=role_params, out_key="data")
@@ -600,55 +701,10 @@ class JX3BOXService:
         elif isinstance(achievements, list):
             completed_ids = set(self._flatten_achievement_ids(achievements))
 
-        menu_payload = await self._get_achievement_base_data(
-            "achievement_menus",
-            "/api/node/achievement/menus",
-        )
-        point_payload = await self._get_achievement_base_data(
-            "achievement_points",
-            "/api/node/achievement/points",
-        )
-        if not menu_payload or not point_payload:
+        if not await self._get_achievement_catalog():
             return_data["msg"] = "基础资历数据获取失败"
             return return_data
 
-        menus = menu_payload.get("menus", {})
-        points = point_payload.get("points", {})
-        if not isinstance(menus, dict) or not isinstance(points, dict):
-            return_data["msg"] = "基础资历数据格式异常"
-            return return_data
-
-        selected_menu_id, selected_title = ACHIEVEMENT_CHOICE_MAP[choice]
-        items = []
-
-        if choice == 0:
-            total_ids = []
-            for _, menu_id, title in ACHIEVEMENT_CHOICES[1:]:
-                category = menus.get(str(menu_id), {})
-                if not isinstance(category, dict):
-                    continue
-                category_ids = self._category_achievement_ids(category)
-                total_ids.extend(category_ids)
-                items.append(
-                    self._build_achievement_progress(title, category_ids, points, completed_ids)
-                )
-            summary = self._build_achievement_progress(selected_title, total_ids, points, completed_ids)
-        else:
-            category = menus.get(str(selected_menu_id), {})
-            if not isinstance(category, dict) or not category:
-                return_data["msg"] = "未找到该资历分类"
-                return return_data
-
-            category_ids = self._category_achievement_ids(category)
-            summary = self._build_achievement_progress(selected_title, category_ids, points, completed_ids)
-            for child in category.get("children", []) or []:
-                if not isinstance(child, dict):
-                    continue
-                child_ids = self._flatten_achievement_ids(child.get("achievements", []))
-                items.append(
-                    self._build_achievement_progress(child.get("name", "未命名"), child_ids, points, completed_ids)
-                )
-
         try:
             return_data["temp"] = await load_template("zili.html")
         except FileNotFoundError as e:
@@ -656,10 +712,10 @@ class JX3BOXService:
             return_data["msg"] = "系统错误：模板文件不存在"
             return return_data
 
-        return_data["data"] = {
-            "title": selected_title,
-            "summary": summary,
-            "items": items,
+        menus = self.achievement_menus
+        # 一次计算全部分类、子分类和总览的进度
+        progress = self.achievement_engine.evaluate(completed_ids)
+        role_info = {
             "role_name": role_data.get("roleName", name),
             "server": role_data.get("serverName", server),
             "zone": role_data.get("zoneName", ""),
@@ -669,22 +725,76 @@ class JX3BOXService:
             "updated_at": achievement_data.get("updated_at", ""),
             "update_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         }
+
+        views: Dict[int, Optional[Dict[str, Any]]] = {}
+        for choice, menu_id, title in ACHIEVEMENT_CHOICES:
+            items = []
+            if choice == 0:
+                for _, child_menu_id, child_title in ACHIEVEMENT_CHOICES[1:]:
+                    row = menus.top_row(child_menu_id)
+                    if row is None:
+                        continue
+                    items.append(self._build_achievement_progress(child_title, progress[row]))
+                summary = self._build_achievement_progress(title, progress[ACHIEVEMENT_OVERVIEW])
+            else:
+                row = menus.top_row(menu_id)
+                if row is None:
+                    views[choice] = None
+                    continue
+
+                summary = self._build_achievement_progress(title, progress[row])
+                for child in menus.children(row):
+                    items.append(self._build_achievement_progress(menus.name(child), progress[child]))
+
+            views[choice] = {"title": title, "summary": summary, "items": items, **role_info}
+
+        return_data["data"] = {"views": views}
         return_data["code"] = 200
 
         return return_data
 
 
+    def select_zili_view(self, views_data: Dict[str, Any], choice: int) -> Dict[str, Any]:
+        """从 zili_views 的结果中取出指定序号的视图"""
+        if views_data["code"] != 200:
+            return views_data
+
+        return_data = self._init_return_data()
+        if choice not in ACHIEVEMENT_CHOICE_MAP:
+            return_data["msg"] = "无效序号，结束会话"
+            return return_data
+
+        view = views_data["data"]["views"].get(choice)
+        if view is None:
+            return_data["msg"] = "未找到该资历分类"
+            return return_data
+
+        return_data["temp"] = views_data["temp"]
+        return_data["data"] = dict(view)
+        return_data["code"] = 200
+        return return_data
+
+
+    async def zili(self, name: str, server: str, choice: int) -> Dict[str, Any]:
+        """角色资历"""
+        if choice not in ACHIEVEMENT_CHOICE_MAP:
+            return_data = self._init_return_data()
+            return_data["msg"] = "无效序号，结束会话"
+            return return_data
+
+        return self.select_zili_view(await self.zili_views(name, server), choice)
+
+
     async def jiaoyihang(self, name: str , server: str) -> Dict[str, Any]:
         """区服交易行"""
         return_data = self._init_return_data()
 
-        item_groups = await self._get_trade_item_groups()
-        if not item_groups:
+        trade_index = await self._get_trade_index()
+        if not trade_index:
             return_data["msg"] = "交易行基础物品数据获取失败"
             return return_data
 
-        trade_items = self._flatten_trade_items(item_groups)
-        matched_items = self._match_trade_items(trade_items, name, 50)
+        matched_items = trade_index.search(name, 50)
         if not matched_items:
             return_data["msg"] = "未找到匹配的交易行物品"
             return return_data
@@ -0,0 +1,118 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+from astrbot.api import logger
+
+from .sqlite import AsyncSQLiteDB
+from .search_index import NgramIndex, normalize_text, text_grams
+
+
+# 本地直接作答的条件：与题目完全一致，或查询足够长且片段覆盖率与 Dice 系数都足够高；
+# 其余情况先请求上游，本地结果只作兜底
+KEJU_LOCAL_MIN_LEN = 8
+KEJU_LOCAL_COVERAGE = 0.9
+KEJU_LOCAL_DICE = 0.85
+
+
+class KejuBank:
+    """科举题库本地镜像：SQLite 持久化，内存 n-gram 索引检索"""
+
+    def __init__(self, sqlite: AsyncSQLiteDB):
+        self._sql_db = sqlite
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._index = NgramIndex()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def load(self):
+        """从本地数据库加载全部题目并建立索引"""
+        try:
+            rows = await self._sql_db.select_all("keju_bank")
+        except Exception as e:
+            logger.error(f"加载科举题库失败: {e}")
+            return
+
+        self._items.clear()
+        self._index.clear()
+        for row in rows:
+            self._add_memory(row)
+        self.loaded = True
+        logger.info(f"科举题库已加载 {len(self._items)} 条")
+
+    def _add_memory(self, item: Dict[str, Any]):
+        try:
+            item_id = int(item["id"])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        question = str(item.get("question") or "")
+        self._items[item_id] = {
+            "id": item_id,
+            "question": question,
+            "answer": str(item.get("answer") or ""),
+        }
+        self._index.add(item_id, question)
+
+    async def upsert(self, items: List[Dict[str, Any]]):
+        """合并上游返回的题目，内容未变化的题目不重复写库"""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for item in items or []:
+            if not isinstance(item, dict) or not item.get("question"):
+                continue
+            try:
+                item_id = int(item.get("id"))
+            except (TypeError, ValueError):
+                continue
+
+            question = str(item.get("question") or "")
+            answer = str(item.get("answer") or "")
+            cached = self._items.get(item_id)
+            if cached and cached["question"] == question and cached["answer"] == answer:
+                continue
+
+            try:
+                await self._sql_db.execute(
+                    """
+                    INSERT INTO keju_bank (id, question, answer, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        question=excluded.question,
+                        answer=excluded.answer,
+                        updated_at=excluded.updated_at
+                    """,
+                    (item_id, question, answer, now),
+                )
+            except Exception as e:
+                logger.error(f"写入科举题库失败: {e}")
+                continue
+
+            self._add_memory({"id": item_id, "question": question, "answer": answer})
+
+    def answers(self, subject: str, item: Dict[str, Any]) -> bool:
+        """本地题目是否可以直接作答：完整或近似完整的题目，子串命中不算"""
+        query = normalize_text(subject)
+        question = normalize_text(item.get("question"))
+        if not query or not question:
+            return False
+        if query == question:
+            return True
+        if len(query) < KEJU_LOCAL_MIN_LEN:
+            return False
+
+        query_grams = text_grams(query, self._index.n)
+        question_grams = text_grams(question, self._index.n)
+        common = len(query_grams & question_grams)
+        coverage = common / len(query_grams)
+        dice = 2 * common / (len(query_grams) + len(question_grams))
+        return coverage >= KEJU_LOCAL_COVERAGE and dice >= KEJU_LOCAL_DICE
+
+    def search(self, subject: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """模糊检索题目，结果附带匹配得分"""
+        result = []
+        for item_id, score in self._index.search(subject, limit=limit, min_score=0.3):
+            item = dict(self._items[item_id])
+            item["score"] = score
+            result.append(item)
+        return result
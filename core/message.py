@@ -1,4 +1,6 @@
-from astrbot.core import html_renderer
+import asyncio
+from typing import Dict, Optional, Tuple
+
 from astrbot.api import logger
 from astrbot.api.event import AstrMessageEvent, MessageChain
 from astrbot.core.utils.session_waiter import (
@@ -11,6 +13,12 @@ from .aijx3_data import AIJX3Service
 from .jx3box_data import JX3BOXService
 from .async_task import AsyncTask
 from .bilei_data import BiLeidata
+from .render import render_html, IMAGE_OPTIONS
+from .render_cache import RenderCache
+from .outbound import OutboundQueue
+from .rate_limit import TokenBucket
+from .prefetch import PickCounter
+from .subscription import SERVER_TOPICS, SUBSCRIPTION_TOPICS
 
 
 class MessageBuilder:
@@ -45,7 +53,9 @@ class MessageBuilder:
                  jx3box: JX3BOXService,  
                  bilei: BiLeidata, 
                  jx3at: AsyncTask, 
-                 icons: dict[str, dict[str, str]]
+                 icons: dict[str, dict[str, str]],
+                 render_cache: RenderCache | None = None,
+                 outbound: OutboundQueue | None = None,
             ):
         self.server = server
         self.jx3api = jx3api
@@ -54,6 +64,23 @@ class MessageBuilder:
         self.bilei = bilei
         self.jx3at = jx3at
         self.icons = icons
+        # CMS 文章等少变内容的渲染结果缓存
+        self.render_cache = render_cache
+        # 出站队列，回复与推送共用平台与会话限速
+        self.outbound = outbound
+        # 资历会话的后台预计算任务：(会话, 用户) -> Task
+        self._zili_tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        # 两轮会话的选择热度与预取限流，预取每 2 秒补充 1 个令牌，最多突发 3 个
+        self.macro_picks = PickCounter()
+        self.prefetch_bucket = TokenBucket(rate=0.5, capacity=3)
+
+
+    async def reply(self, event: AstrMessageEvent, result):
+        """发送回复，配置出站队列时排队发送"""
+        if self.outbound is None:
+            await event.send(result)
+            return
+        await self.outbound.reply(event, result)
 
 
     async def html_render(
@@ -62,14 +89,11 @@ class MessageBuilder:
         data: dict,
         return_url=True,
         options: dict | None = None,
+        cache: bool = False,
     ) -> str:
-        """渲染 HTML"""
-        return await html_renderer.render_custom_template(
-            tmpl,
-            data,
-            return_url=return_url,
-            options=options,
-        )
+        """渲染 HTML，cache 为真时使用渲染缓存"""
+        render_cache = self.render_cache if cache else None
+        return await render_html(tmpl, data, return_url=return_url, options=options, cache=render_cache)
     
 
     def serverdefault(self,server) -> str:
@@ -78,41 +102,49 @@ class MessageBuilder:
             return self.server
         return server
 
+    def resolve_server(self, server: str) -> Optional[str]:
+        """归一化用户输入的服务器，注册表未加载时原样返回，无法识别时返回 None"""
+        registry = self.jx3api.server_registry
+        if server == "" or not registry.loaded:
+            return server
+        return registry.resolve(server)
+
+
+    async def kungfu_name(self, name: str) -> str:
+        """心法别名归一为正式名称，无法识别时原样返回"""
+        if not name:
+            return name
+        record = await self.jx3box.kungfu_aliases.lookup(name)
+        return record.get("name") or name if record else name
+
 
     async def plain_msg(self, event: AstrMessageEvent, action):
         """最终将数据整理成文本发送"""
         data= await action()
         try:
             if data["code"] == 200:
-                await event.send( event.plain_result(data["data"]))
+                await self.reply(event,  event.plain_result(data["data"]))
             else:
-                await event.send(event.plain_result(data["msg"])) 
+                await self.reply(event, event.plain_result(data["msg"])) 
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
-            await event.send(event.plain_result("猪脑过载，请稍后再试")) 
+            await self.reply(event, event.plain_result("猪脑过载，请稍后再试")) 
 
 
-    async def T2I_image_msg(self, event: AstrMessageEvent, action):
-        """最终将数据渲染成图片发送"""
+    async def T2I_image_msg(self, event: AstrMessageEvent, action, cache: bool = False):
+        """最终将数据渲染成图片发送，cache 用于内容少变的页面"""
         data = await action()
         try:
             if data["code"] == 200:
-                options = {
-                    "quality": 100,
-                    "device_scale_factor_level": "normal",
-                    "full_page": True,
-                    "omit_background": False,
-                    "type": "jpeg"
-                }
                 data["data"]["icons"] = self.icons
-                url = await self.html_render(data["temp"], data["data"], options=options)
-                await event.send(event.image_result(url)) 
+                url = await self.html_render(data["temp"], data["data"], options=IMAGE_OPTIONS, cache=cache)
+                await self.reply(event, event.image_result(url)) 
             else:
-                await event.send(event.plain_result(data["msg"])) 
+                await self.reply(event, event.plain_result(data["msg"])) 
 
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
-            await event.send(event.plain_result("猪脑过载，请稍后再试")) 
+            await self.reply(event, event.plain_result("猪脑过载，请稍后再试")) 
 
 
     async def image_msg(self, event: AstrMessageEvent, action):
@@ -120,13 +152,13 @@ class MessageBuilder:
         data = await action()
         try:
             if data["code"] == 200:
-                await event.send(event.image_result(data["data"])) 
+                await self.reply(event, event.image_result(data["data"])) 
             else:
-                await event.send(event.plain_result(data["msg"])) 
+                await self.reply(event, event.plain_result(data["msg"])) 
 
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
-            await event.send(event.plain_result("猪脑过载，请稍后再试")) 
+            await self.reply(event, event.plain_result("猪脑过载，请稍后再试")) 
 
 
     async def plain_chain(self, event: AstrMessageEvent, action):
@@ -134,25 +166,57 @@ class MessageBuilder:
         data= await action()
         try:
             if data["code"] == 200:
-                await event.send(event.chain_result(data["data"]))
+                await self.reply(event, event.chain_result(data["data"]))
             else:
-                await event.send(event.plain_result(data["msg"])) 
+                await self.reply(event, event.plain_result(data["msg"])) 
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
-            await event.send(event.plain_result("猪脑过载，请稍后再试")) 
+            await self.reply(event, event.plain_result("猪脑过载，请稍后再试")) 
+
+
+    async def rank_msg(self, event: AstrMessageEvent, name: str, server: str):
+        """排行榜图片，优先发送定时预取的预渲染结果"""
+        path = self.jx3at.rank_sweep.get_image(name, server) if self.jx3at.rank_sweep else None
+        if path:
+            await self.reply(event, event.image_result(path))
+            return
+        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical(name, server))
+
+
+    async def _second_round(self, action2, key) -> Tuple[Dict, Optional[str]]:
+        """获取二轮数据并渲染图片，返回 (数据, 图片地址)"""
+        data1 = await action2(key)
+        url = None
+        if data1["code"] == 200 and data1["temp"] != "":
+            url = await self.html_render(data1["temp"], {}, options={}, cache=True)
+        return data1, url
+
+
+    def _prefetch_second_round(self, action2, candidates: list) -> Dict[int, asyncio.Task]:
+        """按选择热度预取并预渲染前 K 个候选，令牌不足时跳过，预取只做不等"""
+        tasks = {}
+        for position in self.macro_picks.choose(candidates):
+            if not self.prefetch_bucket.try_acquire():
+                break
+            tasks[position] = asyncio.create_task(self._second_round(action2, candidates[position - 1]))
+        return tasks
 
 
     async def handler_plain_image_msg(self, event: AstrMessageEvent, action1, action2):
         """两轮会话消息发送通用，先文本列表等反馈序号在发送图片"""
+        prefetched: Dict[int, asyncio.Task] = {}
         # 会话触发
         try:
             # 获取一轮数据
             data = await action1()
             if data["code"] == 200:
                 # 发送一轮消息
-                await event.send(event.plain_result(data["msg"])) 
+                await self.reply(event, event.plain_result(data["msg"])) 
                 # 获取触发用户ID
                 user_id = event.get_sender_id()
+                # 用户阅读列表期间预取热门候选
+                candidates = data["data"]["list"][1:]
+                prefetched = self._prefetch_second_round(action2, candidates)
 
                 # 二轮会话流程
                 @session_waiter(timeout=30)
@@ -164,25 +228,36 @@ class MessageBuilder:
                     msg = new_event.get_message_str().strip()
                     # 判断消息是否为数字
                     if not msg.isdigit():
-                        await new_event.send(
+                        await self.reply(new_event, 
                             MessageChain().message("输入异常，结束会话")
                         )
                         controller.stop()
                         return
                     # 判断数字是否在有效值内
                     num = int(msg)
-                    if num < 1 or num > data["data"]["num"]:
-                        await new_event.send(
+                    if num < 1 or num > len(candidates):
+                        await self.reply(new_event, 
                             MessageChain().message("无效序号，结束会话")
                         )
                         controller.stop()
                         return
+                    self.macro_picks.record(num, candidates[num - 1])
                     
-                    # 获取二轮数据
+                    # 获取二轮数据，优先使用预取结果
                     try:
-                        data1 = await action2(data["data"]["list"][num])
+                        task = prefetched.pop(num, None)
+                        result = None
+                        if task is not None:
+                            try:
+                                result = await task
+                            except Exception as e:
+                                logger.debug(f"预取结果不可用，重新获取: {e}")
+                        if result is None or result[0]["code"] != 200:
+                            result = await self._second_round(action2, candidates[num - 1])
+
+                        data1, url = result
                         if data1["code"] != 200:
-                            await new_event.send(
+                            await self.reply(new_event, 
                                 MessageChain().message("获取详细数据失败")
                             )
                             controller.stop()
@@ -192,14 +267,13 @@ class MessageBuilder:
                         chain = MessageChain()
                         msg_text = data1["data"]
                         chain.message(msg_text)
-                        if data1["temp"] != "":
-                            url = await self.html_render(data1["temp"], {}, options={})
+                        if url:
                             chain.url_image(url)
-                        await new_event.send(chain)
+                        await self.reply(new_event, chain)
 
                     except Exception as e:
                         logger.error(f"功能函数执行错误: {e}")
-                        await new_event.send(
+                        await self.reply(new_event, 
                             MessageChain().message("猪脑过载，请稍后再试")
                         )
 
@@ -209,24 +283,44 @@ class MessageBuilder:
                 try:
                     await macro_select_waiter(event)  
                 except TimeoutError:
-                    await event.send(event.plain_result("选择超时，已结束会话")) 
+                    await self.reply(event, event.plain_result("选择超时，已结束会话")) 
                 except Exception:
                     logger.error("选择发生异常", exc_info=True)
 
             else:
-                await event.send(event.plain_result(f"未搜索到相关内容")) 
+                await self.reply(event, event.plain_result(f"未搜索到相关内容")) 
                 return
                 
         except Exception as e:
             logger.error(f"功能函数执行错误: {e}")
-            await event.send(event.plain_result("猪脑过载，请稍后再试"))
+            await self.reply(event, event.plain_result("猪脑过载，请稍后再试"))
+        finally:
+            # 会话结束后取消未用上的预取
+            for task in prefetched.values():
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception():
+                    logger.debug(f"预取失败: {task.exception()}")
 
 
     async def handler_zili_msg(self, event: AstrMessageEvent, name: str, server: str):
-        """资历查询专用两轮会话，第一轮文本菜单，第二轮图片"""
+        """资历查询专用两轮会话，第一轮文本菜单，第二轮图片。
+
+        发送菜单的同时在后台查询角色并计算全部视图，用户选择后直接取结果渲染；
+        会话结束或超时时取消未完成的预计算。
+        """
+        task = None
+        user_id = event.get_sender_id()
         try:
-            await event.send(event.plain_result(self.ZILI_MENU_TEXT))
-            user_id = event.get_sender_id()
+            await self.reply(event, event.plain_result(self.ZILI_MENU_TEXT))
+
+            # 同一用户重复发起时取消上一轮预计算
+            key = (event.unified_msg_origin, user_id)
+            previous = self._zili_tasks.pop(key, None)
+            if previous and not previous.done():
+                previous.cancel()
+            task = asyncio.create_task(self.jx3box.zili_views(name, server))
+            self._zili_tasks[key] = task
 
             @session_waiter(timeout=30)
             async def zili_select_waiter(controller: SessionController, new_event: AstrMessageEvent):
@@ -235,49 +329,61 @@ class MessageBuilder:
 
                 msg = new_event.get_message_str().strip()
                 if not msg.isdigit():
-                    await new_event.send(MessageChain().message("输入异常，结束会话"))
+                    await self.reply(new_event, MessageChain().message("输入异常，结束会话"))
                     controller.stop()
                     return
 
                 choice = int(msg)
                 if choice < 0 or choice > 18:
-                    await new_event.send(MessageChain().message("无效序号，结束会话"))
+                    await self.reply(new_event, MessageChain().message("无效序号，结束会话"))
                     controller.stop()
                     return
 
                 try:
-                    data = await self.jx3box.zili(name, server, choice)
+                    try:
+                        views = await task
+                    except asyncio.CancelledError:
+                        # 预计算被同一用户的新请求取消时结束本轮会话，其余取消照常传递
+                        if self._zili_tasks.get(key) is task:
+                            raise
+                        await self.reply(new_event, MessageChain().message("已有新的资历查询，本次会话结束"))
+                        controller.stop()
+                        return
+
+                    data = self.jx3box.select_zili_view(views, choice)
                     if data["code"] != 200:
-                        await new_event.send(MessageChain().message(data.get("msg", "获取资历数据失败")))
+                        await self.reply(new_event, MessageChain().message(data.get("msg", "获取资历数据失败")))
                         controller.stop()
                         return
 
-                    options = {
-                        "quality": 100,
-                        "device_scale_factor_level": "normal",
-                        "full_page": True,
-                        "omit_background": False,
-                        "type": "jpeg"
-                    }
                     data["data"]["icons"] = self.icons
-                    url = await self.html_render(data["temp"], data["data"], options=options)
-                    await new_event.send(new_event.image_result(url))
+                    url = await self.html_render(data["temp"], data["data"], options=IMAGE_OPTIONS)
+                    await self.reply(new_event, new_event.image_result(url))
                 except Exception as e:
                     logger.error(f"资历查询执行错误: {e}")
-                    await new_event.send(MessageChain().message("猪脑过载，请稍后再试"))
+                    await self.reply(new_event, MessageChain().message("猪脑过载，请稍后再试"))
 
                 controller.stop()
 
             try:
                 await zili_select_waiter(event)
             except TimeoutError:
-                await event.send(event.plain_result("选择超时，已结束会话"))
+                await self.reply(event, event.plain_result("选择超时，已结束会话"))
             except Exception:
                 logger.error("资历选择发生异常", exc_info=True)
 
         except Exception as e:
             logger.error(f"资历会话执行错误: {e}")
-            await event.send(event.plain_result("猪脑过载，请稍后再试"))
+            await self.reply(event, event.plain_result("猪脑过载，请稍后再试"))
+        finally:
+            if task is not None:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception():
+                    logger.debug(f"资历预计算失败: {task.exception()}")
+                key = (event.unified_msg_origin, user_id)
+                if self._zili_tasks.get(key) is task:
+                    self._zili_tasks.pop(key, None)
 
 
     async def  helps(self, event: AstrMessageEvent):
@@ -331,13 +437,20 @@ class MessageBuilder:
         """ 烟花 服务器 角色"""
         return await self.T2I_image_msg(event, lambda: self.jx3api.yanhuachaxun( self.serverdefault(server),name))
 
+    async def _horse_query(self, action):
+        """刷马、马场查询结果中的预告时间同步给推送任务"""
+        data = await action()
+        if data["code"] == 200:
+            self.jx3at.note_horse_forecast(data["data"])
+        return data
+
     async def  shuma(self, event: AstrMessageEvent,server: str ): 
         """ 刷马 服务器"""
-        return await self.plain_msg(event, lambda: self.jx3api.shuma(server))
+        return await self.plain_msg(event, lambda: self._horse_query(lambda: self.jx3api.shuma(server)))
 
     async def  machang(self, event: AstrMessageEvent,server: str ): 
         """ 马场 服务器"""
-        return await self.plain_msg(event, lambda: self.jx3api.machang(server,1))
+        return await self.plain_msg(event, lambda: self._horse_query(lambda: self.jx3api.machang(server,1)))
 
     async def  zhanji(self, event: AstrMessageEvent, server: str ,name: str , mode:str = "33"):
         """ 战绩 服务器 角色 模式"""
@@ -353,71 +466,71 @@ class MessageBuilder:
 
     async def  mingshiwushiqiang(self, event: AstrMessageEvent, server: str):
         """ 名士五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("名士五十强", server))
+        return await self.rank_msg(event, "名士五十强", server)
 
     async def  laojianghuwushiqiang(self, event: AstrMessageEvent, server: str):
         """ 老江湖五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("老江湖五十强", server))
+        return await self.rank_msg(event, "老江湖五十强", server)
 
     async def  bingjiacangjiawushiqiang(self, event: AstrMessageEvent, server: str):
         """ 兵甲藏家五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("兵甲藏家五十强", server))
+        return await self.rank_msg(event, "兵甲藏家五十强", server)
 
     async def  mingshiwushiqiang_mentor(self, event: AstrMessageEvent, server: str):
         """ 名师五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("名师五十强", server))
+        return await self.rank_msg(event, "名师五十强", server)
 
     async def  zhengyingyingxiongwushiqiang(self, event: AstrMessageEvent, server: str):
         """ 阵营英雄五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("阵营英雄五十强", server))
+        return await self.rank_msg(event, "阵营英雄五十强", server)
 
     async def  xinhuoxiangchuanwushiqiang(self, event: AstrMessageEvent, server: str):
         """ 薪火相传五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("薪火相传五十强", server))
+        return await self.rank_msg(event, "薪火相传五十强", server)
 
     async def  luyuanguangjiyibaiqiang(self, event: AstrMessageEvent, server: str):
         """ 庐园广记一百强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("庐园广记一百强", server))
+        return await self.rank_msg(event, "庐园广记一百强", server)
 
     async def  haoqishenbingbaojiawushiqiang(self, event: AstrMessageEvent, server: str):
         """ 浩气神兵宝甲五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("浩气神兵宝甲五十强", server))
+        return await self.rank_msg(event, "浩气神兵宝甲五十强", server)
 
     async def  erenshenbingbaojiawushiqiang(self, event: AstrMessageEvent, server: str ):
         """ 恶人神兵宝甲五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("恶人神兵宝甲五十强", server))
+        return await self.rank_msg(event, "恶人神兵宝甲五十强", server)
 
     async def  haoqiaixinbanghuiwushiqiang(self, event: AstrMessageEvent, server: str ):
         """ 浩气爱心帮会五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("浩气爱心帮会五十强", server))
+        return await self.rank_msg(event, "浩气爱心帮会五十强", server)
 
     async def  erenaixinbanghuiwushiqiang(self, event: AstrMessageEvent, server: str ):
         """ 恶人爱心帮会五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("恶人爱心帮会五十强", server))
+        return await self.rank_msg(event, "恶人爱心帮会五十强", server)
 
     async def  saijierenwushiqiang(self, event: AstrMessageEvent, server: str):
         """ 赛季恶人五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("赛季恶人五十强", server))
+        return await self.rank_msg(event, "赛季恶人五十强", server)
 
     async def  saijihaoqiwushiqiang(self, event: AstrMessageEvent, server: str ):
         """ 赛季浩气五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("赛季浩气五十强", server))
+        return await self.rank_msg(event, "赛季浩气五十强", server)
 
     async def  shangzhouerenwushiqiang(self, event: AstrMessageEvent, server: str ):
         """ 上周恶人五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("上周恶人五十强", server))
+        return await self.rank_msg(event, "上周恶人五十强", server)
 
     async def  shangzhouhaoqiwushiqiang(self, event: AstrMessageEvent, server: str ):
         """ 上周浩气五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("上周浩气五十强", server))
+        return await self.rank_msg(event, "上周浩气五十强", server)
 
     async def  benzhouerenwushiqiang(self, event: AstrMessageEvent, server: str ):
         """ 本周恶人五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("本周恶人五十强", server))
+        return await self.rank_msg(event, "本周恶人五十强", server)
 
     async def  benzhouhaoqiwushiqiang(self, event: AstrMessageEvent, server: str ):
         """ 本周浩气五十强 服务器"""
-        return await self.T2I_image_msg(event, lambda: self.jx3api.rank_statistical("本周浩气五十强", server))
+        return await self.rank_msg(event, "本周浩气五十强", server)
 
     async def  shilianpaixing(self, event: AstrMessageEvent, server: str , name: str):
         """ 试炼排行 服务器 心法 """
@@ -439,6 +552,14 @@ class MessageBuilder:
         """ 物价 外观名称 服务器"""    
         return await self.T2I_image_msg(event, lambda: self.jx3api.wujia(Name, server)) 
 
+    async def  jinjiazoushi(self, event: AstrMessageEvent, server: str, span: str = "周"):
+        """ 金价走势 服务器 范围"""
+        return await self.image_msg(event, lambda: self.jx3api.jinjiazoushi(server, span))
+
+    async def  wujiazoushi(self, event: AstrMessageEvent, Name: str, server: str = "", span: str = "月"):
+        """ 物价走势 外观名称 服务器 范围"""
+        return await self.image_msg(event, lambda: self.jx3api.wujiazoushi(Name, server, span))
+
     async def  chengbeng(self, event: AstrMessageEvent, server: str ,Name: str ,source : int = 0):
         """ 成本 服务器 物品名称 """    
         return await self.T2I_image_msg(event, lambda: self.jx3api.chengbeng(Name, server,source)) 
@@ -489,11 +610,12 @@ class MessageBuilder:
 
     async def  qiyutongji(self, event: AstrMessageEvent,adventureName: str, server: str = "",limit: int = 20):
         """ 统计 奇遇 服务器 数量"""
+        adventureName = self.jx3box.serendipity_catalog.resolve_name(adventureName)
         return await self.T2I_image_msg(event, lambda: self.jx3api.qiyutongji(adventureName,server,limit))
 
     async def  qiyugonglue(self, event: AstrMessageEvent,name: str):
         """ 攻略 奇遇"""
-        return await self.T2I_image_msg(event, lambda: self.jx3box.qiyugonglue(name))
+        return await self.T2I_image_msg(event, lambda: self.jx3box.qiyugonglue(name), cache=True)
 
     async def  jingnai(self, event: AstrMessageEvent, server: str, name: str):
         """ 精耐 服务器 角色 """
@@ -513,6 +635,7 @@ class MessageBuilder:
 
     async def  zhenyan(self, event: AstrMessageEvent, name: str):
         """ 阵眼 心法"""
+        name = await self.kungfu_name(name)
         return await self.plain_msg(event, lambda: self.jx3api.zhenyan(name))
 
     async def  peizhuang(self, event: AstrMessageEvent,name: str, tags: str = ""):
@@ -525,10 +648,12 @@ class MessageBuilder:
 
     async def  jineng(self, event: AstrMessageEvent, name: str):
         """ 技能 心法"""
+        name = await self.kungfu_name(name)
         return await self.T2I_image_msg(event, lambda: self.jx3api.jineng(name,0))
 
     async def  qixue(self, event: AstrMessageEvent, name: str):
         """ 奇穴 心法"""
+        name = await self.kungfu_name(name)
         return await self.T2I_image_msg(event, lambda: self.jx3api.qixue(name,0))
 
     async def  liaotian(self, event: AstrMessageEvent, server:str, name: str, limit:int = 20, page:int = 1):
@@ -541,6 +666,7 @@ class MessageBuilder:
 
     async def  xiaoyao(self, event: AstrMessageEvent, name:str = ""):
         """ 小药 心法"""
+        name = await self.kungfu_name(name)
         return await self.T2I_image_msg(event, lambda: self.jx3api.xiaoyao(name))
 
     async def  pianzhi(self, event: AstrMessageEvent, uid: str, server:str = ""):
@@ -701,19 +827,69 @@ class MessageBuilder:
     async def  kaifhujiank(self, event: AstrMessageEvent):
         """ 开服监控"""     
         return_msg = await self.jx3at.get_task_info("kfts")
-        await event.send(event.plain_result(return_msg)) 
+        await self.reply(event, event.plain_result(return_msg)) 
 
     async def  xinwenzhixun(self, event: AstrMessageEvent):
         """ 新闻推送"""     
         return_msg = await self.jx3at.get_task_info("xwts")
-        await event.send(event.plain_result(return_msg)) 
+        await self.reply(event, event.plain_result(return_msg)) 
 
     async def  shuamamsg(self, event: AstrMessageEvent):
         """ 刷马推送"""     
         return_msg = await self.jx3at.get_task_info("smts")
-        await event.send(event.plain_result(return_msg)) 
+        await self.reply(event, event.plain_result(return_msg)) 
 
     async def  chitusg(self, event: AstrMessageEvent):
         """ 赤兔推送"""     
         return_msg = await self.jx3at.get_task_info("ctts")
-        await event.send(event.plain_result(return_msg)) 
+        await self.reply(event, event.plain_result(return_msg)) 
+
+    async def  weihutuisong(self, event: AstrMessageEvent):
+        """ 维护推送"""     
+        return_msg = await self.jx3at.get_task_info("whts")
+        await self.reply(event, event.plain_result(return_msg)) 
+
+    async def  guanaituisong(self, event: AstrMessageEvent):
+        """ 关隘推送"""     
+        return_msg = await self.jx3at.get_task_info("gats")
+        await self.reply(event, event.plain_result(return_msg)) 
+
+    async def  dilutuisong(self, event: AstrMessageEvent):
+        """ 的卢推送"""     
+        return_msg = await self.jx3at.get_task_info("dlts")
+        await self.reply(event, event.plain_result(return_msg)) 
+
+    async def  zhuetuisong(self, event: AstrMessageEvent):
+        """ 诛恶推送"""     
+        return_msg = await self.jx3at.get_task_info("zets")
+        await self.reply(event, event.plain_result(return_msg)) 
+
+
+    def _subscription_target(self, topic: str, server: str):
+        """订阅指令参数：返回 (主题键, 服务器)，主题无效时主题键为 None"""
+        key = self.jx3at.subscriptions.topic_key(topic)
+        if key is None:
+            return None, server
+        if key not in SERVER_TOPICS:
+            return key, ""
+        return key, self.serverdefault(server)
+
+    async def dingyue(self, event: AstrMessageEvent, topic: str, server: str = ""):
+        """订阅 主题 服务器"""
+        key, server = self._subscription_target(topic, server)
+        if key is None:
+            await self.reply(event, event.plain_result(f"可订阅：{'、'.join(SUBSCRIPTION_TOPICS)}"))
+            return
+        return await self.plain_msg(event, lambda: self.jx3at.subscriptions.subscribe(key, server, event.unified_msg_origin))
+
+    async def tuiding(self, event: AstrMessageEvent, topic: str, server: str = ""):
+        """退订 主题 服务器"""
+        key, server = self._subscription_target(topic, server)
+        if key is None:
+            await self.reply(event, event.plain_result(f"可退订：{'、'.join(SUBSCRIPTION_TOPICS)}"))
+            return
+        return await self.plain_msg(event, lambda: self.jx3at.subscriptions.unsubscribe(key, server, event.unified_msg_origin))
+
+    async def wodedingyue(self, event: AstrMessageEvent):
+        """我的订阅"""
+        return await self.plain_msg(event, lambda: self.jx3at.subscriptions.list_of(event.unified_msg_origin))
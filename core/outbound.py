@@ -0,0 +1,344 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from astrbot.api import logger
+from astrbot.api.event import AstrMessageEvent, MessageChain
+from astrbot.api.star import Context
+import astrbot.api.message_components as Comp
+
+from .sqlite import AsyncSQLiteDB
+from .rate_limit import TokenBucket
+
+
+# 发送优先级：数值小的先发，指令回复优先于后台推送
+PRIORITY_REPLY = 0
+PRIORITY_PUSH = 1
+
+# 合并后的文本长度上限，超过时不再合并
+COALESCE_MAX_CHARS = 1500
+# 重载后恢复的积压消息超过该时长视为过期，直接丢弃
+BACKLOG_MAX_AGE = 3600
+# 桶中单次突发上限
+PLATFORM_BURST = 10
+SESSION_BURST = 3
+
+# 队列关闭时未发出消息的结果：已持久化的留待重载后发送，调用方不必另行重试
+SEND_KEPT = "发送队列已关闭，消息将在重载后发送"
+SEND_CLOSED = "发送队列已关闭"
+# context.send_message 找不到会话所属平台（平台停用或改名）时返回 False 而不抛异常
+PLATFORM_NOT_FOUND = "未找到匹配的平台"
+
+
+class OutboundMessage:
+    """出站队列中的一条消息，合并后对应多个等待方和多条持久化记录"""
+
+    def __init__(
+        self,
+        umo: str,
+        priority: int,
+        text: Optional[str] = None,
+        image: Optional[str] = None,
+        chain: Optional[MessageChain] = None,
+        event: Optional[AstrMessageEvent] = None,
+    ):
+        self.umo = umo
+        self.priority = priority
+        # 纯文本消息可以合并
+        self.text = text
+        # 本地图片路径
+        self.image = image
+        # 不可序列化的消息链只保存在内存
+        self.chain = chain
+        self.event = event
+        self.created = time.time()
+        self.row_ids: List[str] = []
+        self.waiters: List[asyncio.Future] = []
+
+    @property
+    def persistable(self) -> bool:
+        return self.chain is None
+
+    def build(self) -> MessageChain:
+        if self.chain is not None:
+            return self.chain
+        if self.image:
+            return MessageChain().file_image(self.image)
+        if self.event is not None:
+            return self.event.plain_result(self.text or "")
+        return MessageChain().message(self.text or "")
+
+
+class OutboundQueue:
+    """出站消息队列。
+
+    指令回复和后台推送都先进入队列，由少量发送协程按平台与会话两级令牌桶限速发出：
+    回复优先于推送，同一会话同时只发送一条并保持入队顺序；同一会话排队中的相邻
+    纯文本消息合并为一条。文本与本地图片消息写入 outbound_queue 表，插件重载后恢复发送。
+    """
+
+    def __init__(
+        self,
+        context: Context,
+        sqlite: AsyncSQLiteDB,
+        platform_rate: float = 5,
+        session_rate: float = 1,
+        workers: int = 4,
+        enable: bool = True,
+    ):
+        self.context = context
+        self._sql_db = sqlite
+        self.platform_rate = platform_rate
+        self.session_rate = session_rate
+        self.worker_count = max(workers, 1)
+        self.enable = enable
+        # 会话 -> 排队消息
+        self._queues: Dict[str, Deque[OutboundMessage]] = {}
+        # 正在发送的会话
+        self._busy: set = set()
+        self._platform_buckets: Dict[str, TokenBucket] = {}
+        self._session_buckets: Dict[str, TokenBucket] = {}
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._closed = False
+        self.sent = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    # --- 入队 ---
+    async def reply(self, event: AstrMessageEvent, result: MessageChain):
+        """发送指令回复，等待发出；失败只记录日志，与直接发送时一致由调用方继续处理"""
+        if not self.enable:
+            await event.send(result)
+            return
+
+        text = self._plain_text(result)
+        message = OutboundMessage(
+            event.unified_msg_origin,
+            PRIORITY_REPLY,
+            text=text,
+            chain=None if text is not None else result,
+            event=event,
+        )
+        error = await self._submit(message)
+        if error is not None and error != SEND_KEPT:
+            logger.error(f"回复 {message.umo} 发送失败: {error}")
+
+    async def send(self, umo: str, text: str, image: Optional[str] = None, priority: int = PRIORITY_PUSH) -> Optional[str]:
+        """按会话 ID 发送文本或本地图片，返回 None 表示成功，SEND_KEPT 表示已留在队列表中待重载后发送，否则为错误信息"""
+        if not self.enable:
+            chain = MessageChain().file_image(image) if image else MessageChain().message(text)
+            try:
+                sent = await self.context.send_message(umo, chain)
+                return PLATFORM_NOT_FOUND if sent is False else None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                return str(e) or type(e).__name__
+
+        message = OutboundMessage(umo, priority, text=None if image else text, image=image)
+        return await self._submit(message)
+
+    @staticmethod
+    def _plain_text(chain: MessageChain) -> Optional[str]:
+        """消息链全部为文本时返回拼接后的文本"""
+        components = getattr(chain, "chain", None) or []
+        if not components or not all(isinstance(c, Comp.Plain) for c in components):
+            return None
+        return "".join(c.text for c in components)
+
+    async def _submit(self, message: OutboundMessage) -> Optional[str]:
+        if self._closed:
+            return SEND_CLOSED
+        waiter = asyncio.get_running_loop().create_future()
+        message.waiters.append(waiter)
+        if message.persistable:
+            await self._persist(message)
+        self._enqueue(message)
+        return await waiter
+
+    def _enqueue(self, message: OutboundMessage):
+        queue = self._queues.setdefault(message.umo, deque())
+        last = queue[-1] if queue else None
+        if (
+            last is not None
+            and last.text is not None
+            and message.text is not None
+            and last.priority == message.priority
+            and len(last.text) + len(message.text) + 2 <= COALESCE_MAX_CHARS
+        ):
+            last.text = f"{last.text}\n\n{message.text}"
+            last.row_ids.extend(message.row_ids)
+            last.waiters.extend(message.waiters)
+            if last.event is None:
+                last.event = message.event
+            self.coalesced += 1
+        else:
+            queue.append(message)
+        self._start()
+        self._wakeup.set()
+
+    # --- 持久化 ---
+    async def _persist(self, message: OutboundMessage):
+        try:
+            row_id = uuid.uuid4().hex
+            await self._sql_db.execute(
+                """
+                INSERT INTO outbound_queue (id, umo, priority, content, image, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (row_id, message.umo, message.priority, message.text, message.image, message.created),
+            )
+            message.row_ids.append(row_id)
+        except Exception as e:
+            logger.error(f"写入发送队列失败: {e}")
+
+    async def _forget(self, message: OutboundMessage):
+        if not message.row_ids:
+            return
+        try:
+            await self._sql_db.executemany(
+                "DELETE FROM outbound_queue WHERE id=?",
+                [(row_id,) for row_id in message.row_ids],
+            )
+        except Exception as e:
+            logger.error(f"删除发送队列记录失败: {e}")
+
+    async def load(self):
+        """恢复上次未发出的消息，过期的直接丢弃"""
+        cutoff = time.time() - BACKLOG_MAX_AGE
+        try:
+            await self._sql_db.execute("DELETE FROM outbound_queue WHERE created_at<?", (cutoff,))
+            rows = await self._sql_db.fetch_all("SELECT * FROM outbound_queue ORDER BY created_at")
+        except Exception as e:
+            logger.error(f"读取发送队列失败: {e}")
+            return
+
+        for row in rows:
+            message = OutboundMessage(row["umo"], row["priority"], text=row["content"], image=row["image"])
+            if message.image:
+                message.text = None
+            message.created = row["created_at"]
+            message.row_ids.append(row["id"])
+            self._enqueue(message)
+        if rows:
+            logger.info(f"发送队列已恢复 {len(rows)} 条未发出的消息")
+
+    # --- 发送 ---
+    def _bucket(self, buckets: Dict[str, TokenBucket], key: str, rate: float, burst: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+    def _take_next(self) -> Optional[OutboundMessage]:
+        """取出可立即发送的最高优先级消息，同优先级按入队时间"""
+        best = None
+        for umo, queue in self._queues.items():
+            if not queue or umo in self._busy:
+                continue
+            head = min(queue, key=lambda m: m.priority)
+            if best is None or (head.priority, head.created) < (best.priority, best.created):
+                platform = umo.split(":", 1)[0]
+                if self._bucket(self._platform_buckets, platform, self.platform_rate, PLATFORM_BURST).tokens < 1:
+                    continue
+                if self._bucket(self._session_buckets, umo, self.session_rate, SESSION_BURST).tokens < 1:
+                    continue
+                best = head
+
+        if best is None:
+            return None
+        self._queues[best.umo].remove(best)
+        if not self._queues[best.umo]:
+            self._queues.pop(best.umo)
+        self._platform_buckets[best.umo.split(":", 1)[0]].try_acquire()
+        self._session_buckets[best.umo].try_acquire()
+        return best
+
+    def _start(self):
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.worker_count:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self):
+        while True:
+            message = self._take_next()
+            if message is None:
+                self._wakeup.clear()
+                # 队列非空但令牌不足时短暂等待补充
+                timeout = 0.1 if self._queues else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._busy.add(message.umo)
+            try:
+                error = await self._deliver(message)
+            except asyncio.CancelledError:
+                # 关闭时正在发送的消息同样要通知等待方
+                self._resolve(message, self._closed_result(message))
+                raise
+            finally:
+                self._busy.discard(message.umo)
+                # 本会话的下一条可以发送了
+                self._wakeup.set()
+            # 先通知等待方，删除记录时被取消也不会让等待方挂起
+            self._resolve(message, error)
+            await self._forget(message)
+
+    @staticmethod
+    def _resolve(message: OutboundMessage, result: Optional[str]):
+        for waiter in message.waiters:
+            if not waiter.done():
+                waiter.set_result(result)
+
+    @staticmethod
+    def _closed_result(message: OutboundMessage) -> str:
+        """关闭时未确认发出的消息：有持久化记录的重载后继续发送"""
+        return SEND_KEPT if message.row_ids else SEND_CLOSED
+
+    async def _deliver(self, message: OutboundMessage) -> Optional[str]:
+        try:
+            if message.event is not None:
+                await message.event.send(message.build())
+            else:
+                if await self.context.send_message(message.umo, message.build()) is False:
+                    return PLATFORM_NOT_FOUND
+            self.sent += 1
+            return None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return str(e) or type(e).__name__
+
+    async def close(self):
+        """停止发送；已持久化的消息留在表中，下次加载时继续发送。
+
+        等待方都会得到结果：留在表中的为 SEND_KEPT，其余为 SEND_CLOSED。
+        """
+        self._closed = True
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers.clear()
+        dropped = 0
+        for queue in self._queues.values():
+            for message in queue:
+                dropped += not message.row_ids
+                self._resolve(message, self._closed_result(message))
+        if dropped:
+            logger.warning(f"发送队列中 {dropped} 条未持久化的消息未发出")
+        self._queues.clear()
+
+    def summary(self) -> str:
+        return f"排队 {len(self)} 条，已发送 {self.sent} 条，合并 {self.coalesced} 次"
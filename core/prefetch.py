@@ -0,0 +1,57 @@
+from collections import Counter
+from typing import Hashable, List, Sequence
+
+
+class PickCounter:
+    """两轮会话的选择热度统计，用于决定预取哪些候选以及预取几个。
+
+    按列表位置和条目 ID 两个维度计数：位置反映用户习惯点前几项，
+    条目 ID 反映同一篇内容被反复选择。
+    """
+
+    def __init__(self, max_k: int = 3, default_k: int = 2, coverage: float = 0.8, min_samples: int = 10):
+        self.max_k = max_k
+        self.default_k = default_k
+        # 预取覆盖的历史选择比例
+        self.coverage = coverage
+        self.min_samples = min_samples
+        self.positions: Counter = Counter()
+        self.keys: Counter = Counter()
+
+    @property
+    def samples(self) -> int:
+        return sum(self.positions.values())
+
+    def record(self, position: int, key: Hashable):
+        """记录一次选择，position 从 1 开始"""
+        self.positions[position] += 1
+        self.keys[key] += 1
+
+    def k(self) -> int:
+        """覆盖指定比例历史选择所需的位置数，样本不足时取默认值"""
+        total = self.samples
+        if total < self.min_samples:
+            return self.default_k
+
+        covered = 0
+        for k, (_, count) in enumerate(self.positions.most_common(), 1):
+            covered += count
+            if covered / total >= self.coverage or k >= self.max_k:
+                return k
+        return self.max_k
+
+    def choose(self, candidates: Sequence[Hashable]) -> List[int]:
+        """返回应预取的候选位置（从 1 开始），按热度降序"""
+        k = min(self.k(), len(candidates))
+        if k <= 0:
+            return []
+
+        # 列表本身按热度排列，同分时靠前的优先
+        ranked = sorted(
+            range(1, len(candidates) + 1),
+            key=lambda position: (
+                -(self.positions[position] + 2 * self.keys[candidates[position - 1]]),
+                position,
+            ),
+        )
+        return ranked[:k]
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from astrbot.api import logger
+
+from .sqlite import AsyncSQLiteDB
+from .render_cache import RenderCache
+from .search_index import normalize_text
+
+
+# 金价接口中各交易平台字段
+GOLD_PLATFORMS = {
+    "tieba": "贴吧",
+    "wanbaolou": "万宝楼",
+    "dd373": "dd373",
+    "uu898": "uu898",
+    "5173": "5173",
+    "7881": "7881",
+}
+
+# 走势范围：(时间跨度秒, 降采样粒度秒, 显示名称)
+TREND_SPANS = {
+    "日": (86400, 3600, "近一日"),
+    "周": (7 * 86400, 6 * 3600, "近一周"),
+    "月": (30 * 86400, 86400, "近一月"),
+}
+
+_DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y/%m/%d %H:%M:%S", "%Y/%m/%d")
+
+# 走势图缓存总大小上限
+CHART_CACHE_BYTES = 20 * 1024 * 1024
+
+# matplotlib 的字体查找与缓存不是线程安全的，线程池中的绘图串行执行
+_CHART_LOCK = threading.Lock()
+
+_CJK_FONTS = ["Microsoft YaHei", "SimHei", "Noto Sans CJK SC", "Source Han Sans SC", "WenQuanYi Micro Hei", "PingFang SC"]
+
+
+def parse_timestamp(value: Any) -> Optional[int]:
+    """解析接口中的日期字符串或时间戳"""
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text)
+    for fmt in _DATE_FORMATS:
+        try:
+            return int(datetime.strptime(text, fmt).timestamp())
+        except ValueError:
+            continue
+    return None
+
+
+def parse_price(value: Any) -> Optional[float]:
+    try:
+        price = float(str(value).replace(",", "").strip())
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 else None
+
+
+def item_series(name: str) -> str:
+    """物品时序名：写入与查询统一使用归一化后的名称"""
+    return f"item:{normalize_text(name)}"
+
+
+class PriceStore:
+    """金价与物价的本地时序存储，只追加写入，按时间桶降采样查询"""
+
+    def __init__(self, sqlite: AsyncSQLiteDB, chart_cache: Optional[RenderCache] = None):
+        self._sql_db = sqlite
+        # 走势图按内容缓存，总大小超限时淘汰
+        self.chart_cache = chart_cache
+        # 用户输入 -> 接口返回的物品名，均为归一化后的名称
+        self._item_names: Dict[str, str] = {}
+
+    async def _append(self, rows: List[Tuple[str, str, int, float]]):
+        if not rows:
+            return
+        try:
+            await self._sql_db.executemany(
+                "INSERT OR IGNORE INTO price_series (series, server, ts, value) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        except Exception as e:
+            logger.error(f"写入价格时序失败: {e}")
+
+    async def record_gold(self, server: str, items: Any):
+        """记录金价接口返回的各平台价格，当日数据按小时采样，历史数据按天补齐"""
+        if not isinstance(items, list):
+            return
+
+        now = datetime.now()
+        today_start = int(datetime(now.year, now.month, now.day).timestamp())
+        hour_ts = int(now.timestamp()) // 3600 * 3600
+        rows = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            day_ts = parse_timestamp(item.get("date"))
+            if day_ts is None:
+                continue
+            ts = hour_ts if day_ts >= today_start else day_ts
+            item_server = str(item.get("server") or server)
+            for key in GOLD_PLATFORMS:
+                price = parse_price(item.get(key))
+                if price is not None:
+                    rows.append((f"gold:{key}", item_server, ts, price))
+        await self._append(rows)
+
+    async def record_item(self, name: str, payload: Any):
+        """记录物价接口返回的各分组成交/公示价格"""
+        if not isinstance(payload, dict):
+            return
+
+        series = item_series(payload.get("name") or name)
+        self._item_names[normalize_text(name)] = series[len("item:"):]
+        rows = []
+        for group in payload.get("list") or []:
+            if not isinstance(group, dict):
+                continue
+            for item in group.get("list") or []:
+                if not isinstance(item, dict):
+                    continue
+                ts = parse_timestamp(item.get("date"))
+                price = parse_price(item.get("value"))
+                server = str(item.get("server") or "")
+                if ts is None or price is None or not server:
+                    continue
+                rows.append((series, server, ts, price))
+        await self._append(rows)
+
+    async def query(self, series: str, server: str, span: str) -> List[Dict[str, Any]]:
+        """按范围降采样查询，server 为空时合并全部服务器"""
+        seconds, bucket, _ = TREND_SPANS[span]
+        since = int(datetime.now().timestamp()) - seconds
+        sql = (
+            "SELECT (ts / ?) * ? AS bucket_ts, AVG(value) AS avg_value, "
+            "MIN(value) AS min_value, MAX(value) AS max_value, COUNT(*) AS samples "
+            "FROM price_series WHERE series=? AND ts>=?"
+        )
+        params: Tuple = (bucket, bucket, series, since)
+        if server:
+            sql += " AND server=?"
+            params += (server,)
+        sql += " GROUP BY bucket_ts ORDER BY bucket_ts"
+        return await self._sql_db.fetch_all(sql, params)
+
+    async def gold_trend(self, server: str, span: str) -> Dict[str, List[Dict[str, Any]]]:
+        """各平台金价走势"""
+        result = {}
+        for key, label in GOLD_PLATFORMS.items():
+            points = await self.query(f"gold:{key}", server, span)
+            if points:
+                result[label] = points
+        return result
+
+    async def resolve_item(self, name: str) -> Optional[str]:
+        """把用户输入对应到已记录的物品时序：先查本次运行的查询记录，再按名称包含关系匹配最短的一项"""
+        key = normalize_text(name)
+        if not key:
+            return None
+        if key in self._item_names:
+            return f"item:{self._item_names[key]}"
+
+        rows = await self._sql_db.fetch_all(
+            "SELECT DISTINCT series FROM price_series WHERE series LIKE 'item:%'"
+        )
+        names = [row["series"][len("item:"):] for row in rows]
+        if key in names:
+            return f"item:{key}"
+        matches = [n for n in names if key in n or n in key]
+        if not matches:
+            return None
+        return f"item:{min(matches, key=len)}"
+
+    async def item_trend(self, name: str, server: str, span: str) -> Dict[str, List[Dict[str, Any]]]:
+        """物品价格走势"""
+        series = await self.resolve_item(name)
+        if series is None:
+            return {}
+        points = await self.query(series, server, span)
+        return {server or "全服": points} if points else {}
+
+    async def render_chart(self, title: str, lines: Dict[str, List[Dict[str, Any]]], y_label: str) -> str:
+        """在线程池中用 matplotlib 绘制走势图，返回图片路径"""
+        if self.chart_cache is None:
+            raise RuntimeError("未配置走势图缓存目录")
+
+        key = hashlib.md5(repr((title, y_label, lines)).encode("utf-8")).hexdigest()
+        cached = self.chart_cache.get(key)
+        if cached:
+            return cached
+
+        path = self.chart_cache.root / f"{key}.png"
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(None, self._draw_chart, title, lines, y_label, str(path))
+        return self.chart_cache.add(key, path, size)
+
+    @staticmethod
+    def _draw_chart(title: str, lines: Dict[str, List[Dict[str, Any]]], y_label: str, path: str) -> int:
+        """绘制并原子写入图片，返回文件字节数"""
+        import matplotlib.dates as mdates
+        from matplotlib import rc_context
+        from matplotlib.figure import Figure
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        # Figure 不经过 pyplot，不注册到全局图形管理器；字体只在本次绘图的上下文中生效
+        with _CHART_LOCK, rc_context({"font.sans-serif": _CJK_FONTS + ["DejaVu Sans"], "axes.unicode_minus": False}):
+            fig = Figure(figsize=(10, 5), dpi=120)
+            ax = fig.subplots()
+            for label, points in lines.items():
+                xs = [datetime.fromtimestamp(p["bucket_ts"]) for p in points]
+                ys = [p["avg_value"] for p in points]
+                ax.plot(xs, ys, marker="o", markersize=3, linewidth=1.5, label=label)
+
+            ax.set_title(title)
+            ax.set_ylabel(y_label)
+            ax.grid(True, linestyle="--", alpha=0.4)
+            ax.xaxis.set_major_formatter(mdates.DateFormatter("%m-%d %H:%M"))
+            fig.autofmt_xdate()
+            if len(lines) > 1:
+                ax.legend()
+            fig.tight_layout()
+            fig.savefig(tmp, format="png")
+        os.replace(tmp, path)
+        return os.path.getsize(path)
@@ -0,0 +1,198 @@
+import asyncio
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+from astrbot.api import logger
+from astrbot.api.event import MessageChain
+from astrbot.api.star import Context
+
+from .sqlite import AsyncSQLiteDB
+from .rate_limit import TokenBucket
+from .outbound import OutboundQueue, PLATFORM_NOT_FOUND, SEND_KEPT
+
+
+# 失败重试的退避：第 n 次失败后等待 RETRY_BASE_SECONDS * 2^(n-1)，不超过上限
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+# 超过该次数仍失败的消息放弃
+RETRY_MAX_ATTEMPTS = 6
+# 每轮重试最多处理的条数
+RETRY_BATCH = 50
+
+
+class DeliveryStats:
+    """单个会话的推送统计，延迟从本轮分发开始计到发送完成"""
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float, ok: bool):
+        if not ok:
+            self.failed += 1
+            return
+        self.sent += 1
+        self.last_ms = latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        # 指数滑动平均，近期延迟权重更高
+        self.avg_ms = latency_ms if self.sent == 1 else self.avg_ms * 0.8 + latency_ms * 0.2
+
+
+class PushDispatcher:
+    """后台推送分发：信号量限制并发，按平台令牌桶限速，失败消息进入持久化重试队列"""
+
+    def __init__(
+        self,
+        context: Context,
+        sqlite: AsyncSQLiteDB,
+        concurrency: int = 8,
+        rate: float = 2,
+        burst: float = 5,
+        outbound: Optional[OutboundQueue] = None,
+    ):
+        self.context = context
+        self.sql = sqlite
+        # 出站队列：与指令回复共用平台与会话限速
+        self.outbound = outbound
+        self.rate = rate
+        self.burst = burst
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        # 平台 ID -> 令牌桶，会话 ID 形如“平台:消息类型:会话”
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.stats: Dict[str, DeliveryStats] = {}
+
+    def _bucket(self, umo: str) -> TokenBucket:
+        platform = umo.split(":", 1)[0]
+        bucket = self._buckets.get(platform)
+        if bucket is None:
+            bucket = self._buckets[platform] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def _send(self, umo: str, text: str, started: float, image: Optional[str] = None) -> Optional[str]:
+        """发送一条消息，有图片时发送图片，否则发送文本；成功返回 None，失败返回错误信息"""
+        async with self._semaphore:
+            await self._bucket(umo).acquire()
+            if self.outbound is not None:
+                error = await self.outbound.send(umo, text, image)
+            else:
+                chain = MessageChain().file_image(image) if image else MessageChain().message(text)
+                try:
+                    sent = await self.context.send_message(umo, chain)
+                    error = PLATFORM_NOT_FOUND if sent is False else None
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+
+        # 留在出站队列表中的消息重载后由队列发送，不计入成功或失败
+        if error != SEND_KEPT:
+            self.stats.setdefault(umo, DeliveryStats()).record((time.monotonic() - started) * 1000, error is None)
+        return error
+
+    async def deliver(self, umos: Iterable[str], text: str, source: str = "", image: Optional[str] = None) -> int:
+        """并发推送给全部会话，失败的写入重试队列，返回成功数。
+
+        image 为已渲染好的本地图片路径，全部会话发送同一张图片。
+        """
+        umos = list(dict.fromkeys(umos))
+        started = time.monotonic()
+        errors = await asyncio.gather(*(self._send(umo, text, started, image) for umo in umos))
+
+        for umo, error in zip(umos, errors):
+            if error == SEND_KEPT:
+                logger.info(f"{source} 推送到 {umo} 未发出，已留在发送队列")
+            elif error is not None:
+                logger.warning(f"{source} 推送到 {umo} 失败，稍后重试: {error}")
+                await self._enqueue(umo, text, source, error, image)
+        return sum(error is None for error in errors)
+
+    @staticmethod
+    def backoff(attempts: int) -> float:
+        return min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+
+    async def _enqueue(self, umo: str, text: str, source: str, error: str, image: Optional[str] = None):
+        now = time.time()
+        try:
+            await self.sql.execute(
+                """
+                INSERT INTO push_retry (umo, source, content, image, attempts, next_at, created_at, last_error)
+                VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+                """,
+                (umo, source, text, image, now + self.backoff(1), now, error),
+            )
+        except Exception as e:
+            logger.error(f"写入推送重试队列失败: {e}")
+
+    async def retry_due(self):
+        """重发到期的失败消息，同一会话按入队顺序发送"""
+        try:
+            rows = await self.sql.fetch_all(
+                "SELECT * FROM push_retry WHERE next_at<=? ORDER BY id LIMIT ?",
+                (time.time(), RETRY_BATCH),
+            )
+        except Exception as e:
+            logger.error(f"读取推送重试队列失败: {e}")
+            return
+
+        by_umo: Dict[str, List[dict]] = {}
+        for row in rows:
+            by_umo.setdefault(row["umo"], []).append(row)
+        await asyncio.gather(*(self._retry_session(items) for items in by_umo.values()))
+
+    async def _retry_session(self, rows: List[dict]):
+        for index, row in enumerate(rows):
+            # 图片已被渲染缓存淘汰时改发文本
+            image = row.get("image")
+            if image and not os.path.exists(image):
+                image = None
+            error = await self._send(row["umo"], row["content"], time.monotonic(), image)
+            try:
+                # 已发出，或已转入出站队列表由队列在重载后发送
+                if error is None or error == SEND_KEPT:
+                    await self.sql.delete("push_retry", "id=?", (row["id"],))
+                    continue
+
+                attempts = int(row["attempts"]) + 1
+                if attempts > RETRY_MAX_ATTEMPTS:
+                    logger.error(f"{row['source']} 推送到 {row['umo']} 重试 {RETRY_MAX_ATTEMPTS} 次仍失败，已放弃: {error}")
+                    await self.sql.delete("push_retry", "id=?", (row["id"],))
+                    continue
+
+                # 本会话后续消息一并推迟，保持顺序
+                next_at = time.time() + self.backoff(attempts)
+                await self.sql.execute(
+                    "UPDATE push_retry SET attempts=?, next_at=?, last_error=? WHERE id=?",
+                    (attempts, next_at, error, row["id"]),
+                )
+                await self.sql.executemany(
+                    "UPDATE push_retry SET next_at=MAX(next_at, ?) WHERE id=?",
+                    [(next_at, later["id"]) for later in rows[index + 1:]],
+                )
+                return
+            except Exception as e:
+                logger.error(f"更新推送重试队列失败: {e}")
+                return
+
+    async def pending(self) -> int:
+        try:
+            row = await self.sql.fetch_one("SELECT COUNT(*) AS n FROM push_retry")
+            return int(row["n"]) if row else 0
+        except Exception:
+            return 0
+
+    def summary(self, umos: Iterable[str]) -> str:
+        """会话推送延迟统计文本"""
+        lines = []
+        for umo in umos:
+            stats = self.stats.get(umo)
+            if stats is None:
+                continue
+            lines.append(
+                f"{umo}：成功 {stats.sent}，失败 {stats.failed}，"
+                f"平均 {stats.avg_ms:.0f}ms，最近 {stats.last_ms:.0f}ms，最大 {stats.max_ms:.0f}ms"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,136 @@
+import hashlib
+import math
+import time
+from typing import Iterable, List, Set
+
+from astrbot.api import logger
+
+from .sqlite import AsyncSQLiteDB
+
+
+# 已推送记录保留天数
+SEEN_RETENTION_DAYS = 30
+# 超过保留期后每个主题仍保留的最近记录数，防止上游长期不更新的旧消息被再次推送
+SEEN_KEEP_PER_TOPIC = 50
+# 布隆过滤器的目标误判率；误判即把新消息当作已推送，因此取很小的值
+SEEN_FALSE_POSITIVE = 1e-6
+
+
+def content_key(*parts) -> str:
+    """没有消息 ID 时以内容哈希作为事件键"""
+    digest = hashlib.sha1("\0".join(str(p) for p in parts).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class BloomFilter:
+    """定长位数组的布隆过滤器，双哈希派生 k 个位置"""
+
+    def __init__(self, capacity: int, error_rate: float = SEEN_FALSE_POSITIVE):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class SeenLog:
+    """已推送事件记录：主题 + 事件键。
+
+    事件键为上游消息 ID，没有 ID 时为内容哈希。记录持久化在 push_seen 表，
+    重启后不会重复推送；判断是否推送过只查内存中的布隆过滤器，不读库。
+    记录按保留期定期清理，清理后重建过滤器。
+    """
+
+    def __init__(self, sqlite: AsyncSQLiteDB, capacity: int = 10000):
+        self._sql_db = sqlite
+        self.base_capacity = capacity
+        self._bloom = BloomFilter(capacity)
+        # 已有记录的主题，没有记录的主题视为首次运行
+        self._topics: Set[str] = set()
+
+    @staticmethod
+    def _member(topic: str, key: str) -> str:
+        return f"{topic}\0{key}"
+
+    async def load(self):
+        """读取保留期内的记录并构建过滤器"""
+        try:
+            rows = await self._sql_db.fetch_all("SELECT topic, key FROM push_seen")
+        except Exception as e:
+            logger.error(f"读取推送记录失败: {e}")
+            return
+
+        self._bloom = BloomFilter(max(self.base_capacity, len(rows) * 2))
+        self._topics = set()
+        for row in rows:
+            self._bloom.add(self._member(row["topic"], row["key"]))
+            self._topics.add(row["topic"])
+        logger.debug(f"推送记录已加载，共 {len(rows)} 条")
+
+    def known(self, topic: str) -> bool:
+        return topic in self._topics
+
+    def seen(self, topic: str, key: str) -> bool:
+        return self._member(topic, str(key)) in self._bloom
+
+    def unseen(self, topic: str, keys: Iterable) -> List[str]:
+        return [str(key) for key in keys if not self.seen(topic, key)]
+
+    async def mark(self, topic: str, keys: Iterable):
+        """登记已推送的事件"""
+        keys = [str(key) for key in keys]
+        if not keys:
+            return
+        now = int(time.time())
+        try:
+            await self._sql_db.executemany(
+                "INSERT OR IGNORE INTO push_seen (topic, key, seen_at) VALUES (?, ?, ?)",
+                [(topic, key, now) for key in keys],
+            )
+        except Exception as e:
+            # 写库失败时仍登记到内存，本次运行内不重复推送
+            logger.error(f"写入推送记录失败: {e}")
+
+        for key in keys:
+            self._bloom.add(self._member(topic, key))
+        self._topics.add(topic)
+        if self._bloom.count > self._bloom.capacity:
+            await self.load()
+
+    async def prune(self):
+        """删除超过保留期的记录并重建过滤器，每个主题保留最近若干条"""
+        cutoff = int(time.time()) - SEEN_RETENTION_DAYS * 86400
+        try:
+            await self._sql_db.execute(
+                """
+                DELETE FROM push_seen
+                WHERE seen_at<? AND (topic, key) NOT IN (
+                    SELECT topic, key FROM (
+                        SELECT topic, key,
+                            ROW_NUMBER() OVER (PARTITION BY topic ORDER BY seen_at DESC) AS rn
+                        FROM push_seen
+                    ) WHERE rn<=?
+                )
+                """,
+                (cutoff, SEEN_KEEP_PER_TOPIC),
+            )
+        except Exception as e:
+            logger.error(f"清理推送记录失败: {e}")
+            return
+        await self.load()
@@ -0,0 +1,197 @@
+"""声明式推送源。
+
+每个推送源声明上游接口、请求参数、变化提取和文本格式。调度器按接口把推送源
+分组，每组一个后台任务；每轮把组内各推送源、各订阅服务器需要的请求按
+(接口, 参数) 去重后只请求一次，同一份返回数据供所有相关推送源和订阅会话使用。
+
+新增推送源只需在 PUSH_SOURCES 中登记，并在订阅主题与插件配置中加入对应键。
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .fun_basic import format_time
+from .jx3api_data import JX3APIService
+from .push_seen import content_key
+
+
+# 公告类推送每次拉取的条数，两次轮询之间出现多条时不遗漏
+NEWS_PAGE_SIZE = 5
+WICKED_PAGE_SIZE = 10
+
+# 变化判断方式：state 与上次状态比较；event 逐条按事件键去重
+MODE_STATE = "state"
+MODE_EVENT = "event"
+
+
+class PushSource:
+    """单个推送源的声明。
+
+    extract(data, server) 接收接口原始数据：state 模式返回 (状态, 文本)，数据中
+    没有该服务器时返回 None；event 模式返回按时间倒序的 [(事件键, 文本, 卡片)]，
+    卡片为 (模板文件, 模板数据) 或 None，启用图片推送时渲染后代替文本发送。
+    卡片数据只取自事件本身，相同事件得到相同的渲染缓存键。per_server 为真时按服务器订阅，
+    params(server) 生成每个服务器的请求参数，返回相同参数的服务器共用一次请求。
+    event 模式的主题首次运行时只登记现有事件不推送；first_push 为真时沿用旧版行为推送最新一条，
+    仅用于升级前已有推送记录的新闻。
+    """
+
+    def __init__(
+        self,
+        key: str,
+        name: str,
+        path: str,
+        extract: Callable[[Any, str], Any],
+        params: Optional[Callable[[str], Dict[str, Any]]] = None,
+        mode: str = MODE_EVENT,
+        per_server: bool = False,
+        auth: bool = False,
+        first_push: bool = False,
+    ):
+        self.key = key
+        self.name = name
+        self.path = path
+        self.extract = extract
+        self.params = params or (lambda server: {})
+        self.mode = mode
+        self.per_server = per_server
+        # 请求需要携带 JX3API Token
+        self.auth = auth
+        self.first_push = first_push
+
+
+def _kaifu(data: List[Dict[str, Any]], server: str) -> Optional[Tuple[bool, str]]:
+    """开服：从全服状态列表中取出该服务器"""
+    for item in data:
+        if isinstance(item, dict) and item.get("server") == server:
+            opened = not item.get("status") == "维护"
+            return opened, JX3APIService.kaifu_message(server, opened)
+    return None
+
+
+# 事件：(事件键, 文本, 卡片)
+Event = Tuple[str, str, Optional[Tuple[str, Dict[str, Any]]]]
+
+
+def _news(data: List[Dict[str, Any]], server: str) -> List[Event]:
+    return [(JX3APIService.news_key(item), JX3APIService.news_message([item]), None) for item in data]
+
+
+def _announce(data: List[Dict[str, Any]], server: str) -> List[Event]:
+    return [(JX3APIService.news_key(item), JX3APIService.announce_message([item]), None) for item in data]
+
+
+def _castle(data: List[Dict[str, Any]], server: str) -> List[Event]:
+    """关隘首领：全服一次返回，按服务器取出；同一关隘同一开始时间只推送一次"""
+    items = []
+    for group in data:
+        if not isinstance(group, dict) or group.get("server") != server:
+            continue
+        for item in group.get("data") or []:
+            items.append((
+                item.get("startTime") or 0,
+                content_key(item.get("castle", ""), item.get("startTime", "")),
+                f"关隘首领推送\n"
+                f"区服：{server}\n"
+                f"关隘：{item.get('castle', '')}（{item.get('campName', '')}）\n"
+                f"状态：{item.get('statusText', '')}\n"
+                f"开始：{format_time(item.get('startTime'))}\n"
+                f"结束：{format_time(item.get('endTime'))}\n",
+                ("guanaishouling.html", {
+                    "groups": [{
+                        "server": server,
+                        "records": [{
+                            "camp_name": item.get("campName", ""),
+                            "castle": item.get("castle", ""),
+                            "str_status": item.get("statusText", ""),
+                            "start_time": format_time(item.get("startTime")),
+                            "end_time": format_time(item.get("endTime")),
+                            "remaining_time": "",
+                        }],
+                    }],
+                    "update_time": format_time(item.get("startTime")),
+                }),
+            ))
+    items.sort(key=lambda row: int(row[0]), reverse=True)
+    return [row[1:] for row in items]
+
+
+def _steed(data: List[Dict[str, Any]], server: str) -> List[Event]:
+    """的卢：刷新、被捕获、拍卖三个阶段各推送一次"""
+    items = []
+    for item in data:
+        if item.get("auctionTime"):
+            stage = f"已拍卖：{item.get('auctionRoleName', '')}（{item.get('auctionCampName', '')}），{item.get('auctionAmount', '')}"
+            moment = item.get("auctionTime")
+        elif item.get("captureTime"):
+            stage = f"已被捕获：{item.get('captureRoleName', '')}（{item.get('captureCampName', '')}）"
+            moment = item.get("captureTime")
+        else:
+            stage = "已刷新"
+            moment = item.get("refreshTime")
+        items.append((
+            content_key(item.get("refreshTime", ""), stage),
+            f"的卢推送\n"
+            f"区服：{server}\n"
+            f"刷新：{format_time(item.get('refreshTime'))}\n"
+            f"{stage}\n"
+            f"时间：{format_time(moment)}\n",
+            ("dilujilu.html", {
+                "list": [{
+                    **item,
+                    "server": item.get("server", server),
+                    "refreshTime": format_time(item.get("refreshTime")),
+                    "captureTime": format_time(item.get("captureTime")),
+                    "auctionTime": format_time(item.get("auctionTime")),
+                }],
+            }),
+        ))
+    return items
+
+
+def _wicked(data: List[Dict[str, Any]], server: str) -> List[Event]:
+    return [
+        (
+            content_key(item.get("mapName", ""), item.get("time", "")),
+            f"诛恶事件推送\n"
+            f"区服：{item.get('server', server)}\n"
+            f"地图：{item.get('mapName', '')}\n"
+            f"时间：{format_time(item.get('time'))}\n",
+            ("zhueevent.html", {
+                "items": [{**item, "server": item.get("server", server), "time": format_time(item.get("time"))}],
+                "update_time": format_time(item.get("time")),
+            }),
+        )
+        for item in data
+    ]
+
+
+PUSH_SOURCES: Dict[str, PushSource] = {
+    source.key: source
+    for source in (
+        # 服务器参数为空时返回全部服务器，所有服务器的开服监控共用一次请求
+        PushSource("kfts", "开服监控", "/server/status/check", _kaifu,
+                   params=lambda server: {"server": ""}, mode=MODE_STATE, per_server=True),
+        PushSource("xwts", "新闻资讯", "/news/records", _news,
+                   params=lambda server: {"limit": NEWS_PAGE_SIZE}, first_push=True),
+        PushSource("whts", "维护公告", "/news/announce", _announce,
+                   params=lambda server: {"limit": NEWS_PAGE_SIZE}),
+        # 关隘接口一次返回全部服务器，各服务器的订阅共用一次请求
+        PushSource("gats", "关隘首领", "/castle/status", _castle,
+                   per_server=True, auth=True),
+        PushSource("dlts", "的卢", "/steed/records", _steed,
+                   params=lambda server: {"server": server}, per_server=True, auth=True),
+        PushSource("zets", "诛恶事件", "/wicked/records", _wicked,
+                   params=lambda server: {"server": server, "limit": WICKED_PAGE_SIZE}, per_server=True, auth=True),
+    )
+}
+
+
+def group_sources(keys) -> Dict[str, List[str]]:
+    """按接口分组：组 ID -> 推送源键；组 ID 取组内第一个推送源的键"""
+    groups: Dict[str, List[str]] = {}
+    by_path: Dict[str, str] = {}
+    for key in keys:
+        path = PUSH_SOURCES[key].path
+        gid = by_path.setdefault(path, key)
+        groups.setdefault(gid, []).append(key)
+    return groups
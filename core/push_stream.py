@@ -0,0 +1,108 @@
+import asyncio
+import json
+import random
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+
+from astrbot.api import logger
+
+
+class PushStream:
+    """WebSocket 推送流消费者。
+
+    连接成功后逐条解析 JSON 消息交给 on_event；连接断开或出错时按指数退避
+    （带随机抖动）重连。连接状态变化通过 on_state 通知调用方，
+    由调用方在断开时恢复轮询、在重连后补拉断线期间的变化。
+    """
+
+    def __init__(
+        self,
+        url: str,
+        on_event: Callable[[Dict[str, Any]], Awaitable[None]],
+        on_state: Optional[Callable[[bool], Awaitable[None]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        min_backoff: float = 1,
+        max_backoff: float = 300,
+        heartbeat: float = 30,
+    ):
+        self.url = url
+        self.on_event = on_event
+        self.on_state = on_state
+        self.headers = headers or {}
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.heartbeat = heartbeat
+        self.connected = False
+        self.received = 0
+        self.reconnects = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._set_state(False)
+
+    async def _set_state(self, connected: bool):
+        if connected == self.connected:
+            return
+        self.connected = connected
+        if self.on_state is not None:
+            try:
+                await self.on_state(connected)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("推送流状态回调执行异常")
+
+    async def _run(self):
+        backoff = self.min_backoff
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    async with session.ws_connect(self.url, headers=self.headers, heartbeat=self.heartbeat) as ws:
+                        logger.info(f"推送流已连接: {self.url}")
+                        backoff = self.min_backoff
+                        await self._set_state(True)
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                await self._dispatch(msg.data)
+                            elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSE):
+                                break
+                    logger.warning("推送流连接已关闭")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"推送流连接失败: {e}")
+
+                await self._set_state(False)
+                self.reconnects += 1
+                delay = backoff * random.uniform(0.5, 1.0)
+                backoff = min(backoff * 2, self.max_backoff)
+                await asyncio.sleep(delay)
+
+    async def _dispatch(self, text: str):
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            logger.debug(f"推送流消息不是 JSON: {text[:100]}")
+            return
+        if not isinstance(payload, dict):
+            return
+
+        self.received += 1
+        try:
+            await self.on_event(payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("推送流消息处理异常")
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from astrbot.api import logger
+
+from .jx3api_data import JX3APIService, RANK_TEMPLATES, WEEKLY_RANK_NAMES
+from .fun_basic import expire_at_daily_reset, expire_at_weekly_reset
+from .render import render_html, IMAGE_OPTIONS
+
+
+class RankSweep:
+    """排行榜定时预取：刷新全部五十强榜单的本地缓存并预渲染图片"""
+
+    def __init__(self, jx3api: JX3APIService, icons: dict, pause: float = 0.5):
+        self.jx3api = jx3api
+        self.icons = icons
+        # 相邻请求间隔，避免集中打满上游
+        self.pause = pause
+        self._images: Dict[Tuple[str, str], Tuple[float, str]] = {}
+        self.last_sweep: Optional[float] = None
+
+    def get_image(self, name: str, server: str) -> Optional[str]:
+        """读取未过期的预渲染图片路径"""
+        cached = self._images.get((name, server))
+        if not cached:
+            return None
+
+        expires_at, path = cached
+        if expires_at <= time.time() or not os.path.exists(path):
+            self._images.pop((name, server), None)
+            return None
+        return path
+
+    async def sweep(self, servers: List[str], refresh: bool = True):
+        """逐个服务器刷新并预渲染全部榜单"""
+        started = time.time()
+        done = 0
+        for server in servers:
+            for name in RANK_TEMPLATES:
+                try:
+                    if await self._sweep_one(name, server, refresh):
+                        done += 1
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"排行榜预取失败 {server}-{name}: {e}")
+                await asyncio.sleep(self.pause)
+
+        self.last_sweep = time.time()
+        logger.info(f"排行榜预取完成，成功 {done} 个，耗时 {self.last_sweep - started:.1f}s")
+
+    async def _sweep_one(self, name: str, server: str, refresh: bool) -> bool:
+        data = await self.jx3api.rank_statistical(name, server, refresh=refresh)
+        if data["code"] != 200:
+            return False
+
+        data["data"]["icons"] = self.icons
+        path = await render_html(data["temp"], data["data"], return_url=False, options=IMAGE_OPTIONS)
+        expires_at = expire_at_weekly_reset() if name in WEEKLY_RANK_NAMES else expire_at_daily_reset()
+        self._images[(name, server)] = (expires_at, path)
+        return True
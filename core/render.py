@@ -0,0 +1,63 @@
+import asyncio
+from typing import Dict
+
+from astrbot.core import html_renderer
+
+from .render_cache import RenderCache
+
+
+# 图片类指令统一使用的渲染参数
+IMAGE_OPTIONS = {
+    "quality": 100,
+    "device_scale_factor_level": "normal",
+    "full_page": True,
+    "omit_background": False,
+    "type": "jpeg"
+}
+
+# 正在渲染的缓存键 -> 渲染任务，相同内容的并发渲染共用一次
+_pending: Dict[str, asyncio.Task] = {}
+
+
+async def render_html(
+    tmpl: str,
+    data: dict,
+    return_url=True,
+    options: dict | None = None,
+    cache: RenderCache | None = None,
+) -> str:
+    """渲染 HTML 模板，返回图片 URL 或本地路径。
+
+    传入 cache 时命中直接返回缓存图片路径；未命中时相同内容的并发请求等待同一次渲染。
+    """
+    if cache is None:
+        return await html_renderer.render_custom_template(
+            tmpl,
+            data,
+            return_url=return_url,
+            options=options,
+        )
+
+    key = cache.make_key(tmpl, data, options)
+    path = cache.get(key)
+    if path:
+        return path
+
+    task = _pending.get(key)
+    if task is None:
+        task = _pending[key] = asyncio.create_task(_render_to_cache(tmpl, data, options, cache, key))
+        task.add_done_callback(lambda _: _pending.pop(key, None))
+    # 单个等待方被取消时不影响其他等待方
+    return await asyncio.shield(task)
+
+
+async def _render_to_cache(tmpl: str, data: dict, options: dict | None, cache: RenderCache, key: str) -> str:
+    path = await html_renderer.render_custom_template(
+        tmpl,
+        data,
+        return_url=False,
+        options=options,
+    )
+    loop = asyncio.get_running_loop()
+    stored, size = await loop.run_in_executor(None, cache.store_file, key, path)
+    return cache.add(key, stored, size)
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from astrbot.api import logger
+
+
+# 不参与缓存键的数据字段：图标是启动时加载的静态资源，由 salt 统一区分
+IGNORED_DATA_KEYS = ("icons",)
+
+
+class RenderCache:
+    """内容寻址的渲染结果缓存。
+
+    以 (模板, 数据, 渲染参数) 的 SHA-256 为键，把渲染出的图片保存在本地目录；
+    总字节数超过上限时按最近使用时间淘汰。最近使用时间同时写入文件修改时间，
+    插件重载后扫描目录即可恢复淘汰顺序。
+    """
+
+    def __init__(self, root: Path, max_bytes: int, salt: str = ""):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.salt = salt
+        # 键 -> (文件路径, 字节数)，按最近使用排序
+        self._entries: OrderedDict[str, Tuple[Path, int]] = OrderedDict()
+        self.total_bytes = 0
+        self._loaded = False
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._entries)
+
+    def make_key(self, tmpl: str, data: Optional[Dict[str, Any]], options: Optional[Dict[str, Any]]) -> str:
+        payload = {k: v for k, v in (data or {}).items() if k not in IGNORED_DATA_KEYS}
+        digest = hashlib.sha256()
+        for part in (
+            self.salt,
+            tmpl,
+            json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str),
+            json.dumps(options or {}, sort_keys=True),
+        ):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _ensure_loaded(self):
+        """首次使用时扫描缓存目录，按修改时间恢复淘汰顺序"""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            files = [(entry.stat(), Path(entry.path)) for entry in os.scandir(self.root) if entry.is_file()]
+        except OSError as e:
+            logger.error(f"读取渲染缓存目录失败: {e}")
+            return
+
+        for stat, path in sorted(files, key=lambda row: row[0].st_mtime):
+            if path.name.endswith(".tmp"):
+                path.unlink(missing_ok=True)
+                continue
+            self._entries[path.stem] = (path, stat.st_size)
+            self.total_bytes += stat.st_size
+        self._evict()
+        logger.debug(f"渲染缓存已加载，共 {len(self._entries)} 个文件、{self.total_bytes // 1024} KB")
+
+    def get(self, key: str) -> Optional[str]:
+        """命中时返回本地图片路径并刷新最近使用时间"""
+        self._ensure_loaded()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        path, size = entry
+        try:
+            os.utime(path)
+        except OSError:
+            # 文件被外部删除
+            self._entries.pop(key, None)
+            self.total_bytes -= size
+            return None
+        self._entries.move_to_end(key)
+        return str(path)
+
+    def store_file(self, key: str, source: str) -> Tuple[Path, int]:
+        """把渲染出的临时文件移入缓存目录，只做文件操作，可放入线程池执行。
+
+        同一文件系统内直接移动；跨文件系统时先复制再原子替换，随后删除源文件。
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        source_path = Path(source)
+        path = self.root / f"{key}{source_path.suffix}"
+        try:
+            os.replace(source_path, path)
+        except OSError:
+            tmp = path.with_name(path.name + ".tmp")
+            shutil.copyfile(source_path, tmp)
+            os.replace(tmp, path)
+            source_path.unlink(missing_ok=True)
+        return path, path.stat().st_size
+
+    def add(self, key: str, path: Path, size: int) -> str:
+        """登记已写入的缓存文件并按总字节数淘汰，返回缓存文件路径"""
+        self._ensure_loaded()
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+        self._entries[key] = (path, size)
+        self.total_bytes += size
+        self._evict()
+        return str(path)
+
+    def _evict(self):
+        # 至少保留刚写入的一项
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (path, size) = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.error(f"删除渲染缓存失败: {e}")
@@ -0,0 +1,227 @@
+"""本地数据表结构
+
+每张表对应一组建表语句（含索引与初始行），插件初始化与测试共用同一份定义；
+旧版数据的迁移仍在插件的 init_*_data 中执行。
+"""
+
+BILEI = (
+    """
+    CREATE TABLE IF NOT EXISTS bilei(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        text TEXT,
+        time TEXT,
+        user TEXT
+    )
+    """,
+)
+
+TUISHONG = (
+    """
+    CREATE TABLE IF NOT EXISTS tuishong (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        kfts INTEGER DEFAULT 1,
+        xwts INTEGER DEFAULT 0,
+        smts INTEGER DEFAULT 0,
+        ctts INTEGER DEFAULT 0
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO tuishong (id)
+    VALUES (1)
+    """,
+)
+
+PUSH_STATE = (
+    """
+    CREATE TABLE IF NOT EXISTS push_state(
+        task TEXT NOT NULL,
+        server TEXT NOT NULL,
+        status TEXT,
+        updated_at INTEGER NOT NULL,
+        PRIMARY KEY (task, server)
+    )
+    """,
+)
+
+PUSH_RETRY = (
+    """
+    CREATE TABLE IF NOT EXISTS push_retry(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        umo TEXT NOT NULL,
+        source TEXT NOT NULL,
+        content TEXT NOT NULL,
+        image TEXT,
+        attempts INTEGER NOT NULL DEFAULT 1,
+        next_at REAL NOT NULL,
+        created_at REAL NOT NULL,
+        last_error TEXT
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_push_retry_next
+    ON push_retry(next_at)
+    """,
+)
+
+PUSH_SUBSCRIPTION = (
+    """
+    CREATE TABLE IF NOT EXISTS push_subscription(
+        topic TEXT NOT NULL,
+        server TEXT NOT NULL DEFAULT '',
+        umo TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        PRIMARY KEY (topic, server, umo)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_push_subscription_umo
+    ON push_subscription(umo)
+    """,
+)
+
+PUSH_ACTIVITY = (
+    """
+    CREATE TABLE IF NOT EXISTS push_activity(
+        task TEXT NOT NULL,
+        slot INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (task, slot)
+    ) WITHOUT ROWID
+    """,
+)
+
+PUSH_SEEN = (
+    """
+    CREATE TABLE IF NOT EXISTS push_seen(
+        topic TEXT NOT NULL,
+        key TEXT NOT NULL,
+        seen_at INTEGER NOT NULL,
+        PRIMARY KEY (topic, key)
+    ) WITHOUT ROWID
+    """,
+)
+
+OUTBOUND_QUEUE = (
+    """
+    CREATE TABLE IF NOT EXISTS outbound_queue(
+        id TEXT PRIMARY KEY,
+        umo TEXT NOT NULL,
+        priority INTEGER NOT NULL,
+        content TEXT,
+        image TEXT,
+        created_at REAL NOT NULL
+    )
+    """,
+)
+
+ACHIEVEMENT_CACHE = (
+    """
+    CREATE TABLE IF NOT EXISTS achievement_cache(
+        key TEXT PRIMARY KEY,
+        content TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """,
+)
+
+KEJU_BANK = (
+    """
+    CREATE TABLE IF NOT EXISTS keju_bank(
+        id INTEGER PRIMARY KEY,
+        question TEXT NOT NULL,
+        answer TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """,
+)
+
+PRICE_SERIES = (
+    """
+    CREATE TABLE IF NOT EXISTS price_series(
+        series TEXT NOT NULL,
+        server TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        value REAL NOT NULL,
+        PRIMARY KEY (series, server, ts)
+    ) WITHOUT ROWID
+    """,
+)
+
+PAYLOAD_CACHE = (
+    """
+    CREATE TABLE IF NOT EXISTS payload_cache(
+        key TEXT PRIMARY KEY,
+        content TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    """,
+)
+
+SERENDIPITY_EVENT = (
+    """
+    CREATE TABLE IF NOT EXISTS serendipity_event(
+        server TEXT NOT NULL,
+        name TEXT NOT NULL,
+        event TEXT NOT NULL,
+        level INTEGER NOT NULL DEFAULT 0,
+        time INTEGER NOT NULL,
+        PRIMARY KEY (server, name, event, time)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_serendipity_event_server_time
+    ON serendipity_event (server, time)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_serendipity_event_event
+    ON serendipity_event (server, event, time)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS serendipity_ingest(
+        server TEXT PRIMARY KEY,
+        since INTEGER NOT NULL,
+        last_poll INTEGER NOT NULL,
+        watermark INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+)
+
+SERENDIPITY_CATALOG = (
+    """
+    CREATE TABLE IF NOT EXISTS serendipity_catalog(
+        name TEXT PRIMARY KEY,
+        dw_id INTEGER,
+        level INTEGER,
+        achievement_id INTEGER,
+        updated_at INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS serendipity_catalog_meta(
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """,
+)
+
+# 推送任务用到的表，推送相关测试据此建库
+PUSH_TABLES = (TUISHONG, PUSH_STATE, PUSH_RETRY, PUSH_SUBSCRIPTION, PUSH_ACTIVITY, PUSH_SEEN, OUTBOUND_QUEUE)
+
+ALL_TABLES = (
+    BILEI,
+    *PUSH_TABLES,
+    ACHIEVEMENT_CACHE,
+    KEJU_BANK,
+    PRICE_SERIES,
+    PAYLOAD_CACHE,
+    SERENDIPITY_EVENT,
+    SERENDIPITY_CATALOG,
+)
+
+
+async def create_tables(db, *tables):
+    """依次执行各表的建表语句，语句均可重复执行"""
+    for statements in tables:
+        for sql in statements:
+            await db.execute(sql)
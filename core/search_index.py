@@ -0,0 +1,122 @@
+import re
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+_STRIP_PATTERN = re.compile(r"[\s　，。、；：？！“”‘’（）《》【】,.;:?!\"'()\[\]<>·\-_]+")
+
+
+def normalize_text(text: str) -> str:
+    """统一大小写并去除空白和标点，用于索引与查询"""
+    return _STRIP_PATTERN.sub("", str(text or "")).lower()
+
+
+def text_grams(text: str, n: int = 2) -> Set[str]:
+    """切分 n-gram，短于 n 的文本整体作为一个片段"""
+    if not text:
+        return set()
+    if len(text) <= n:
+        return {text}
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein 距离，超过 limit 时提前返回 limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class NgramIndex:
+    """基于 n-gram 倒排表的内存模糊检索索引。
+
+    查询时只访问与输入共享片段的文档，按覆盖率、Dice 系数和子串命中排序，
+    可容忍部分输入和个别错字。
+    """
+
+    def __init__(self, n: int = 2):
+        self.n = n
+        self._texts: Dict[Hashable, str] = {}
+        self._grams: Dict[Hashable, Set[str]] = {}
+        self._postings: Dict[str, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._texts
+
+    def clear(self):
+        self._texts.clear()
+        self._grams.clear()
+        self._postings.clear()
+
+    def add(self, doc_id: Hashable, text: str):
+        """写入或覆盖一条文档"""
+        if doc_id in self._texts:
+            self.remove(doc_id)
+
+        normalized = normalize_text(text)
+        if not normalized:
+            return
+
+        grams = text_grams(normalized, self.n)
+        self._texts[doc_id] = normalized
+        self._grams[doc_id] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(doc_id)
+
+    def add_many(self, docs: Iterable[Tuple[Hashable, str]]):
+        for doc_id, text in docs:
+            self.add(doc_id, text)
+
+    def remove(self, doc_id: Hashable):
+        grams = self._grams.pop(doc_id, set())
+        self._texts.pop(doc_id, None)
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                continue
+            posting.discard(doc_id)
+            if not posting:
+                del self._postings[gram]
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.0) -> List[Tuple[Hashable, float]]:
+        """返回按得分降序排列的 (文档ID, 得分)，得分范围 0~1"""
+        normalized = normalize_text(query)
+        if not normalized:
+            return []
+
+        query_grams = text_grams(normalized, self.n)
+        hits: Counter = Counter()
+        for gram in query_grams:
+            for doc_id in self._postings.get(gram, ()):
+                hits[doc_id] += 1
+
+        scored = []
+        for doc_id, common in hits.items():
+            doc_text = self._texts[doc_id]
+            coverage = common / len(query_grams)
+            dice = 2 * common / (len(query_grams) + len(self._grams[doc_id]))
+            score = 0.7 * coverage + 0.3 * dice
+            if normalized == doc_text:
+                score = 1.0
+            elif normalized in doc_text:
+                score = max(score, 0.9 + 0.09 * len(normalized) / len(doc_text))
+            if score >= min_score:
+                scored.append((doc_id, round(score, 4)))
+
+        scored.sort(key=lambda row: (-row[1], len(self._texts[row[0]])))
+        return scored[:limit]
+
+    def text_of(self, doc_id: Hashable) -> Optional[str]:
+        """返回文档归一化后的文本"""
+        return self._texts.get(doc_id)
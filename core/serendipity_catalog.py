@@ -0,0 +1,213 @@
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from astrbot.api import logger
+
+from .sqlite import AsyncSQLiteDB
+from .search_index import NgramIndex, edit_distance, normalize_text
+
+
+# 常见简称，补充前缀和子串匹配覆盖不到的叫法
+SERENDIPITY_ALIASES = {
+    "捕王": "清风捕王",
+    "厨神": "炼狱厨神",
+    "宝驹": "塞外宝驹",
+    "小猫": "寻猫记",
+    "镖局": "镖行天下",
+}
+
+# 奇遇图标目录中不是奇遇名称的文件
+_NON_SERENDIPITY_ICONS = {"未触发", "绝世奇遇"}
+
+# 奇遇目录刷新周期
+CATALOG_REFRESH_SECONDS = 7 * 86400
+
+# 模糊匹配最低得分
+CATALOG_MIN_SCORE = 0.6
+
+
+class SerendipityCatalog:
+    """奇遇目录：名称、别名、等级与 dwID、成就 ID 的本地索引。
+
+    名称来自 JX3BOX 奇遇列表和本地奇遇图标，按精确、别名、前缀、子串、
+    编辑距离和 n-gram 综合排序；dwID 到成就 ID 的映射首次查询后持久化。
+    """
+
+    def __init__(self, sqlite: AsyncSQLiteDB):
+        self._sql_db = sqlite
+        # 名称 -> {"name", "dw_id", "level", "achievement_id"}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # 归一化名称或别名 -> 名称
+        self._exact: Dict[str, str] = {}
+        self._grams = NgramIndex()
+        # 最近一次完整刷新的时间，单条补查不计入
+        self.updated_at: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.updated_at > CATALOG_REFRESH_SECONDS
+
+    async def load(self):
+        """读取本地目录"""
+        try:
+            rows = await self._sql_db.select_all("serendipity_catalog")
+        except Exception as e:
+            logger.error(f"读取奇遇目录失败: {e}")
+            return
+        for row in rows:
+            self._put(row)
+
+        try:
+            meta = await self._sql_db.fetch_one(
+                "SELECT value FROM serendipity_catalog_meta WHERE key='refreshed_at'"
+            )
+        except Exception as e:
+            logger.error(f"读取奇遇目录刷新时间失败: {e}")
+            return
+        self.updated_at = int(meta["value"]) if meta else 0
+
+    async def mark_refreshed(self):
+        """完整刷新成功后记录刷新时间"""
+        now = int(time.time())
+        try:
+            await self._sql_db.execute(
+                """
+                INSERT INTO serendipity_catalog_meta (key, value) VALUES ('refreshed_at', ?)
+                ON CONFLICT(key) DO UPDATE SET value=excluded.value
+                """,
+                (now,),
+            )
+        except Exception as e:
+            logger.error(f"写入奇遇目录刷新时间失败: {e}")
+        self.updated_at = now
+
+    def seed_names(self, names: Iterable[str]):
+        """用本地奇遇图标名称补充目录，只建立名称索引，不写库"""
+        for name in names:
+            if name and name not in _NON_SERENDIPITY_ICONS and name not in self._entries:
+                self._put({"name": name})
+
+    def _put(self, row: Dict[str, Any]):
+        name = row["name"]
+        entry = self._entries.setdefault(name, {"name": name, "dw_id": None, "level": None, "achievement_id": None})
+        for key in ("dw_id", "level", "achievement_id"):
+            if row.get(key) is not None:
+                entry[key] = row[key]
+
+        self._exact[normalize_text(name)] = name
+        self._grams.add(name, name)
+        for alias, target in SERENDIPITY_ALIASES.items():
+            if target == name:
+                self._exact.setdefault(normalize_text(alias), name)
+
+    @staticmethod
+    def parse_node_item(item: Any) -> Optional[Dict[str, Any]]:
+        """转换 JX3BOX 奇遇列表条目"""
+        if not isinstance(item, dict):
+            return None
+        name = item.get("szName") or item.get("name")
+        dw_id = item.get("dwID")
+        if not name or dw_id is None:
+            return None
+        level = item.get("nClassify", item.get("type"))
+        try:
+            level = int(level) if level is not None else None
+        except (TypeError, ValueError):
+            level = None
+        return {"name": str(name), "dw_id": int(dw_id), "level": level}
+
+    async def upsert(self, items: Iterable[Any]) -> int:
+        """写入 JX3BOX 奇遇列表条目，返回写入条数"""
+        now = int(time.time())
+        rows = []
+        for item in items or []:
+            row = self.parse_node_item(item)
+            if row:
+                rows.append(row)
+                self._put(row)
+        if not rows:
+            return 0
+
+        try:
+            await self._sql_db.executemany(
+                """
+                INSERT INTO serendipity_catalog (name, dw_id, level, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    dw_id=excluded.dw_id,
+                    level=excluded.level,
+                    updated_at=excluded.updated_at
+                """,
+                [(row["name"], row["dw_id"], row["level"], now) for row in rows],
+            )
+        except Exception as e:
+            logger.error(f"写入奇遇目录失败: {e}")
+            return 0
+        return len(rows)
+
+    async def set_achievement(self, name: str, achievement_id: int):
+        """记录奇遇对应的成就 ID"""
+        entry = self._entries.get(name)
+        if entry is None:
+            return
+        entry["achievement_id"] = achievement_id
+        try:
+            await self._sql_db.execute(
+                "UPDATE serendipity_catalog SET achievement_id=? WHERE name=?",
+                (achievement_id, name),
+            )
+        except Exception as e:
+            logger.error(f"写入奇遇成就映射失败: {e}")
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(name)
+        return dict(entry) if entry else None
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """按匹配程度排序返回 (名称, 得分)"""
+        key = normalize_text(query)
+        if not key:
+            return []
+
+        exact = self._exact.get(key)
+        if exact:
+            return [(exact, 1.0)]
+
+        scores: Dict[str, float] = {}
+
+        def bump(name: str, score: float):
+            if score > scores.get(name, 0.0):
+                scores[name] = score
+
+        limit_distance = 1 if len(key) <= 3 else 2
+        for norm, name in self._exact.items():
+            ratio = len(key) / max(len(norm), 1)
+            if norm.startswith(key):
+                bump(name, 0.95 + 0.04 * ratio)
+            elif key in norm:
+                bump(name, 0.9 + 0.04 * ratio)
+            elif len(norm) > 1:
+                distance = edit_distance(key, norm, limit_distance)
+                if distance <= limit_distance:
+                    bump(name, 0.85 - 0.1 * (distance - 1) - 0.05 * (distance / len(norm)))
+
+        for name, score in self._grams.search(key, limit=limit * 2):
+            bump(name, 0.8 * score)
+
+        ranked = sorted(scores.items(), key=lambda row: (-row[1], len(row[0])))
+        return [(name, round(score, 4)) for name, score in ranked[:limit]]
+
+    def resolve(self, query: str) -> Optional[Dict[str, Any]]:
+        """返回最匹配的目录条目，得分过低时返回 None"""
+        ranked = self.search(query, limit=1)
+        if not ranked or ranked[0][1] < CATALOG_MIN_SCORE:
+            return None
+        return self.get(ranked[0][0])
+
+    def resolve_name(self, query: str) -> str:
+        """返回最匹配的奇遇名称，无法匹配时原样返回"""
+        entry = self.resolve(query)
+        return entry["name"] if entry else query
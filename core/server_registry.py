@@ -0,0 +1,120 @@
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from astrbot.api import logger
+
+from .search_index import normalize_text
+
+try:
+    from pypinyin import lazy_pinyin, Style
+except ImportError:  # 可选依赖，缺失时不支持拼音首字母
+    lazy_pinyin = None
+    Style = None
+
+
+# 常用简称与合服前的旧服名，指向当前服务器名称
+SERVER_ALIASES = {
+    "双梦": "梦江南",
+    "双梦镇": "梦江南",
+    "如梦令": "梦江南",
+    "枫泾古镇": "梦江南",
+    "唯满侠": "唯我独尊",
+    "华乾": "乾坤一掷",
+    "乾坤": "乾坤一掷",
+    "鹅服": "天鹅坪",
+    "天鹅": "天鹅坪",
+    "破阵": "破阵子",
+    "飞龙": "飞龙在天",
+    "幽月": "幽月轮",
+    "斗转": "斗转星移",
+    "绝代": "绝代天骄",
+    "剑胆": "剑胆琴心",
+    "龙虎": "龙争虎斗",
+    "长安": "长安城",
+    "蝶服": "蝶恋花",
+    "青梅": "青梅煮酒",
+    "眉间": "眉间雪",
+}
+
+
+def pinyin_initials(text: str) -> str:
+    """汉字拼音首字母，未安装 pypinyin 时返回空串"""
+    if lazy_pinyin is None:
+        return ""
+    return "".join(lazy_pinyin(text, style=Style.FIRST_LETTER)).lower()
+
+
+class ServerRegistry:
+    """区服注册表：以区服状态接口的完整列表为准，在本地完成服务器名称的归一和校验。
+
+    索引键统一经过 normalize_text，依次匹配正式名称、别名、拼音首字母和唯一前缀；
+    列表尚未加载时不做校验，原样放行。
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, str]] = None):
+        self._extra_aliases = dict(aliases or {})
+        # 正式名称 -> 所属大区
+        self.zones: Dict[str, str] = {}
+        # 归一化键 -> 正式名称
+        self._index: Dict[str, str] = {}
+        self.updated_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.zones)
+
+    @property
+    def servers(self) -> List[str]:
+        return list(self.zones)
+
+    def update(self, items: Iterable[Any]):
+        """用区服状态接口的完整列表重建索引"""
+        zones = {}
+        for item in items or []:
+            if isinstance(item, dict) and item.get("server"):
+                zones[str(item["server"])] = str(item.get("zone") or "")
+        if not zones:
+            return
+
+        index: Dict[str, str] = {}
+        initials: Dict[str, List[str]] = {}
+        for name in zones:
+            index[normalize_text(name)] = name
+            abbr = pinyin_initials(name)
+            if abbr:
+                initials.setdefault(abbr, []).append(name)
+
+        # 首字母冲突的服务器不收录，避免猜错
+        for abbr, names in initials.items():
+            if len(names) == 1:
+                index.setdefault(abbr, names[0])
+
+        for alias, target in {**SERVER_ALIASES, **self._extra_aliases}.items():
+            if target in zones:
+                index.setdefault(normalize_text(alias), target)
+
+        self.zones = zones
+        self._index = index
+        self.updated_at = time.time()
+        logger.debug(f"区服注册表已更新，共 {len(zones)} 个服务器")
+
+    def resolve(self, text: str) -> Optional[str]:
+        """归一化服务器名称，无法识别时返回 None"""
+        key = normalize_text(text)
+        if not key:
+            return None
+
+        name = self._index.get(key)
+        if name:
+            return name
+
+        # 唯一前缀或唯一包含，如“梦江”
+        candidates = [n for n in self.zones if normalize_text(n).startswith(key)]
+        if not candidates:
+            candidates = [n for n in self.zones if key in normalize_text(n)]
+        if len(candidates) == 1:
+            return candidates[0]
+        return None
+
+    def zone_of(self, server: str) -> str:
+        return self.zones.get(server, "")
@@ -37,6 +37,10 @@ class AsyncSQLiteDB:
         async with self.conn.execute(sql, params):
             await self.conn.commit()
 
+    async def executemany(self, sql: str, seq_params: List[Tuple]):
+        await self.conn.executemany(sql, seq_params)
+        await self.conn.commit()
+
     async def fetch_one(self, sql: str, params: Tuple = ()) -> Optional[Dict[str, Any]]:
         async with self.conn.execute(sql, params) as cursor:
             row = await cursor.fetchone()
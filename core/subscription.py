@@ -0,0 +1,176 @@
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from astrbot.api import logger
+
+from .sqlite import AsyncSQLiteDB
+
+
+# 订阅指令中的主题名称 -> 推送任务键
+SUBSCRIPTION_TOPICS = {
+    "开服": "kfts",
+    "新闻": "xwts",
+    "维护": "whts",
+    "刷马": "smts",
+    "赤兔": "ctts",
+    "关隘": "gats",
+    "的卢": "dlts",
+    "诛恶": "zets",
+}
+
+# 按服务器订阅的主题，其余主题不区分服务器
+SERVER_TOPICS = {"kfts", "smts", "ctts", "gats", "dlts", "zets"}
+
+TOPIC_NAMES = {key: name for name, key in SUBSCRIPTION_TOPICS.items()}
+
+# 订阅来源
+SOURCE_CONFIG = "config"
+SOURCE_COMMAND = "command"
+
+
+class SubscriptionRegistry:
+    """推送订阅表：主题 + 服务器 -> 会话。
+
+    指令添加的订阅持久化在 push_subscription 表，配置文件中的订阅只保存在内存；
+    内存中维护主题 -> 服务器 -> 会话的索引和会话 -> 订阅的反向索引，
+    后台任务每轮直接读取索引，订阅变化无需重载插件或重建任务。
+    """
+
+    def __init__(self, sqlite: AsyncSQLiteDB):
+        self._sql_db = sqlite
+        # 主题 -> 服务器 -> {会话: 来源}，会话按订阅先后排序
+        self._index: Dict[str, Dict[str, Dict[str, str]]] = {}
+        # 会话 -> {(主题, 服务器)}
+        self._by_umo: Dict[str, Set[Tuple[str, str]]] = {}
+
+    def _init_return_data(self) -> Dict[str, Any]:
+        """初始化标准的返回数据结构"""
+        return {
+            "code": 0,
+            "msg": "功能函数未执行",
+            "data": {}
+        }
+
+    def _put(self, topic: str, server: str, umo: str, source: str):
+        sessions = self._index.setdefault(topic, {}).setdefault(server, {})
+        # 配置来源优先，避免指令退订配置文件中的订阅
+        if sessions.get(umo) != SOURCE_CONFIG:
+            sessions[umo] = source
+        self._by_umo.setdefault(umo, set()).add((topic, server))
+
+    def _drop(self, topic: str, server: str, umo: str):
+        servers = self._index.get(topic, {})
+        sessions = servers.get(server, {})
+        sessions.pop(umo, None)
+        if not sessions:
+            servers.pop(server, None)
+        keys = self._by_umo.get(umo)
+        if keys is not None:
+            keys.discard((topic, server))
+            if not keys:
+                self._by_umo.pop(umo, None)
+
+    async def load(self):
+        """读取持久化订阅"""
+        try:
+            rows = await self._sql_db.fetch_all(
+                "SELECT topic, server, umo FROM push_subscription ORDER BY created_at"
+            )
+        except Exception as e:
+            logger.error(f"读取推送订阅失败: {e}")
+            return
+        for row in rows:
+            self._put(row["topic"], row["server"], row["umo"], SOURCE_COMMAND)
+        logger.debug(f"推送订阅已加载，共 {len(rows)} 条")
+
+    def seed(self, topic: str, server: str, umo: str):
+        """登记配置文件中的订阅，不写库"""
+        self._put(topic, server, umo, SOURCE_CONFIG)
+
+    def sessions(self, topic: str, server: str = "") -> List[str]:
+        return list(self._index.get(topic, {}).get(server, {}))
+
+    def servers(self, topic: str) -> List[str]:
+        return list(self._index.get(topic, {}))
+
+    def count(self, topic: str) -> int:
+        return sum(len(sessions) for sessions in self._index.get(topic, {}).values())
+
+    def topics_of(self, umo: str) -> List[Tuple[str, str]]:
+        return sorted(self._by_umo.get(umo, ()))
+
+    # --- 业务功能函数 ---
+    async def subscribe(self, topic: str, server: str, umo: str) -> Dict[str, Any]:
+        """订阅 主题 服务器"""
+        return_data = self._init_return_data()
+        label = f"{TOPIC_NAMES[topic]}{f'（{server}）' if server else ''}"
+
+        if umo in self._index.get(topic, {}).get(server, {}):
+            return_data["msg"] = f"本会话已订阅{label}推送"
+            return return_data
+
+        try:
+            await self._sql_db.execute(
+                """
+                INSERT OR IGNORE INTO push_subscription (topic, server, umo, created_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (topic, server, umo, int(time.time())),
+            )
+        except Exception as e:
+            logger.error(f"写入推送订阅失败: {e}")
+            return_data["msg"] = "订阅失败"
+            return return_data
+
+        self._put(topic, server, umo, SOURCE_COMMAND)
+        return_data["data"] = f"已订阅{label}推送"
+        return_data["code"] = 200
+        return return_data
+
+    async def unsubscribe(self, topic: str, server: str, umo: str) -> Dict[str, Any]:
+        """退订 主题 服务器"""
+        return_data = self._init_return_data()
+        label = f"{TOPIC_NAMES[topic]}{f'（{server}）' if server else ''}"
+
+        source = self._index.get(topic, {}).get(server, {}).get(umo)
+        if source is None:
+            return_data["msg"] = f"本会话未订阅{label}推送"
+            return return_data
+        if source == SOURCE_CONFIG:
+            return_data["msg"] = f"{label}推送订阅来自插件配置，请在配置中移除"
+            return return_data
+
+        try:
+            await self._sql_db.delete(
+                "push_subscription",
+                "topic=? AND server=? AND umo=?",
+                (topic, server, umo),
+            )
+        except Exception as e:
+            logger.error(f"删除推送订阅失败: {e}")
+            return_data["msg"] = "退订失败"
+            return return_data
+
+        self._drop(topic, server, umo)
+        return_data["data"] = f"已退订{label}推送"
+        return_data["code"] = 200
+        return return_data
+
+    async def list_of(self, umo: str) -> Dict[str, Any]:
+        """我的订阅"""
+        return_data = self._init_return_data()
+        keys = self.topics_of(umo)
+        if not keys:
+            return_data["msg"] = "本会话暂无推送订阅"
+            return return_data
+
+        return_data["data"] = "本会话推送订阅：\n" + "\n".join(
+            f"{TOPIC_NAMES.get(topic, topic)}{f'（{server}）' if server else ''}"
+            for topic, server in keys
+        )
+        return_data["code"] = 200
+        return return_data
+
+    @staticmethod
+    def topic_key(name: str) -> Optional[str]:
+        return SUBSCRIPTION_TOPICS.get(name) or (name if name in TOPIC_NAMES else None)
@@ -0,0 +1,139 @@
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Set
+
+from .catalog import ColumnarTable
+
+
+class TradeItemIndex:
+    """交易行物品库的预建检索索引。
+
+    物品库只展开一次并按列存入 ColumnarTable，建立按名称排序的前缀表（完全匹配
+    是其中名称相等的一段）和字符二元组倒排表，排序所需的 (名称长度, 名称) 次序在建索引时预先算好；
+    查询结果与逐条扫描 `keyword in label` 一致，按完全匹配、前缀匹配、包含匹配的顺序返回。
+    """
+
+    def __init__(self):
+        self.table = self._new_table()
+        # 物品行号 -> 全局 (名称长度, 名称) 次序
+        self._order = array("l")
+        # 按名称排序的物品行号，用于二分查找前缀
+        self._sorted = array("l")
+        self._postings: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @staticmethod
+    def _new_table() -> ColumnarTable:
+        return ColumnarTable(None, str_columns=("item_id", "label", "icon"))
+
+    def _label(self, offset: int) -> str:
+        return self.table.get(offset, "label")
+
+    @staticmethod
+    def flatten(groups: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """从交易行物品分组中提取可查询物品"""
+        items = []
+        for group in groups:
+            if not isinstance(group, dict):
+                continue
+            for item in group.get("items", []) or []:
+                if not isinstance(item, dict):
+                    continue
+                item_id = item.get("item_id")
+                label = item.get("label")
+                if not item_id or not label:
+                    continue
+                items.append(
+                    {
+                        "item_id": str(item_id),
+                        "label": str(label),
+                        "icon": str(item.get("icon") or ""),
+                    }
+                )
+        return items
+
+    @staticmethod
+    def _keys(text: str) -> Set[str]:
+        """单字与相邻二字片段"""
+        keys = set(text)
+        keys.update(text[i:i + 2] for i in range(len(text) - 1))
+        return keys
+
+    def build(self, groups: List[Dict[str, Any]]):
+        """用物品分组重建索引"""
+        table = self._new_table()
+        table.extend(self.flatten(groups))
+        table.freeze()
+        labels = [table.get(i, "label") for i in range(len(table))]
+
+        ranked = sorted(range(len(labels)), key=lambda i: (len(labels[i]), labels[i], i))
+        order = array("l", bytes(array("l").itemsize * len(labels)))
+        for position, index in enumerate(ranked):
+            order[index] = position
+
+        postings: Dict[str, List[int]] = {}
+        for index, label in enumerate(labels):
+            for key in self._keys(label):
+                postings.setdefault(key, []).append(index)
+
+        self.table = table
+        self._order = order
+        self._sorted = array("l", sorted(range(len(labels)), key=lambda i: (labels[i], i)))
+        self._postings = {key: array("l", rows) for key, rows in postings.items()}
+
+    def _prefix(self, keyword: str) -> List[int]:
+        result = []
+        start = bisect_left(self._sorted, keyword, key=self._label)
+        for index in self._sorted[start:]:
+            if not self._label(index).startswith(keyword):
+                break
+            result.append(index)
+        return result
+
+    def _contains(self, keyword: str) -> Set[int]:
+        # 单字查询直接取倒排表，长查询取所有二字片段倒排表的交集后校验子串
+        if len(keyword) == 1:
+            return set(self._postings.get(keyword, ()))
+
+        grams = sorted(
+            (keyword[i:i + 2] for i in range(len(keyword) - 1)),
+            key=lambda gram: len(self._postings.get(gram, ())),
+        )
+        candidates = None
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if not posting:
+                return set()
+            candidates = set(posting) if candidates is None else candidates.intersection(posting)
+            if not candidates:
+                return set()
+        return {i for i in candidates if keyword in self._label(i)}
+
+    def search(self, keyword: str, limit: int = 50) -> List[Dict[str, str]]:
+        """按物品名模糊匹配交易行物品，同一物品 ID 只保留排序最靠前的一条"""
+        keyword = (keyword or "").strip()
+        if not keyword or not len(self.table):
+            return []
+
+        prefix = self._prefix(keyword)
+        ranked = [(0 if self._label(i) == keyword else 1, self._order[i], i) for i in prefix]
+
+        # 完全与前缀匹配已足够时不再计算包含匹配
+        if len({self.table.get(i, "item_id") for _, _, i in ranked}) < limit:
+            seen = set(prefix)
+            ranked += [(2, self._order[i], i) for i in self._contains(keyword) if i not in seen]
+
+        ranked.sort()
+        result = []
+        seen_ids = set()
+        for _, _, index in ranked:
+            item = self.table.record(index)
+            if item["item_id"] in seen_ids:
+                continue
+            seen_ids.add(item["item_id"])
+            result.append(item)
+            if len(result) >= limit:
+                break
+        return result
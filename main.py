@@ -1,4 +1,6 @@
+import hashlib
 import inspect
+import json
 from pathlib import Path
 from typing import cast
 
@@ -12,14 +14,20 @@ from .core.jx3api_data import JX3APIService
 from .core.aijx3_data import AIJX3Service
 from .core.jx3box_data import JX3BOXService
 from .core.async_task import AsyncTask
+from .core.rank_sweep import RankSweep
 from .core.bilei_data import BiLeidata
 from .core.message import MessageBuilder
+from .core.render_cache import RenderCache
+from .core.price_store import CHART_CACHE_BYTES, TREND_SPANS, item_series
+from .core.outbound import OutboundQueue
+from .core import schema
+from .core.schema import create_tables
 from .core.fun_basic import load_as_base64
 
 @register("astrbot_plugin_jx3", 
           "fxdyz", 
           "聚合剑网三游戏数据，提供查询、图片渲染、本地避雷和后台推送。",
-          "3.2.1",
+          "3.3.0",
           "https://github.com/qsc20001102/astrbot_plugin_jx3"
 )
 class Jx3ApiPlugin(Star):
@@ -59,10 +67,30 @@ class Jx3ApiPlugin(Star):
             # 数据库初始化
             await self.init_bilei_data()
             await self.init_tuishong_data()
+            await self.init_push_state_data()
+            await self.init_push_retry_data()
+            await self.init_push_subscription_data()
+            await self.init_push_activity_data()
+            await self.init_push_seen_data()
+            await self.init_outbound_queue_data()
             await self.init_achievement_cache_data()
+            await self.init_keju_data()
+            await self.init_price_data()
+            await self.init_payload_cache_data()
+            await self.init_serendipity_event_data()
+            await self.init_serendipity_catalog_data()
 
             # 连接插件数据
             await self.plugin_sql_db.connect()
+            # 心法别名表载入内存
+            await self.jx3box.kungfu_aliases.load()
+
+            # 加载区服列表，失败时不做服务器校验
+            if not await self.jx3api.refresh_servers():
+                logger.warning("区服列表加载失败，服务器参数将不做本地校验")
+
+            # 恢复上次未发出的消息
+            await self.outbound.load()
 
             # 开启后台推送
             await self.jx3at.init_tasks()
@@ -85,6 +113,10 @@ class Jx3ApiPlugin(Star):
         if self.jx3at:
             await self.jx3at.destroy()
 
+        # 未发出的消息留在 outbound_queue 表，下次加载时继续发送
+        if self.outbound is not None:
+            await self.outbound.close()
+
         if self.jx3api:
             await self.jx3api.close()
 
@@ -154,14 +186,35 @@ class Jx3ApiPlugin(Star):
         self.jx3api = JX3APIService(self.conf, self.plugin_sql_db, self.local_sql_db)
         self.aijx3 = AIJX3Service(self.conf, self.plugin_sql_db, self.local_sql_db)
         self.jx3box = JX3BOXService(self.conf, self.plugin_sql_db, self.local_sql_db)
+        self.rank_sweep = RankSweep(self.jx3api, self.icons)
+        # 渲染缓存：图标不参与单次缓存键，以图标内容摘要区分
+        icons_digest = hashlib.sha256(json.dumps(self.icons, sort_keys=True).encode("utf-8")).hexdigest()
+        self.render_cache = RenderCache(
+            self.local_data_dir / "render_cache",
+            max_bytes=int(self.conf.get("render_cache_mb", 200)) * 1024 * 1024,
+            salt=icons_digest,
+        )
+        # 出站队列：指令回复与后台推送统一按平台和会话限速
+        outbound_conf = self.conf.get("fsdl", {})
+        self.outbound = OutboundQueue(
+            cast(Context, self.context),
+            self.local_sql_db,
+            platform_rate=outbound_conf.get("platform_rate", 5),
+            session_rate=outbound_conf.get("session_rate", 1),
+            enable=outbound_conf.get("enable", True),
+        )
         self.jx3at = AsyncTask(
             cast(Context, self.context),
             self.conf,
             self.jx3api,
             self.jx3box,
             self.local_sql_db,
+            self.rank_sweep,
+            self.render_cache,
+            self.icons,
+            self.outbound,
         )
-        self.jx3cmd = MessageBuilder(self.server, self.jx3api, self.aijx3, self.jx3box, self.bilei, self.jx3at, self.icons)
+        self.jx3cmd = MessageBuilder(self.server, self.jx3api, self.aijx3, self.jx3box, self.bilei, self.jx3at, self.icons, self.render_cache, self.outbound)
 
 
     async def init_bilei_data(self):
@@ -169,44 +222,99 @@ class Jx3ApiPlugin(Star):
         # 连接本地数据
         await self.local_sql_db.connect()
         # 创建bilei表
-        await self.local_sql_db.execute("""
-        CREATE TABLE IF NOT EXISTS bilei(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            text TEXT,
-            time TEXT,
-            user TEXT                                           
-        )
-        """)
+        await create_tables(self.local_sql_db, schema.BILEI)
     
 
     async def init_tuishong_data(self):
         """初始化推送数据表"""
         # 创建tuishong表
+        await create_tables(self.local_sql_db, schema.TUISHONG)
+
+
+    async def init_push_state_data(self):
+        """初始化分服务器推送状态表"""
+        await create_tables(self.local_sql_db, schema.PUSH_STATE)
+
+
+    async def init_push_retry_data(self):
+        """初始化推送重试队列表"""
+        await create_tables(self.local_sql_db, schema.PUSH_RETRY)
+        # 旧版重试表没有图片列
+        columns = await self.local_sql_db.fetch_all("PRAGMA table_info(push_retry)")
+        if not any(column["name"] == "image" for column in columns):
+            await self.local_sql_db.execute("ALTER TABLE push_retry ADD COLUMN image TEXT")
+
+
+    async def init_push_subscription_data(self):
+        """初始化推送订阅表"""
+        await create_tables(self.local_sql_db, schema.PUSH_SUBSCRIPTION)
+        # 开服订阅改为按服务器，旧版订阅固定监控梦江南
         await self.local_sql_db.execute("""
-        CREATE TABLE IF NOT EXISTS tuishong (
-            id INTEGER PRIMARY KEY CHECK (id = 1),
-            kfts INTEGER DEFAULT 1,
-            xwts INTEGER DEFAULT 0,
-            smts INTEGER DEFAULT 0,
-            ctts INTEGER DEFAULT 0
-        )
+        UPDATE OR IGNORE push_subscription SET server='梦江南'
+        WHERE topic='kfts' AND server=''
         """)
         await self.local_sql_db.execute("""
-        INSERT OR IGNORE INTO tuishong (id)
-        VALUES (1)
-        """)        
+        DELETE FROM push_subscription WHERE topic='kfts' AND server=''
+        """)
+
+
+    async def init_push_activity_data(self):
+        """初始化推送活跃时段统计表"""
+        await create_tables(self.local_sql_db, schema.PUSH_ACTIVITY)
+
+
+    async def init_push_seen_data(self):
+        """初始化已推送事件记录表"""
+        await create_tables(self.local_sql_db, schema.PUSH_SEEN)
+
+
+    async def init_outbound_queue_data(self):
+        """初始化出站消息队列表"""
+        await create_tables(self.local_sql_db, schema.OUTBOUND_QUEUE)
 
 
     async def init_achievement_cache_data(self):
         """初始化资历基础数据缓存表"""
-        await self.local_sql_db.execute("""
-        CREATE TABLE IF NOT EXISTS achievement_cache(
-            key TEXT PRIMARY KEY,
-            content TEXT NOT NULL,
-            updated_at TEXT NOT NULL
-        )
-        """)
+        await create_tables(self.local_sql_db, schema.ACHIEVEMENT_CACHE)
+
+
+    async def init_keju_data(self):
+        """初始化科举题库表并加载本地索引"""
+        await create_tables(self.local_sql_db, schema.KEJU_BANK)
+        await self.jx3api.keju_bank.load()
+
+
+    async def init_price_data(self):
+        """初始化价格时序表"""
+        await create_tables(self.local_sql_db, schema.PRICE_SERIES)
+        # 旧版本按原始物品名记录，统一改为归一化名称
+        rows = await self.local_sql_db.fetch_all("SELECT DISTINCT series FROM price_series WHERE series LIKE 'item:%'")
+        for row in rows:
+            series = item_series(row["series"][len("item:"):])
+            if series != row["series"]:
+                await self.local_sql_db.execute("UPDATE OR IGNORE price_series SET series=? WHERE series=?", (series, row["series"]))
+                await self.local_sql_db.execute("DELETE FROM price_series WHERE series=?", (row["series"],))
+        self.jx3api.price_store.chart_cache = RenderCache(self.local_data_dir / "charts", max_bytes=CHART_CACHE_BYTES)
+
+
+    async def init_payload_cache_data(self):
+        """初始化接口缓存表并清理过期数据"""
+        await create_tables(self.local_sql_db, schema.PAYLOAD_CACHE)
+        await self.jx3api.payload_cache.purge_expired()
+
+
+    async def init_serendipity_event_data(self):
+        """初始化奇遇采集表"""
+        await create_tables(self.local_sql_db, schema.SERENDIPITY_EVENT)
+        await self.jx3api.event_store.load()
+
+
+    async def init_serendipity_catalog_data(self):
+        """初始化奇遇目录表"""
+        await create_tables(self.local_sql_db, schema.SERENDIPITY_CATALOG)
+        catalog = self.jx3box.serendipity_catalog
+        await catalog.load()
+        catalog.seed_names(path.stem for path in self.plugin_temp_serendipity.glob("*.png"))
 
 
     def ini_command_map(self):
@@ -251,6 +359,8 @@ class Jx3ApiPlugin(Star):
             "的卢": self. jx3cmd.dilujilu,
             "金价": self. jx3cmd.jinjia,
             "物价": self. jx3cmd.wujia,
+            "金价走势": self. jx3cmd.jinjiazoushi,
+            "物价走势": self. jx3cmd.wujiazoushi,
             "成本": self. jx3cmd.chengbeng,
             "看号": self. jx3cmd.kanhao,
             "帮战": self. jx3cmd.bangzhanjilu,
@@ -317,6 +427,13 @@ class Jx3ApiPlugin(Star):
             "新闻推送": self. jx3cmd.xinwenzhixun,
             "刷马推送": self. jx3cmd.shuamamsg,
             "赤兔推送": self. jx3cmd.chitusg,
+            "维护推送": self. jx3cmd.weihutuisong,
+            "关隘推送": self. jx3cmd.guanaituisong,
+            "的卢推送": self. jx3cmd.dilutuisong,
+            "诛恶推送": self. jx3cmd.zhuetuisong,
+            "订阅": self.jx3cmd.dingyue,
+            "退订": self.jx3cmd.tuiding,
+            "我的订阅": self.jx3cmd.wodedingyue,
             "避雷添加": self.jx3cmd.bilei_add,
             "避雷查看": self.jx3cmd.bilei_all,
             "避雷查询": self.jx3cmd.bilei_select,
@@ -361,7 +478,22 @@ class Jx3ApiPlugin(Star):
 
             if arg_index < len(args):
                 raw = args[arg_index]
+                # 走势指令省略服务器时，范围参数不当作服务器
+                if (
+                    p.name == "server"
+                    and raw in TREND_SPANS
+                    and "span" in sig.parameters
+                    and p.default is not inspect._empty
+                ):
+                    call_args.append(p.default)
+                    continue
                 arg_index += 1
+                # 服务器参数先在本地归一和校验，无效名称不再请求上游
+                if p.name == "server":
+                    server = self.jx3cmd.resolve_server(raw)
+                    if server is None:
+                        return event.plain_result(f"未找到服务器：{raw}")
+                    raw = server
                 try:
                     if p.annotation is int:
                         call_args.append(int(raw))
@@ -0,0 +1,257 @@
+"""推送流测试：用本地 WebSocket 替身服务代替 JX3API 推送流。
+
+覆盖 2001/2002 消息进入开服状态比较与新闻去重推送、服务端断开后的退避重连，
+断线后开服与新闻任务恢复轮询，以及补拉与轮询并发时不重复推送。依赖 AstrBot 运行环境，未安装时跳过。
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("astrbot.api")
+pytest.importorskip("apscheduler")
+pytest.importorskip("aiosqlite")
+web = pytest.importorskip("aiohttp.web")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.async_task import AsyncTask  # noqa: E402
+from core.jx3api_data import JX3APIService  # noqa: E402
+from core.push_stream import PushStream  # noqa: E402
+from core.schema import PUSH_TABLES, create_tables  # noqa: E402
+from core.server_registry import ServerRegistry  # noqa: E402
+from core.sqlite import AsyncSQLiteDB  # noqa: E402
+
+
+class StandInServer:
+    """本地 WebSocket 替身：记录每次连接，由测试逐条下发消息或断开连接"""
+
+    def __init__(self):
+        self.connections = []
+        self.connected_at = []
+        self.closed_at = []
+        self._runner = None
+        self.url = ""
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections.append(ws)
+        self.connected_at.append(time.monotonic())
+        async for _ in ws:
+            pass
+        return ws
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/", self._handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"ws://{host}:{port}/"
+
+    async def send(self, action: int, data: dict):
+        await self.connections[-1].send_str(json.dumps({"action": action, "data": data}, ensure_ascii=False))
+
+    async def drop(self):
+        await self.connections[-1].close()
+        self.closed_at.append(time.monotonic())
+
+    async def stop(self):
+        for ws in self.connections:
+            await ws.close()
+        await self._runner.cleanup()
+
+
+class StandInAPI:
+    """JX3API 替身：开服状态列表固定为梦江南正常，新闻为空"""
+
+    token = ""
+    kaifu_message = staticmethod(JX3APIService.kaifu_message)
+    news_key = staticmethod(JX3APIService.news_key)
+    news_message = staticmethod(JX3APIService.news_message)
+
+    def __init__(self):
+        self.server_registry = ServerRegistry()
+        self.calls = []
+        self.news = []
+
+    async def fetch_raw(self, path, params, auth=False):
+        self.calls.append(path)
+        if path == "/server/status/check":
+            return [{"server": "梦江南", "zone": "电信区", "status": "正常"}]
+        if path == "/news/records":
+            return list(self.news)
+        return []
+
+
+class StandInBox:
+    async def refresh_serendipity_catalog(self):
+        return 0
+
+
+async def until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待超时")
+        await asyncio.sleep(0.02)
+
+
+async def make_task(tmp_path, server: StandInServer):
+    db = AsyncSQLiteDB(str(tmp_path / "push.db"))
+    await db.connect()
+    await create_tables(db, *PUSH_TABLES)
+
+    conf = {key: {"enable": False} for key in ("whts", "gats", "dlts", "zets", "smts", "ctts")}
+    conf["kfts"] = {"enable": True, "time": 60, "umos": ["test:group:1=梦江南"]}
+    conf["xwts"] = {"enable": True, "time": 60, "umos": ["test:group:1"]}
+    task = AsyncTask(None, conf, StandInAPI(), StandInBox(), db)
+
+    sent = []
+
+    async def deliver(umos, text, source="", image=None):
+        sent.append((list(umos), text))
+        # 模拟令牌桶与发送队列带来的发送耗时
+        await asyncio.sleep(0.1)
+        return len(umos)
+
+    task.dispatcher.deliver = deliver
+    await task.init_tasks()
+
+    # 与 init_tasks 中 tsws 启用时的接线一致，缩短退避以便测试
+    task.stream = PushStream(server.url, task._on_stream_event, task._on_stream_state, min_backoff=0.2, max_backoff=1)
+    task.stream.start()
+    return task, db, sent
+
+
+def run(coro):
+    asyncio.run(coro)
+
+
+def test_stream_messages_reach_state_and_news_push(tmp_path):
+    async def main():
+        server = StandInServer()
+        await server.start()
+        task, db, sent = await make_task(tmp_path, server)
+        applied, pushed = [], []
+        apply_state, push_fresh = task._apply_state, task._push_fresh
+
+        async def spy_apply(*args):
+            applied.append(args[:3])
+            return await apply_state(*args)
+
+        async def spy_push(topic, items, *args, **kwargs):
+            pushed.append((topic, [item[0] for item in items]))
+            return await push_fresh(topic, items, *args, **kwargs)
+
+        task._apply_state, task._push_fresh = spy_apply, spy_push
+        try:
+            await until(lambda: task.stream.connected)
+            # 连接后补拉一次，随后开服与新闻任务暂停轮询
+            await until(lambda: task.scheduler.get_job("kfts").next_run_time is None)
+            assert task.scheduler.get_job("xwts").next_run_time is None
+
+            await server.send(2001, {"server": "梦江南", "status": 0})
+            await until(lambda: sent)
+            assert applied[-1] == ("kfts", "梦江南", 0)
+            assert sent[-1] == (["test:group:1"], "梦江南服务器当前维护中，等会再来吧！")
+
+            # 未订阅的服务器不进入状态比较
+            await server.send(2001, {"server": "唯我独尊", "status": 1})
+            news = {"id": 101, "type": "公告", "title": "测试新闻", "date": "2026-01-01", "url": "https://example.com/101"}
+            await server.send(2002, news)
+            await until(lambda: len(sent) == 2)
+            assert all(args[1] != "唯我独尊" for args in applied)
+            assert pushed[-1] == ("xwts", ["101"])
+            assert "测试新闻" in sent[-1][1]
+
+            # 同一条新闻重复下发只推送一次
+            await server.send(2002, news)
+            await until(lambda: len(pushed) == 2)
+            assert len(sent) == 2
+        finally:
+            await task.destroy()
+            await server.stop()
+            await db.close()
+
+    run(main())
+
+
+def test_stream_reconnects_with_backoff(tmp_path):
+    async def main():
+        server = StandInServer()
+        await server.start()
+        task, db, sent = await make_task(tmp_path, server)
+        try:
+            await until(lambda: len(server.connections) == 1 and task.stream.connected)
+            await server.drop()
+            await until(lambda: len(server.connections) == 2 and task.stream.connected)
+            assert task.stream.reconnects == 1
+            # 退避时间带随机抖动，在 min_backoff 的 0.5~1 倍之间
+            assert server.connected_at[1] - server.closed_at[0] >= 0.1
+
+            # 重连后的消息照常处理
+            await server.send(2001, {"server": "梦江南", "status": 0})
+            await until(lambda: sent)
+        finally:
+            await task.destroy()
+            await server.stop()
+            await db.close()
+
+    run(main())
+
+
+def test_polling_resumes_on_disconnect(tmp_path):
+    async def main():
+        server = StandInServer()
+        await server.start()
+        task, db, sent = await make_task(tmp_path, server)
+        try:
+            await until(lambda: task.stream.connected)
+            await until(lambda: task.scheduler.get_job("kfts").next_run_time is None)
+            calls = len(task.jx3api.calls)
+
+            # 服务端断开后立即恢复轮询，并马上执行一轮
+            await server.drop()
+            await until(lambda: not task.stream.connected)
+            for gid in ("kfts", "xwts"):
+                assert task.scheduler.get_job(gid).next_run_time is not None
+            await until(lambda: len(task.jx3api.calls) > calls)
+
+            # 重连后再次补拉并暂停轮询
+            await until(lambda: task.stream.connected)
+            await until(lambda: task.scheduler.get_job("kfts").next_run_time is None)
+        finally:
+            await task.destroy()
+            await server.stop()
+            await db.close()
+
+    run(main())
+
+
+def test_catch_up_and_poll_do_not_push_twice(tmp_path):
+    async def main():
+        server = StandInServer()
+        await server.start()
+        task, db, sent = await make_task(tmp_path, server)
+        try:
+            await until(lambda: task.stream.connected)
+            await until(lambda: task.scheduler.get_job("xwts").next_run_time is None)
+            # 主题已有记录后出现一条新新闻，补拉与轮询同时发现它
+            await task.seen.mark("xwts", ["100"])
+            task.jx3api.news = [{"id": 102, "type": "公告", "title": "并发新闻", "date": "2026-01-01", "url": ""}]
+            await asyncio.gather(task._job_group("xwts", catch_up=True), task._job_group("xwts", catch_up=True))
+            assert sum("并发新闻" in text for _, text in sent) == 1
+        finally:
+            await task.destroy()
+            await server.stop()
+            await db.close()
+
+    run(main())
@@ -0,0 +1,49 @@
+"""数据表结构测试：只依赖标准库 sqlite3，不需要 AstrBot 运行环境。
+
+检查建表语句可重复执行，以及插件初始化覆盖 core/schema.py 中的每张表。
+"""
+
+import ast
+import sqlite3
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core import schema  # noqa: E402
+
+
+def table_constants():
+    return {name for name, value in vars(schema).items() if name.isupper() and value in schema.ALL_TABLES}
+
+
+def create_all(conn):
+    for statements in schema.ALL_TABLES:
+        for sql in statements:
+            conn.execute(sql)
+
+
+def test_statements_are_repeatable():
+    conn = sqlite3.connect(":memory:")
+    create_all(conn)
+    create_all(conn)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert {"tuishong", "push_state", "push_retry", "push_subscription", "push_seen", "outbound_queue"} <= tables
+    # 推送开关表始终只有一行
+    assert conn.execute("SELECT COUNT(*) FROM tuishong").fetchone()[0] == 1
+    conn.close()
+
+
+def test_push_tables_are_part_of_all_tables():
+    assert all(table in schema.ALL_TABLES for table in schema.PUSH_TABLES)
+
+
+def test_plugin_creates_every_table():
+    tree = ast.parse((ROOT / "main.py").read_text(encoding="utf-8"))
+    used = {
+        node.attr
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "schema"
+    }
+    assert used == table_constants()